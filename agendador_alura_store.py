@@ -0,0 +1,558 @@
+# -*- coding: utf-8 -*-
+"""
+Agendador e linha de comando do Projeto de Análise de Vendas - Alura Store
+
+Escolhe os relatórios de `challenge_alura_store.py`, calcula cada recurso
+(cubo, contagem de produtos, série diária...) uma vez, com ou sem o cache de
+resultados, e roda os relatórios em threads ou processos. Também traz os
+pontos de entrada `main`, `main_streaming` e `main_cli`; rodar
+`python challenge_alura_store.py` continua chamando a linha de comando daqui.
+"""
+
+import io
+import os
+import re
+import sys
+import json
+import argparse
+import contextlib
+import functools
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, ProcessPoolExecutor, wait
+
+import pandas as pd
+
+from armazenamento_alura_store import (
+    ARQUIVOS_LOJAS, ARQUIVO_MANIFESTO_COLUNAR, DIR_COLUNAR, CACHE_RESULTADOS, LIMITE_CACHE_RESULTADOS,
+    CacheResultados, impressao_arquivo, chave_resultado,
+)
+from geo_alura_store import TAMANHO_CELULA_GEO, TAMANHO_CELULA_ARVORE
+from challenge_alura_store import (
+    _PERFIL, ARQUIVO_PERFIL, DIR_CPROFILE, ativar_perfil, finalizar_perfil, instrumentar, DIR_QUARENTENA,
+    obter_arquivos_lojas, carregar_dados, MODO_COMPACTO, construir_cubo, _somar_cubos, contar_produtos,
+    carregar_agregados_em_blocos, converter_para_colunar, carregar_colunar, atualizar_agregados_incrementais,
+    TAMANHO_FRAGMENTO, carregar_agregados_fragmentados, construir_serie_diaria, combinar_series_diarias,
+    PRECISAO_DISTRIBUICAO, VALOR_MINIMO_DISTRIBUICAO, _somar_distribuicoes, construir_distribuicao,
+    _SAIDA_TABELAS, DIR_TABELAS, FORMATOS_TABELAS, configurar_exportacao, finalizar_exportacao,
+    calcular_nulos, verificar_nulos, relatorio_vendas_por_loja, graficos_comparativos_vendas,
+    relatorio_vendas_por_categoria, graficos_categorias_comparativas, avaliacao_por_categoria,
+    avaliacao_comparativa_categorias, avaliacao_geral_por_loja, produtos_mais_menos_vendidos,
+    frete_medio_por_loja, relatorio_distribuicoes, relatorio_series_temporais, LIMITE_LOJAS_DETALHADAS,
+    RELATORIOS_SOB_DEMANDA, relatorio_multilojas, aplicar_modo_multilojas,
+    calcular_densidade_geografica, analise_geografica_clientes, _LOCAIS_LOJAS, FAIXAS_DISTANCIA_KM,
+    configurar_locais_lojas, calcular_frete_distancia, _somar_frete_distancia,
+    relatorio_frete_distancia, _SAIDA_GRAFICOS, DIR_GRAFICOS, configurar_saida_graficos, finalizar_graficos,
+    desativar_graficos,
+)
+
+# ------------------------------------------------------------------------------
+# Agendador de relatórios: seleção, dependências e execução concorrente
+# ------------------------------------------------------------------------------
+
+# Recursos calculados a partir das linhas de cada loja:
+# nome -> (cálculo sobre {loja: DataFrame}, junção das partes de cada loja, parâmetros).
+# Cada recurso é a junção de partes independentes por loja, então o cache de
+# resultados guarda uma parte por loja e a mudança de um CSV invalida só as dela.
+# Os parâmetros entram na chave do cache (ex.: tamanho das células do mapa).
+RECURSOS_POR_LOJA = {
+    "cubo": (construir_cubo, _somar_cubos, ()),
+    "produtos": (contar_produtos, pd.concat, ()),
+    "serie_diaria": (construir_serie_diaria, combinar_series_diarias, ()),
+    "nulos": (calcular_nulos, lambda partes: {k: v for parte in partes for k, v in parte.items()}, ()),
+    "celulas_geo": (calcular_densidade_geografica,
+                    lambda partes: {k: v for parte in partes for k, v in parte.items()},
+                    (TAMANHO_CELULA_GEO, "grade")),
+    "distribuicao": (construir_distribuicao, _somar_distribuicoes,
+                     (PRECISAO_DISTRIBUICAO, VALOR_MINIMO_DISTRIBUICAO)),
+    # Parâmetros lidos na hora: mudar a localização das lojas invalida as partes
+    "frete_distancia": (calcular_frete_distancia, _somar_frete_distancia,
+                        lambda: (_LOCAIS_LOJAS["impressao"], FAIXAS_DISTANCIA_KM, TAMANHO_CELULA_ARVORE)),
+}
+
+def _parametros_recurso(recurso):
+    """Parâmetros do recurso para a chave do cache (callable = calculados na hora)."""
+    parametros = RECURSOS_POR_LOJA[recurso][2]
+    return parametros() if callable(parametros) else parametros
+
+# Relatório -> (execução a partir dos recursos, recursos necessários, colunas lidas).
+# Recursos: "lojas" (DataFrames ou, no streaming e com o cache de resultados, só
+# os nomes) e os de RECURSOS_POR_LOJA: "cubo" (construir_cubo), "produtos"
+# (contar_produtos), "serie_diaria" (construir_serie_diaria), "nulos"
+# (calcular_nulos), "celulas_geo" (calcular_densidade_geografica),
+# "distribuicao" (construir_distribuicao) e "frete_distancia"
+# (calcular_frete_distancia, com a localização de configurar_locais_lojas).
+# Colunas None = todas as colunas do CSV.
+RELATORIOS = {
+    "nulos": (lambda r: verificar_nulos(r["lojas"], r["nulos"]), ("nulos",), None),
+    "vendas": (lambda r: relatorio_vendas_por_loja(r["lojas"], r["cubo"]),
+               ("cubo",), ("Preço", "Data da Compra")),
+    "comparativo_vendas": (lambda r: graficos_comparativos_vendas(r["lojas"], r["cubo"]),
+                           ("cubo",), ("Preço", "Data da Compra")),
+    "series_temporais": (lambda r: relatorio_series_temporais(r["lojas"], r["serie_diaria"]),
+                         ("serie_diaria",), ("Preço", "Data da Compra", "Categoria do Produto")),
+    "categorias": (lambda r: relatorio_vendas_por_categoria(r["lojas"], r["cubo"]),
+                   ("cubo",), ("Preço", "Data da Compra", "Categoria do Produto")),
+    "comparativo_categorias": (lambda r: graficos_categorias_comparativas(r["lojas"], r["cubo"]),
+                               ("cubo",), ("Preço", "Data da Compra", "Categoria do Produto")),
+    "avaliacao_categorias": (lambda r: avaliacao_por_categoria(r["lojas"], r["cubo"]),
+                             ("cubo",), ("Avaliação da compra", "Categoria do Produto")),
+    "comparativo_avaliacao": (lambda r: avaliacao_comparativa_categorias(r["lojas"], r["cubo"]),
+                              ("cubo",), ("Avaliação da compra", "Categoria do Produto")),
+    "avaliacao_geral": (lambda r: avaliacao_geral_por_loja(r["lojas"], r["cubo"]),
+                        ("cubo",), ("Avaliação da compra",)),
+    "produtos": (lambda r: produtos_mais_menos_vendidos(r["lojas"], top=10, contagem_produtos=r["produtos"],
+                                                        sketches_produtos=r.get("sketches_produtos")),
+                 ("produtos",), ("Produto",)),
+    "frete": (lambda r: frete_medio_por_loja(r["lojas"], r["cubo"]), ("cubo",), ("Frete",)),
+    "distribuicao": (lambda r: relatorio_distribuicoes(r["lojas"], r["distribuicao"]), ("distribuicao",),
+                     ("Preço", "Frete", "Avaliação da compra", "Categoria do Produto")),
+    "multilojas": (lambda r: relatorio_multilojas(r["lojas"], r["cubo"], r["produtos"]), ("cubo", "produtos"),
+                   ("Preço", "Frete", "Avaliação da compra", "Data da Compra", "Categoria do Produto", "Produto")),
+    "geografico": (lambda r: analise_geografica_clientes(r["lojas"], celulas_lojas=r["celulas_geo"]),
+                   ("celulas_geo",), ("lat", "lon")),
+    "frete_distancia": (lambda r: relatorio_frete_distancia(r["lojas"], r["frete_distancia"]), ("frete_distancia",),
+                        ("Frete", "Categoria do Produto", "lat", "lon")),
+}
+
+def _validar_relatorios(relatorios):
+    nomes = list(relatorios) if relatorios else [nome for nome in RELATORIOS if nome not in RELATORIOS_SOB_DEMANDA]
+    desconhecidos = [nome for nome in nomes if nome not in RELATORIOS]
+    if desconhecidos:
+        raise ValueError(f"Relatórios desconhecidos: {desconhecidos}. Disponíveis: {list(RELATORIOS)}")
+    return list(dict.fromkeys(nomes))
+
+def selecionar_lojas(lojas):
+    """
+    Mapa {loja: arquivo} das lojas pedidas ("Loja 2" ou só 2). None = todas.
+    """
+    if not lojas:
+        return None
+    arquivos = {}
+    for loja in lojas:
+        numero = re.search(r"\d+", str(loja))
+        if numero is None:
+            raise ValueError(f"Loja inválida: {loja!r} (use 'Loja 1' ou 1)")
+        nome_loja = f"Loja {int(numero.group())}"
+        arquivos[nome_loja] = ARQUIVOS_LOJAS.get(nome_loja, f"loja_{int(numero.group())}.csv")
+    return arquivos
+
+def _colunas_necessarias(nomes):
+    """
+    União das colunas dos relatórios pedidos (None se algum precisa de todas).
+    As colunas usadas só nos filtros não entram: o filtro é aplicado na leitura.
+    """
+    colunas = []
+    for nome in nomes:
+        if RELATORIOS[nome][2] is None:
+            return None
+        colunas += RELATORIOS[nome][2]
+    return list(dict.fromkeys(colunas))
+
+class _SaidaPorThread(io.TextIOBase):
+    """
+    Substitui sys.stdout durante a execução concorrente: cada thread com buffer
+    próprio escreve nele, as demais escrevem direto na saída original.
+    """
+    def __init__(self, destino):
+        self.destino = destino
+        self.local = threading.local()
+
+    def write(self, texto):
+        (getattr(self.local, "buffer", None) or self.destino).write(texto)
+        return len(texto)
+
+    def flush(self):
+        self.destino.flush()
+
+def _executar_relatorio(nome, recursos):
+    """Roda o relatório `nome`; um erro é impresso e não interrompe os demais."""
+    try:
+        RELATORIOS[nome][0](recursos)
+    except Exception as e:
+        print(f"Erro no relatório '{nome}': {e}")
+
+def _executar_capturando(nome, recursos, saida):
+    """Roda o relatório com a saída da thread guardada em um buffer; retorna o texto."""
+    saida.local.buffer = io.StringIO()
+    try:
+        _executar_relatorio(nome, recursos)
+    finally:
+        texto = saida.local.buffer.getvalue()
+        saida.local.buffer = None
+    return texto
+
+def _executar_em_processo(nome, recursos, dir_graficos, formatos, dir_tabelas, formatos_tabelas):
+    """
+    Roda um relatório em um processo do pool, com gráficos e tabelas gravados no próprio processo.
+    Retorna (texto impresso, arquivos de gráficos, arquivos de tabelas).
+    """
+    if dir_graficos:
+        configurar_saida_graficos(dir_graficos, formatos, max_workers=0)
+    else:
+        desativar_graficos()
+    if dir_tabelas:
+        configurar_exportacao(dir_tabelas, formatos_tabelas)
+    saida = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(saida):
+            _executar_relatorio(nome, recursos)
+    finally:
+        graficos = finalizar_graficos()
+        tabelas = finalizar_exportacao()
+    return saida.getvalue(), graficos, tabelas
+
+def _executar_grafo(tarefas, recursos, max_workers, ao_concluir):
+    """
+    Executa as `tarefas` ({nome: (função(recursos), dependências)}) assim que as dependências estão
+    em `recursos`, com até `max_workers` em paralelo (1 = sequencial, na ordem do dicionário).
+    """
+    pendentes = dict(tarefas)
+    if max_workers <= 1:
+        while pendentes:
+            prontas = [nome for nome, (_, deps) in pendentes.items() if all(d in recursos for d in deps)]
+            if not prontas:
+                raise RuntimeError(f"Dependências não resolvidas: {sorted(pendentes)}")
+            nome = prontas[0]
+            recursos[nome] = pendentes.pop(nome)[0](recursos)
+            ao_concluir(nome)
+        return
+
+    # Etapas em threads paralelas: sem pico de memória por etapa (ver _executar_instrumentado)
+    _PERFIL["concorrentes"] += 1
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            em_execucao = {}
+            while pendentes or em_execucao:
+                for nome, (funcao, deps) in list(pendentes.items()):
+                    if all(d in recursos for d in deps):
+                        em_execucao[pool.submit(funcao, recursos)] = nome
+                        del pendentes[nome]
+                if not em_execucao:
+                    raise RuntimeError(f"Dependências não resolvidas: {sorted(pendentes)}")
+                concluidos, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+                for futuro in concluidos:
+                    nome = em_execucao.pop(futuro)
+                    recursos[nome] = futuro.result()
+                    ao_concluir(nome)
+    finally:
+        _PERFIL["concorrentes"] -= 1
+
+# Marca de "sem resultado no cache" (None é um resultado válido, ex.: loja sem datas)
+_AUSENTE = object()
+
+@instrumentar
+def _carregar_com_cache(cache, necessarios, lojas, colunas, inicio, fim, fonte, compacto, categorias,
+                        dir_quarentena=None):
+    """
+    Recursos `necessarios` a partir do cache de resultados, lendo só as lojas com alguma parte ausente.
+    Retorna os recursos, com "lojas" = nomes das lojas, ou None sem nenhuma loja disponível.
+    """
+    caminhos = obter_arquivos_lojas(fonte, arquivos=selecionar_lojas(lojas))
+    chaves, partes, faltantes = {}, {}, {}
+    for nome_loja, caminho in caminhos.items():
+        try:
+            impressao = impressao_arquivo(caminho)
+        except OSError as e:
+            print(f"Erro crítico ao carregar {nome_loja}: {e}")
+            continue
+        for recurso in necessarios:
+            chave = chave_resultado(recurso, _parametros_recurso(recurso), impressao, nome_loja,
+                                    colunas, inicio, fim, categorias, compacto, dir_quarentena)
+            chaves[(nome_loja, recurso)] = chave
+            parte = cache.obter(chave, _AUSENTE)
+            if parte is _AUSENTE:
+                faltantes.setdefault(nome_loja, []).append(recurso)
+            else:
+                partes[(nome_loja, recurso)] = parte
+
+    total = len(chaves)
+    print(f">>> Cache de resultados: {len(partes)}/{total} partes reaproveitadas "
+          f"({len(caminhos) - len(faltantes)}/{len(caminhos)} lojas sem leitura dos dados).")
+    if faltantes:
+        dados = carregar_dados(compacto=compacto, colunas=colunas, inicio=inicio, fim=fim,
+                               categorias=categorias, dir_quarentena=dir_quarentena,
+                               caminhos={nome_loja: caminhos[nome_loja] for nome_loja in faltantes})
+        for nome_loja, df in dados.items():
+            for recurso in faltantes[nome_loja]:
+                parte = RECURSOS_POR_LOJA[recurso][0]({nome_loja: df})
+                cache.guardar(chaves[(nome_loja, recurso)], parte)
+                partes[(nome_loja, recurso)] = parte
+        cache.limitar()
+
+    disponiveis = [nome_loja for nome_loja in caminhos
+                   if all((nome_loja, recurso) in partes for recurso in necessarios)]
+    if not disponiveis: return None
+    recursos = {"lojas": disponiveis}
+    for recurso in necessarios:
+        recursos[recurso] = RECURSOS_POR_LOJA[recurso][1]([partes[(nome_loja, recurso)] for nome_loja in disponiveis])
+    return recursos
+
+@instrumentar
+def executar_relatorios(relatorios=None, lojas=None, inicio=None, fim=None, fonte=None,
+                        compacto=False, max_workers=1, executor="threads", categorias=None, cache=None,
+                        dir_quarentena=None, colunar=None, multilojas=None):
+    """
+    Agendador: lê só as lojas, colunas e filtros que os `relatorios` pedidos usam, calcula cada recurso
+    uma vez e roda os relatórios em paralelo (`max_workers`), imprimindo cada saída inteira, na ordem.
+    """
+    nomes = _validar_relatorios(relatorios)
+    if colunar is not None and not lojas:
+        with open(os.path.join(colunar, ARQUIVO_MANIFESTO_COLUNAR), encoding="utf-8") as arquivo:
+            n_lojas = len(json.load(arquivo)["lojas"])
+    else:
+        n_lojas = len(selecionar_lojas(lojas) or ARQUIVOS_LOJAS)
+    nomes = aplicar_modo_multilojas(nomes, n_lojas, multilojas)
+    if executor not in ("threads", "processos"):
+        raise ValueError(f"Executor inválido: {executor!r} (use 'threads' ou 'processos')")
+    if _SAIDA_GRAFICOS["ativo"] and _SAIDA_GRAFICOS["dir"] is None:
+        max_workers = 1
+
+    if "frete_distancia" in nomes:
+        # Na execução padrão, sem a localização das lojas a análise de frete por distância fica de fora
+        if configurar_locais_lojas(fonte, avisar=bool(relatorios)) is None and not relatorios:
+            nomes.remove("frete_distancia")
+    colunas = _colunas_necessarias(nomes)
+    necessarios = list(dict.fromkeys(recurso for nome in nomes for recurso in RELATORIOS[nome][1]))
+    tarefas = {}
+    if cache is not None and colunar is None:
+        recursos = _carregar_com_cache(cache, necessarios, lojas, colunas, inicio, fim, fonte,
+                                       compacto, categorias, dir_quarentena)
+        if not recursos: return
+    else:
+        if colunar is not None:
+            arquivos = selecionar_lojas(lojas)
+            dados = carregar_colunar(colunar, arquivos and list(arquivos), colunas, inicio, fim, categorias)
+        else:
+            dados = carregar_dados(fonte, compacto=compacto, arquivos=selecionar_lojas(lojas),
+                                   colunas=colunas, inicio=inicio, fim=fim, categorias=categorias,
+                                   dir_quarentena=dir_quarentena)
+        if not dados: return
+        recursos = {"lojas": dados}
+        # Cada recurso (ex.: o cubo pré-agregado) é calculado uma única vez e consultado por todos os relatórios
+        for recurso in necessarios:
+            tarefas[recurso] = (lambda r, calcular=RECURSOS_POR_LOJA[recurso][0]: calcular(r["lojas"]), ("lojas",))
+
+    if max_workers <= 1:
+        for nome in nomes:
+            tarefas[f"relatorio:{nome}"] = (functools.partial(_executar_relatorio, nome), RELATORIOS[nome][1])
+        _executar_grafo(tarefas, recursos, 1, lambda nome: None)
+        return
+
+    saida = _SaidaPorThread(sys.stdout)
+    pool_processos = None
+    if executor == "processos":
+        pool_processos = ProcessPoolExecutor(max_workers=max_workers)
+
+    def tarefa_relatorio(nome):
+        def executar(r):
+            if pool_processos is None:
+                return _executar_capturando(nome, r, saida)
+            subconjunto = {recurso: r[recurso] for recurso in ("lojas",) + RELATORIOS[nome][1]}
+            if "produtos" in subconjunto: subconjunto["sketches_produtos"] = r.get("sketches_produtos")
+            texto, graficos, tabelas = pool_processos.submit(
+                _executar_em_processo, nome, subconjunto, _SAIDA_GRAFICOS["dir"], _SAIDA_GRAFICOS["formatos"],
+                _SAIDA_TABELAS["dir"], _SAIDA_TABELAS["formatos"]).result()
+            futuro = Future()
+            futuro.set_result(graficos)
+            _SAIDA_GRAFICOS["futuros"].append(futuro)
+            _SAIDA_TABELAS["arquivos"].extend(tabelas)
+            return texto
+        return executar
+
+    for nome in nomes:
+        tarefas[f"relatorio:{nome}"] = (tarefa_relatorio(nome), RELATORIOS[nome][1])
+
+    # Imprime as saídas na ordem pedida, assim que os relatórios anteriores terminam
+    proximo = [0]
+    def imprimir_prontos(_):
+        while proximo[0] < len(nomes) and f"relatorio:{nomes[proximo[0]]}" in recursos:
+            saida.destino.write(recursos[f"relatorio:{nomes[proximo[0]]}"])
+            proximo[0] += 1
+
+    sys.stdout = saida
+    try:
+        _executar_grafo(tarefas, recursos, max_workers, imprimir_prontos)
+    finally:
+        sys.stdout = saida.destino
+        if pool_processos is not None:
+            pool_processos.shutdown()
+
+def main_streaming(tamanho_bloco=100_000, dir_graficos=DIR_GRAFICOS, formatos=("png",),
+                   incremental=False, capacidade_sketch=None, arquivo_perfil=ARQUIVO_PERFIL,
+                   dir_cprofile=DIR_CPROFILE, dir_tabelas=DIR_TABELAS, formatos_tabelas=FORMATOS_TABELAS,
+                   relatorios=None, lojas=None, fonte=None, inicio=None, fim=None, categorias=None,
+                   processos=None, tamanho_fragmento=TAMANHO_FRAGMENTO, dir_quarentena=DIR_QUARENTENA,
+                   multilojas=None):
+    """
+    Executa os relatórios a partir dos agregados em blocos (streaming, incremental ou fragmentado),
+    sem manter as bases em memória; os relatórios que precisam das linhas ficam de fora.
+    """
+    opcoes = dict(locals())
+    if arquivo_perfil or dir_cprofile:
+        ativar_perfil(arquivo_perfil, dir_cprofile)
+        try:
+            return main_streaming(**{**opcoes, "arquivo_perfil": None, "dir_cprofile": None})
+        finally:
+            finalizar_perfil()
+
+    if dir_tabelas:
+        configurar_exportacao(dir_tabelas, formatos_tabelas)
+        try:
+            return main_streaming(**{**opcoes, "dir_tabelas": None})
+        finally:
+            print(f"{len(finalizar_exportacao())} tabelas exportadas em {dir_tabelas}")
+
+    if dir_graficos:
+        configurar_saida_graficos(dir_graficos, formatos)
+        try:
+            return main_streaming(**{**opcoes, "dir_graficos": None})
+        finally:
+            print(f"{len(finalizar_graficos())} arquivos de gráficos salvos em {dir_graficos}")
+
+    nomes = _validar_relatorios(relatorios or [nome for nome, (_, recursos, _) in RELATORIOS.items()
+                                               if nome not in RELATORIOS_SOB_DEMANDA
+                                               and set(recursos) <= {"cubo", "produtos", "distribuicao"}])
+    if incremental:
+        if lojas or inicio or fim or categorias:
+            raise ValueError("Filtros de lojas, período e categorias não são suportados no modo incremental")
+        agregados = atualizar_agregados_incrementais(fonte, tamanho_bloco=tamanho_bloco,
+                                                     dir_quarentena=dir_quarentena)
+    elif processos is not None:
+        agregados = carregar_agregados_fragmentados(fonte, tamanho_fragmento=tamanho_fragmento,
+                                                    max_workers=processos, tamanho_bloco=tamanho_bloco,
+                                                    capacidade_sketch=capacidade_sketch,
+                                                    arquivos=selecionar_lojas(lojas),
+                                                    inicio=inicio, fim=fim, categorias=categorias,
+                                                    dir_quarentena=dir_quarentena)
+    else:
+        agregados = carregar_agregados_em_blocos(fonte, tamanho_bloco=tamanho_bloco,
+                                                 capacidade_sketch=capacidade_sketch,
+                                                 arquivos=selecionar_lojas(lojas),
+                                                 inicio=inicio, fim=fim, categorias=categorias,
+                                                 dir_quarentena=dir_quarentena)
+    if not agregados["linhas"]: return
+
+    nomes = aplicar_modo_multilojas(nomes, len(agregados["linhas"]), multilojas)
+    # Nos relatórios, a lista de nomes das lojas substitui o dicionário de DataFrames
+    recursos = {
+        "lojas": list(agregados["linhas"]),
+        "cubo": agregados["cubo"],
+        "produtos": agregados["produtos"],
+        "distribuicao": agregados["distribuicao"],
+        "sketches_produtos": agregados.get("sketches_produtos"),
+    }
+    for nome in nomes:
+        if not set(RELATORIOS[nome][1]) <= set(recursos):
+            print(f"Relatório '{nome}' precisa das linhas completas e não é executado no modo streaming.")
+            continue
+        _executar_relatorio(nome, recursos)
+
+def main(dir_graficos=DIR_GRAFICOS, formatos=("png",), compacto=MODO_COMPACTO,
+         arquivo_perfil=ARQUIVO_PERFIL, dir_cprofile=DIR_CPROFILE,
+         dir_tabelas=DIR_TABELAS, formatos_tabelas=FORMATOS_TABELAS,
+         relatorios=None, lojas=None, inicio=None, fim=None, max_workers=1, executor="threads",
+         fonte=None, categorias=None, cache_resultados=CACHE_RESULTADOS,
+         dir_quarentena=DIR_QUARENTENA, colunar=DIR_COLUNAR, multilojas=None):
+    """
+    Executa todas as análises. Cada opção também pode vir da variável de ambiente
+    ALURA_STORE_* correspondente (ver README e main_cli).
+    """
+    opcoes = dict(locals())
+    if arquivo_perfil or dir_cprofile:
+        ativar_perfil(arquivo_perfil, dir_cprofile)
+        try:
+            return main(**{**opcoes, "arquivo_perfil": None, "dir_cprofile": None})
+        finally:
+            finalizar_perfil()
+
+    if dir_tabelas:
+        configurar_exportacao(dir_tabelas, formatos_tabelas)
+        try:
+            return main(**{**opcoes, "dir_tabelas": None})
+        finally:
+            print(f"{len(finalizar_exportacao())} tabelas exportadas em {dir_tabelas}")
+
+    if dir_graficos:
+        configurar_saida_graficos(dir_graficos, formatos)
+        try:
+            return main(**{**opcoes, "dir_graficos": None})
+        finally:
+            print(f"{len(finalizar_graficos())} arquivos de gráficos salvos em {dir_graficos}")
+
+    executar_relatorios(relatorios, lojas, inicio, fim, fonte, compacto=compacto,
+                        max_workers=max_workers, executor=executor, categorias=categorias,
+                        cache=CacheResultados() if cache_resultados and LIMITE_CACHE_RESULTADOS > 0 else None,
+                        dir_quarentena=dir_quarentena,
+                        colunar=colunar, multilojas=multilojas)
+
+def main_cli(argv=None):
+    """Linha de comando (exemplos no README; --help lista as opções)."""
+    parser = argparse.ArgumentParser(description="Análise de vendas da Alura Store")
+    parser.add_argument("-r", "--relatorios", nargs="+", choices=list(RELATORIOS), metavar="RELATORIO",
+                        help="relatórios a executar (padrão: todos, exceto "
+                             f"{', '.join(RELATORIOS_SOB_DEMANDA)}): {', '.join(RELATORIOS)}")
+    parser.add_argument("-l", "--lojas", nargs="+", help="lojas a analisar, ex.: 1 3 ou 'Loja 2' (padrão: todas)")
+    parser.add_argument("--inicio", help="data inicial das vendas (AAAA-MM-DD)")
+    parser.add_argument("--fim", help="data final das vendas (AAAA-MM-DD)")
+    parser.add_argument("-c", "--categorias", nargs="+", help="categorias de produto, ex.: eletronicos moveis")
+    parser.add_argument("-j", "--workers", type=int, default=1,
+                        help="relatórios executados em paralelo (só com --graficos ou --sem-graficos)")
+    parser.add_argument("--executor", choices=["threads", "processos"], default="threads")
+    parser.add_argument("--fonte", help="diretório ou URL base com os CSVs (padrão: ALURA_STORE_FONTE ou GitHub)")
+    parser.add_argument("--graficos", default=DIR_GRAFICOS, help="salva os gráficos neste diretório (headless)")
+    parser.add_argument("--formatos", default="png", help="formatos dos gráficos, ex.: png,svg")
+    parser.add_argument("--sem-graficos", action="store_true", help="não gera gráficos")
+    parser.add_argument("--tabelas", default=DIR_TABELAS, help="exporta as tabelas neste diretório")
+    parser.add_argument("--formatos-tabelas", default=",".join(FORMATOS_TABELAS), help="csv,json,parquet")
+    parser.add_argument("--compacto", action="store_true", default=MODO_COMPACTO)
+    parser.add_argument("--quarentena", default=DIR_QUARENTENA,
+                        help="grava neste diretório as linhas que violam as regras de validação e as exclui")
+    parser.add_argument("--colunar", default=DIR_COLUNAR,
+                        help="lê as lojas deste diretório colunar (mapeado em memória) em vez dos CSVs")
+    parser.add_argument("--converter-colunar", metavar="DIR",
+                        help="converte os CSVs tratados para o formato colunar neste diretório e sai")
+    parser.add_argument("--multilojas", action=argparse.BooleanOptionalAction, default=None,
+                        help="resumo ranqueado em vez de uma seção por loja "
+                             f"(padrão: automático acima de {LIMITE_LOJAS_DETALHADAS} lojas)")
+    parser.add_argument("--cache", action="store_true", default=CACHE_RESULTADOS,
+                        help="reaproveita os resultados em disco das lojas cujo CSV não mudou")
+    parser.add_argument("--sem-cache", action="store_true",
+                        help="recalcula tudo, mesmo com ALURA_STORE_CACHE_RESULTADOS=1")
+    parser.add_argument("--perfil", default=ARQUIVO_PERFIL, help="grava o trace JSON por etapa neste arquivo")
+    parser.add_argument("--cprofile", default=DIR_CPROFILE, help="grava um .prof por etapa neste diretório")
+    parser.add_argument("--streaming", action="store_true", help="lê os CSVs em blocos (agregados)")
+    parser.add_argument("--incremental", action="store_true", help="com --streaming, lê só as linhas novas")
+    parser.add_argument("--tamanho-bloco", type=int, default=100_000)
+    parser.add_argument("--capacidade-sketch", type=int, help="com --streaming, top produtos aproximado")
+    parser.add_argument("--processos", type=int,
+                        help="com --streaming, agrega fragmentos dos CSVs em N processos (map-reduce)")
+    parser.add_argument("--tamanho-fragmento", type=int, default=TAMANHO_FRAGMENTO // 2**20,
+                        help="tamanho dos fragmentos do map-reduce, em MB")
+    args = parser.parse_args(argv)
+
+    if args.sem_graficos:
+        desativar_graficos()
+        args.graficos = None
+    formatos = tuple(args.formatos.split(","))
+    formatos_tabelas = tuple(args.formatos_tabelas.split(","))
+
+    if args.converter_colunar:
+        converter_para_colunar(args.converter_colunar, args.fonte, arquivos=selecionar_lojas(args.lojas),
+                               dir_quarentena=args.quarentena)
+        print(f"Dados convertidos para o formato colunar em {args.converter_colunar}")
+        return
+    if args.streaming:
+        return main_streaming(args.tamanho_bloco, args.graficos, formatos, args.incremental,
+                              args.capacidade_sketch, args.perfil, args.cprofile, args.tabelas,
+                              formatos_tabelas, relatorios=args.relatorios, lojas=args.lojas, fonte=args.fonte,
+                              inicio=args.inicio, fim=args.fim, categorias=args.categorias,
+                              processos=args.processos, tamanho_fragmento=args.tamanho_fragmento * 2**20,
+                              dir_quarentena=args.quarentena, multilojas=args.multilojas)
+    return main(args.graficos, formatos, args.compacto, args.perfil, args.cprofile, args.tabelas,
+                formatos_tabelas, relatorios=args.relatorios, lojas=args.lojas, inicio=args.inicio,
+                fim=args.fim, max_workers=args.workers, executor=args.executor, fonte=args.fonte,
+                categorias=args.categorias, cache_resultados=args.cache and not args.sem_cache,
+                dir_quarentena=args.quarentena, colunar=args.colunar, multilojas=args.multilojas)
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,356 @@
+# -*- coding: utf-8 -*-
+"""
+Camada de armazenamento do Projeto de Análise de Vendas - Alura Store
+
+Entrada e saída usadas por `challenge_alura_store.py`: download dos CSVs
+(pool de conexões e cache em disco), formato colunar mapeado em memória e
+cache persistente de resultados. Não importa o módulo de cálculo, que
+importa daqui o que usa.
+"""
+
+import os
+import json
+import time
+import queue
+import hashlib
+import threading
+import contextlib
+import http.client
+import urllib.parse
+
+import pandas as pd
+import numpy as np
+
+# ==============================================================================
+# 1. DOWNLOAD DOS CSVs (POOL DE CONEXÕES, RETENTATIVAS E CACHE EM DISCO)
+# ==============================================================================
+
+URL_BASE_DADOS = "https://raw.githubusercontent.com/alura-es-cursos/challenge1-data-science/refs/heads/main/base-de-dados-challenge-1"
+
+ARQUIVOS_LOJAS = {
+    "Loja 1": "loja_1.csv",
+    "Loja 2": "loja_2.csv",
+    "Loja 3": "loja_3.csv",
+    "Loja 4": "loja_4.csv",
+}
+
+# Fonte alternativa (diretório espelho local ou URL base) e diretório do cache em disco
+FONTE_DADOS = os.environ.get("ALURA_STORE_FONTE", URL_BASE_DADOS)
+DIR_CACHE = os.environ.get("ALURA_STORE_CACHE", ".cache_alura_store")
+
+class PoolConexoes:
+    """
+    Pool de conexões HTTP(S) persistentes (keep-alive) compartilhado entre as
+    threads de download. Cada host mantém até `tamanho` conexões livres.
+    """
+    def __init__(self, tamanho=4, timeout=30):
+        self.tamanho = tamanho
+        self.timeout = timeout
+        self._livres = {}
+        self._lock = threading.Lock()
+
+    def _fila(self, chave):
+        with self._lock:
+            return self._livres.setdefault(chave, queue.LifoQueue(self.tamanho))
+
+    def baixar(self, url, destino, cabecalhos=None, bloco=1 << 20):
+        """
+        GET gravado em `destino` em blocos, com SHA-256 no caminho (só com status 200).
+        Retorna (status, headers, sha256).
+        """
+        partes = urllib.parse.urlsplit(url)
+        chave = (partes.scheme, partes.hostname, partes.port)
+        fila = self._fila(chave)
+        try:
+            conexao = fila.get_nowait()
+        except queue.Empty:
+            classe = http.client.HTTPSConnection if partes.scheme == "https" else http.client.HTTPConnection
+            conexao = classe(partes.hostname, partes.port, timeout=self.timeout)
+
+        caminho = partes.path + (f"?{partes.query}" if partes.query else "")
+        sha = hashlib.sha256()
+        try:
+            conexao.request("GET", caminho, headers=cabecalhos or {})
+            resposta = conexao.getresponse()
+            if resposta.status == 200:
+                with open(destino, "wb") as arquivo:
+                    while True:
+                        dados = resposta.read(bloco)
+                        if not dados: break
+                        sha.update(dados)
+                        arquivo.write(dados)
+            else:
+                resposta.read()
+        except Exception:
+            conexao.close()
+            raise
+
+        if resposta.will_close:
+            conexao.close()
+        else:
+            try:
+                fila.put_nowait(conexao)
+            except queue.Full:
+                conexao.close()
+        return resposta.status, resposta.headers, sha.hexdigest()
+
+    def fechar(self):
+        with self._lock:
+            for fila in self._livres.values():
+                while not fila.empty():
+                    fila.get_nowait().close()
+            self._livres.clear()
+
+def _obter_arquivo_remoto(pool, url, dir_cache, tentativas=3, espera=0.5):
+    """
+    Cópia local atualizada de `url` em `dir_cache`: requisição condicional (ETag / Last-Modified)
+    e até `tentativas` retentativas com espera exponencial.
+    """
+    nome_arquivo = os.path.basename(urllib.parse.urlsplit(url).path)
+    caminho = os.path.join(dir_cache, nome_arquivo)
+    caminho_meta = caminho + ".meta.json"
+
+    meta = {}
+    if os.path.exists(caminho) and os.path.exists(caminho_meta):
+        with open(caminho_meta, encoding="utf-8") as arquivo:
+            meta = json.load(arquivo)
+        if meta.get("url") != url: meta = {}
+
+    cabecalhos = {}
+    if meta.get("etag"): cabecalhos["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"): cabecalhos["If-Modified-Since"] = meta["last_modified"]
+
+    parcial = caminho + ".parcial"
+    for tentativa in range(1, tentativas + 1):
+        try:
+            status, headers, sha256 = pool.baixar(url, parcial, cabecalhos)
+        except (OSError, http.client.HTTPException) as e:
+            status, erro = None, e
+        else:
+            if status == 304:
+                return caminho, "cache"
+            if status == 200:
+                if sha256 == meta.get("sha256"):
+                    os.remove(parcial)  # conteúdo idêntico ao do cache
+                else:
+                    os.replace(parcial, caminho)
+                meta = {"url": url, "etag": headers.get("ETag"),
+                        "last_modified": headers.get("Last-Modified"), "sha256": sha256}
+                with open(caminho_meta, "w", encoding="utf-8") as arquivo:
+                    json.dump(meta, arquivo, indent=2)
+                return caminho, "download"
+            erro = RuntimeError(f"HTTP {status} ao baixar {url}")
+            if status < 500 and status != 429: break
+
+        if tentativa < tentativas:
+            time.sleep(espera * 2 ** (tentativa - 1))
+
+    if meta:
+        print(f"Aviso: usando cópia em cache de {nome_arquivo} ({erro}).")
+        return caminho, "cache (offline)"
+    raise erro
+
+# ==============================================================================
+# 2. FORMATO COLUNAR MAPEADO EM MEMÓRIA (ABERTURA SEM CÓPIA, COMPARTILHADA)
+# ==============================================================================
+
+def filtrar_periodo(df, inicio=None, fim=None, coluna="Data da Compra"):
+    """
+    Linhas com data entre `inicio` e `fim` (inclusive; datas "AAAA-MM-DD" ou
+    None para não limitar). Vendas sem data válida ficam de fora.
+    """
+    datas = df[coluna]
+    mascara = datas.notna()
+    if inicio is not None: mascara &= datas >= pd.Timestamp(inicio)
+    if fim is not None: mascara &= datas <= pd.Timestamp(fim)
+    return df[mascara]
+
+DIR_COLUNAR = os.environ.get("ALURA_STORE_COLUNAR")
+
+ARQUIVO_MANIFESTO_COLUNAR = "colunar.json"
+
+# Incrementar quando o formato dos arquivos colunares mudar
+VERSAO_COLUNAR = 1
+
+def _salvar_array(caminho, valores):
+    # Grava em arquivo temporário e troca de uma vez, como os demais arquivos em disco
+    with open(caminho + ".tmp", "wb") as arquivo:
+        np.save(arquivo, np.ascontiguousarray(valores))
+    os.replace(caminho + ".tmp", caminho)
+
+def _tipo_codigos(n_categorias):
+    """Menor inteiro para os códigos, o mesmo que o pandas usa nas categóricas (evita cópia ao abrir)."""
+    for tipo in (np.int8, np.int16, np.int32):
+        if n_categorias < np.iinfo(tipo).max:
+            return tipo
+    return np.int64
+
+class LojasColunares(dict):
+    """
+    Dicionário nome_loja -> DataFrame mapeado em memória de um diretório colunar, sem cópia.
+    No pickle viajam só o caminho e as opções; o processo reabre os mesmos arquivos.
+    """
+    def __init__(self, diretorio, lojas=None, colunas=None, inicio=None, fim=None, categorias=None):
+        super().__init__()
+        self.opcoes = (diretorio, lojas, colunas, inicio, fim, categorias)
+        with open(os.path.join(diretorio, ARQUIVO_MANIFESTO_COLUNAR), encoding="utf-8") as arquivo:
+            manifesto = json.load(arquivo)
+        if manifesto.get("versao") != VERSAO_COLUNAR:
+            raise ValueError(f"Diretório colunar em formato antigo ({diretorio}); converta novamente.")
+
+        filtro = set()
+        if inicio is not None or fim is not None: filtro.add("Data da Compra")
+        if categorias is not None: filtro.add("Categoria do Produto")
+        leitura = None if colunas is None else set(colunas) | filtro
+        # Um único Index de categorias por coluna: as lojas concatenam sem voltar a texto
+        dicionarios = {coluna: pd.Index(valores, dtype=object) for coluna, valores in manifesto["categorias"].items()
+                       if leitura is None or coluna in leitura}
+
+        for nome_loja, info_loja in manifesto["lojas"].items():
+            if lojas is not None and nome_loja not in lojas: continue
+            pasta = os.path.join(diretorio, info_loja["pasta"])
+            dados = {}
+            for coluna in info_loja["colunas"]:
+                if leitura is not None and coluna not in leitura: continue
+                valores = np.load(os.path.join(pasta, manifesto["colunas"][coluna]["arquivo"]), mmap_mode="r")
+                if coluna in dicionarios:
+                    # Códigos gravados pelo conversor: sem validação (evita varrer as páginas ao abrir)
+                    dados[coluna] = pd.Categorical.from_codes(valores, categories=dicionarios[coluna],
+                                                              validate=False)
+                else:
+                    dados[coluna] = pd.Series(valores, copy=False)
+            df = pd.DataFrame(dados, copy=False)
+            # Filtros: só as linhas selecionadas são copiadas para a memória do processo
+            if categorias is not None:
+                df = df[df["Categoria do Produto"].isin(categorias)]
+            if inicio is not None or fim is not None:
+                df = filtrar_periodo(df, inicio, fim)
+            if colunas is not None:
+                df = df[[coluna for coluna in df.columns if coluna in colunas]]
+            self[nome_loja] = df
+
+    def __reduce__(self):
+        return (LojasColunares, self.opcoes)
+
+# ==============================================================================
+# 3. CACHE PERSISTENTE DE RESULTADOS (POR IMPRESSÃO DIGITAL DOS ARQUIVOS)
+# ==============================================================================
+
+DIR_CACHE_RESULTADOS = os.path.join(DIR_CACHE, "resultados")
+
+# Cache de resultados só quando pedido (--cache ou ALURA_STORE_CACHE_RESULTADOS=1)
+CACHE_RESULTADOS = os.environ.get("ALURA_STORE_CACHE_RESULTADOS") == "1"
+
+# Tamanho máximo do cache de resultados em disco (0 desativa o cache)
+LIMITE_CACHE_RESULTADOS = int(os.environ.get("ALURA_STORE_CACHE_RESULTADOS_MB", "1024")) * 2**20
+
+# Incrementar quando o formato de algum resultado guardado mudar
+VERSAO_CACHE_RESULTADOS = 2
+
+class CacheResultados:
+    """
+    Resultados guardados em disco (um pickle por chave de chave_resultado), limitados a `limite_bytes`:
+    ao passar do limite, os menos usados recentemente são apagados.
+    """
+    def __init__(self, diretorio=None, limite_bytes=None):
+        self.diretorio = diretorio or DIR_CACHE_RESULTADOS
+        self.limite_bytes = LIMITE_CACHE_RESULTADOS if limite_bytes is None else limite_bytes
+        os.makedirs(self.diretorio, exist_ok=True)
+
+    def _caminho(self, chave):
+        return os.path.join(self.diretorio, f"{chave}.pkl")
+
+    def obter(self, chave, padrao=None):
+        caminho = self._caminho(chave)
+        try:
+            valor = pd.read_pickle(caminho)
+        except FileNotFoundError:
+            return padrao
+        except Exception:
+            # Arquivo truncado ou de outra versão: descarta e recalcula
+            with contextlib.suppress(OSError):
+                os.remove(caminho)
+            return padrao
+        with contextlib.suppress(OSError):
+            os.utime(caminho)
+        return valor
+
+    def guardar(self, chave, valor):
+        # Grava em arquivo temporário e troca de uma vez (leitores nunca veem meio arquivo)
+        caminho = self._caminho(chave)
+        temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+        pd.to_pickle(valor, temporario)
+        os.replace(temporario, caminho)
+
+    def limitar(self):
+        """Apaga os resultados usados há mais tempo até o total caber no limite."""
+        entradas = []
+        with os.scandir(self.diretorio) as itens:
+            for item in itens:
+                if item.name.endswith(".pkl"):
+                    info = item.stat()
+                    entradas.append((info.st_mtime_ns, info.st_size, item.path))
+        total = sum(tamanho for _, tamanho, _ in entradas)
+        removidos = 0
+        for _, tamanho, caminho in sorted(entradas):
+            if total <= self.limite_bytes:
+                break
+            with contextlib.suppress(OSError):
+                os.remove(caminho)
+            total -= tamanho
+            removidos += 1
+        return removidos
+
+# Hash do conteúdo de cada arquivo de entrada, refeito só quando tamanho, mtime, ctime ou inode
+# mudam: regravar um arquivo sempre muda o ctime, mesmo que o mtime seja restaurado (rsync, cp -p)
+ARQUIVO_IMPRESSOES = os.path.join(DIR_CACHE, "impressoes.json")
+
+_IMPRESSOES = {"arquivo": None, "hashes": {}}
+
+_TRAVA_IMPRESSOES = threading.Lock()
+
+def _hash_conteudo(caminho, tamanho_leitura=2**20):
+    """SHA-256 do arquivo inteiro, lido em blocos."""
+    conteudo = hashlib.sha256()
+    with open(caminho, "rb") as arquivo:
+        while True:
+            bloco = arquivo.read(tamanho_leitura)
+            if not bloco: break
+            conteudo.update(bloco)
+    return conteudo.hexdigest()
+
+def impressao_arquivo(caminho):
+    """
+    Impressão digital de um arquivo de entrada: tamanho e SHA-256 do conteúdo (cópias idênticas em outro
+    caminho coincidem). O hash só é recalculado quando o arquivo muda (ver ARQUIVO_IMPRESSOES).
+    """
+    info = os.stat(caminho)
+    caminho_absoluto = os.path.abspath(caminho)
+    estado = [info.st_size, info.st_mtime_ns, info.st_ctime_ns, info.st_ino]
+    arquivo_impressoes = os.path.abspath(ARQUIVO_IMPRESSOES)
+    with _TRAVA_IMPRESSOES:
+        if _IMPRESSOES["arquivo"] != arquivo_impressoes:
+            _IMPRESSOES["arquivo"], _IMPRESSOES["hashes"] = arquivo_impressoes, {}
+            with contextlib.suppress(OSError, ValueError):
+                with open(arquivo_impressoes, encoding="utf-8") as arquivo:
+                    _IMPRESSOES["hashes"] = json.load(arquivo)
+        salvo = _IMPRESSOES["hashes"].get(caminho_absoluto)
+    if salvo is not None and salvo[:4] == estado:
+        return [info.st_size, salvo[4]]
+
+    conteudo = _hash_conteudo(caminho)
+    with _TRAVA_IMPRESSOES:
+        _IMPRESSOES["hashes"][caminho_absoluto] = estado + [conteudo]
+        # Grava em arquivo temporário e troca de uma vez; perder uma entrada só custa um novo hash
+        with contextlib.suppress(OSError):
+            os.makedirs(os.path.dirname(arquivo_impressoes), exist_ok=True)
+            temporario = f"{arquivo_impressoes}.{os.getpid()}.tmp"
+            with open(temporario, "w", encoding="utf-8") as arquivo:
+                json.dump(_IMPRESSOES["hashes"], arquivo, ensure_ascii=False)
+            os.replace(temporario, arquivo_impressoes)
+    return [info.st_size, conteudo]
+
+def chave_resultado(*partes):
+    """Chave (hash) de um resultado a partir da versão do cache e das `partes`."""
+    texto = json.dumps([VERSAO_CACHE_RESULTADOS, *partes], default=str, ensure_ascii=False)
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()
@@ -0,0 +1,350 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks do Projeto de Análise de Vendas - Alura Store
+
+Mede o desempenho das etapas do pipeline de `challenge_alura_store.py`
+com dados sintéticos, sem depender do download dos CSVs.
+
+Benchmarks:
+- Conversão de datas: parser com cache por valor distinto x implementação anterior.
+- Importação: tempo de `import challenge_alura_store` (só cálculo) num processo
+  novo, conferindo que o matplotlib não é carregado, x a camada de gráficos.
+- Pipeline: base sintética na escala escolhida (de 10 mil linhas em 4 lojas a
+  100 milhões de linhas em 10 mil lojas); mede tempo e pico de memória de cada
+  etapa (carga, formato colunar, cubo, streaming e cada relatório) e grava os resultados em
+  benchmark_resultados.jsonl, comparando com a execução anterior da mesma escala.
+  As escalas de ESCALAS_STREAMING não cabem na memória e rodam só o modo streaming
+  (em blocos e map-reduce), sem a carga completa.
+
+Uso:
+    python benchmark_alura_store.py                       # datas + pipeline (escala pequena)
+    python benchmark_alura_store.py --suite pipeline --escala media
+    python benchmark_alura_store.py --suite importacao
+    python benchmark_alura_store.py --suite pipeline --escala producao --sem-memoria
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import agendador_alura_store as agendador
+import challenge_alura_store as store
+
+# ==============================================================================
+# 1. IMPLEMENTAÇÕES DE REFERÊNCIA (VERSÕES ANTERIORES)
+# ==============================================================================
+
+def converter_datas_legado(serie, formato="%d/%m/%Y"):
+    """
+    Conversão usada antes do parser com cache: converte todas as linhas para
+    string e, se houver qualquer valor inválido, refaz o parse com coerce.
+    """
+    serie_raw = serie.astype(str).str.strip()
+    try:
+        return pd.to_datetime(serie_raw, format=formato, errors="raise")
+    except Exception:
+        return pd.to_datetime(serie_raw, format=formato, errors="coerce")
+
+# ==============================================================================
+# 2. UTILITÁRIOS
+# ==============================================================================
+
+def cronometrar(funcao, *args, repeticoes=3):
+    """
+    Executa `funcao(*args)` `repeticoes` vezes e retorna (melhor tempo em s, resultado).
+    """
+    melhor, resultado = float("inf"), None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao(*args)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+def gerar_coluna_datas(n_linhas, n_dias=3000, frac_invalidas=0.0001, seed=42):
+    """
+    Coluna de datas em texto (%d/%m/%Y) com `n_dias` dias distintos e uma
+    fração de valores inválidos, como nas exportações das lojas.
+    """
+    rng = np.random.default_rng(seed)
+    dias = pd.date_range("2018-01-01", periods=n_dias, freq="D").strftime("%d/%m/%Y")
+    valores = dias.to_numpy(dtype=object)[rng.integers(0, n_dias, n_linhas)]
+    invalidas = rng.random(n_linhas) < frac_invalidas
+    valores[invalidas] = "31/02/2021"
+    return pd.Series(valores, name="Data da Compra")
+
+# Escalas da base sintética: nome -> (total de linhas, número de lojas)
+ESCALAS = {
+    "pequena": (10_000, 4),
+    "media": (1_000_000, 4),
+    "grande": (10_000_000, 50),
+    "muitas_lojas": (1_000_000, 1_000),
+    "producao": (100_000_000, 10_000),
+}
+
+# Escalas grandes demais para carregar_dados em uma máquina comum: só main_streaming
+ESCALAS_STREAMING = {"producao"}
+
+DIR_SINTETICOS = os.path.join(store.DIR_CACHE, "sinteticos")
+ARQUIVO_RESULTADOS = "benchmark_resultados.jsonl"
+
+def preparar_base(escala, seed=42):
+    """
+    Gera (uma única vez) a base sintética da escala pedida em
+    .cache_alura_store/sinteticos/<escala>_<seed> e retorna (diretório, arquivos).
+    """
+    n_linhas, n_lojas = ESCALAS[escala]
+    diretorio = os.path.join(DIR_SINTETICOS, f"{escala}_{seed}")
+    marcador = os.path.join(diretorio, "concluido.json")
+    if not os.path.exists(marcador):
+        print(f"Gerando base sintética '{escala}' ({n_linhas:,} linhas, {n_lojas:,} lojas)...")
+        inicio = time.perf_counter()
+        store.gerar_base_sintetica(diretorio, n_linhas, n_lojas=n_lojas, seed=seed)
+        with open(marcador, "w", encoding="utf-8") as f:
+            json.dump({"linhas": n_linhas, "lojas": n_lojas, "seed": seed}, f)
+        print(f"Base gerada em {time.perf_counter() - inicio:.1f} s")
+    return diretorio, store.arquivos_lojas(n_lojas)
+
+def medir_etapa(nome, funcao, *args, memoria=True, **kwargs):
+    """
+    Executa uma etapa do pipeline com a saída de texto suprimida e retorna
+    (resultado, registro), com o tempo em segundos e o pico de memória
+    alocada pelo Python (tracemalloc) em MB. Erros são registrados, não propagados.
+    """
+    registro = {"etapa": nome}
+    resultado = None
+    if memoria:
+        tracemalloc.start()
+    inicio = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            resultado = funcao(*args, **kwargs)
+    except Exception as e:
+        registro["erro"] = f"{type(e).__name__}: {e}"
+    registro["segundos"] = round(time.perf_counter() - inicio, 4)
+    if memoria:
+        registro["pico_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+        tracemalloc.stop()
+    return resultado, registro
+
+def metadados_execucao(escala, seed):
+    """Contexto da execução, para comparar resultados entre commits e máquinas."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ""
+    n_linhas, n_lojas = ESCALAS[escala]
+    return {
+        "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit or None,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "cpus": os.cpu_count(),
+        "escala": escala,
+        "linhas": n_linhas,
+        "lojas": n_lojas,
+        "seed": seed,
+    }
+
+def ultima_execucao(escala, memoria=True, arquivo=ARQUIVO_RESULTADOS):
+    """Último resultado gravado para a mesma escala e modo de medição (ou None)."""
+    anterior = None
+    if os.path.exists(arquivo):
+        with open(arquivo, encoding="utf-8") as f:
+            for linha in f:
+                if linha.strip():
+                    execucao = json.loads(linha)
+                    if execucao.get("escala") == escala and execucao.get("memoria") == memoria:
+                        anterior = execucao
+    return anterior
+
+# ==============================================================================
+# 3. BENCHMARKS
+# ==============================================================================
+
+def benchmark_datas(tamanhos=(10_000, 100_000, 1_000_000)):
+    print("=" * 80)
+    print("BENCHMARK: CONVERSÃO DE DATAS (%d/%m/%Y)")
+    print("=" * 80)
+    print(f"{'LINHAS':>12} {'LEGADO (s)':>12} {'CACHE (s)':>12} {'GANHO':>8} {'INVÁLIDAS':>10}")
+
+    for n_linhas in tamanhos:
+        serie = gerar_coluna_datas(n_linhas)
+        t_legado, esperado = cronometrar(converter_datas_legado, serie)
+        t_cache, (datas, linhas_invalidas) = cronometrar(store.converter_datas, serie)
+
+        # Os dois caminhos precisam produzir exatamente as mesmas datas
+        assert datas.equals(esperado), "Resultado divergente entre as implementações"
+        assert len(linhas_invalidas) == esperado.isna().sum()
+
+        print(f"{n_linhas:>12,} {t_legado:>12.4f} {t_cache:>12.4f} "
+              f"{t_legado / t_cache:>7.1f}x {len(linhas_invalidas):>10,}")
+
+def medir_importacao(modulo, repeticoes=5):
+    """
+    Melhor tempo (s) de `import modulo` em um processo Python novo (sem cache de
+    módulos já importados) e se o matplotlib acabou carregado.
+    """
+    codigo = ("import sys, time; inicio = time.perf_counter(); import {m}; "
+              "print(time.perf_counter() - inicio, 'matplotlib' in sys.modules)").format(m=modulo)
+    diretorio = os.path.dirname(os.path.abspath(__file__))
+    melhor, matplotlib = float("inf"), None
+    for _ in range(repeticoes):
+        saida = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True,
+                               cwd=diretorio, check=True).stdout.split()
+        melhor = min(melhor, float(saida[0]))
+        matplotlib = saida[1] == "True"
+    return melhor, matplotlib
+
+def benchmark_importacao():
+    print("=" * 80)
+    print("BENCHMARK: TEMPO DE IMPORTAÇÃO (PROCESSO NOVO)")
+    print("=" * 80)
+    print(f"{'MÓDULO':<28} {'TEMPO (s)':>10} {'MATPLOTLIB':>11}")
+
+    for modulo in ("challenge_alura_store", "graficos_alura_store"):
+        tempo, matplotlib = medir_importacao(modulo)
+        print(f"{modulo:<28} {tempo:>10.3f} {'sim' if matplotlib else 'não':>11}")
+        if modulo == "challenge_alura_store":
+            # O núcleo de cálculo não pode voltar a depender do matplotlib na importação
+            assert not matplotlib, "challenge_alura_store importou o matplotlib"
+
+def benchmark_pipeline(escala="pequena", seed=42, memoria=True, arquivo=ARQUIVO_RESULTADOS):
+    """
+    Roda o pipeline completo sobre a base sintética da escala, etapa por etapa
+    (só o modo streaming nas ESCALAS_STREAMING), com os gráficos desativados.
+    Imprime tempo e pico de memória de cada etapa com a variação em relação à
+    última execução da mesma escala e grava o resultado em `arquivo`.
+    """
+    diretorio, arquivos = preparar_base(escala, seed)
+    execucao = metadados_execucao(escala, seed)
+    execucao["memoria"] = memoria
+    anterior = ultima_execucao(escala, memoria, arquivo)
+
+    print("=" * 80)
+    print(f"BENCHMARK: PIPELINE - escala '{escala}' ({execucao['linhas']:,} linhas, {execucao['lojas']:,} lojas)")
+    print("=" * 80)
+
+    etapas = []
+    store.desativar_graficos()
+    try:
+        if escala in ESCALAS_STREAMING:
+            print("Escala fora da memória: só o modo streaming (em blocos e map-reduce).")
+            opcoes = dict(dir_graficos=None, arquivo_perfil=None, dir_cprofile=None, dir_tabelas=None,
+                          fonte=diretorio, lojas=list(arquivos), memoria=memoria)
+            _, registro = medir_etapa("main_streaming", agendador.main_streaming, **opcoes)
+            etapas.append(registro)
+            _, registro = medir_etapa("main_streaming_fragmentado", agendador.main_streaming,
+                                      processos=os.cpu_count(), **opcoes)
+            etapas.append(registro)
+            return _registrar_execucao(execucao, etapas, anterior, arquivo)
+
+        lojas, registro = medir_etapa("carregar_dados", store.carregar_dados, fonte=diretorio,
+                                      arquivos=arquivos, memoria=memoria)
+        etapas.append(registro)
+        if lojas:
+            combinado, registro = medir_etapa("combinar_lojas", store.combinar_lojas, lojas, memoria=memoria)
+            etapas.append(registro)
+            _, registro = medir_etapa("validar_dados", store.validar_dados, combinado, memoria=memoria)
+            etapas.append(registro)
+            del combinado
+            cubo, registro = medir_etapa("construir_cubo", store.construir_cubo, lojas, memoria=memoria)
+            etapas.append(registro)
+            serie, registro = medir_etapa("construir_serie_diaria", store.construir_serie_diaria, lojas,
+                                          memoria=memoria)
+            etapas.append(registro)
+            distribuicao, registro = medir_etapa("construir_distribuicao", store.construir_distribuicao, lojas,
+                                                 memoria=memoria)
+            etapas.append(registro)
+            store.configurar_locais_lojas(diretorio)
+            frete_distancia, registro = medir_etapa("calcular_frete_distancia", store.calcular_frete_distancia,
+                                                    lojas, memoria=memoria)
+            etapas.append(registro)
+            relatorios = [
+                (store.verificar_nulos, ()),
+                (store.relatorio_vendas_por_loja, (cubo,)),
+                (store.graficos_comparativos_vendas, (cubo,)),
+                (store.relatorio_series_temporais, (serie,)),
+                (store.relatorio_vendas_por_categoria, (cubo,)),
+                (store.graficos_categorias_comparativas, (cubo,)),
+                (store.avaliacao_por_categoria, (cubo,)),
+                (store.avaliacao_comparativa_categorias, (cubo,)),
+                (store.avaliacao_geral_por_loja, (cubo,)),
+                (store.produtos_mais_menos_vendidos, ()),
+                (store.frete_medio_por_loja, (cubo,)),
+                (store.relatorio_distribuicoes, (distribuicao,)),
+                (store.relatorio_multilojas, (cubo,)),
+                (store.analise_geografica_clientes, ()),
+                (store.relatorio_frete_distancia, (frete_distancia,)),
+            ]
+            for funcao, args in relatorios:
+                _, registro = medir_etapa(funcao.__name__, funcao, lojas, *args, memoria=memoria)
+                etapas.append(registro)
+            del lojas, cubo, serie, distribuicao, frete_distancia
+        dir_colunar = diretorio + "_colunar"
+        _, registro = medir_etapa("converter_para_colunar", store.converter_para_colunar, dir_colunar,
+                                  fonte=diretorio, arquivos=arquivos, memoria=memoria)
+        etapas.append(registro)
+        _, registro = medir_etapa("carregar_colunar", store.carregar_colunar, dir_colunar, memoria=memoria)
+        etapas.append(registro)
+        _, registro = medir_etapa("carregar_agregados_em_blocos", store.carregar_agregados_em_blocos,
+                                  fonte=diretorio, arquivos=arquivos, memoria=memoria)
+        etapas.append(registro)
+        _, registro = medir_etapa("carregar_agregados_fragmentados", store.carregar_agregados_fragmentados,
+                                  fonte=diretorio, arquivos=arquivos, memoria=memoria)
+        etapas.append(registro)
+    finally:
+        store.finalizar_graficos()
+    return _registrar_execucao(execucao, etapas, anterior, arquivo)
+
+def _registrar_execucao(execucao, etapas, anterior, arquivo):
+    """Imprime as etapas com a variação em relação à `anterior` e grava a execução em `arquivo`."""
+    anteriores = {e["etapa"]: e for e in anterior["etapas"]} if anterior else {}
+    print(f"{'ETAPA':<36} {'TEMPO (s)':>10} {'VAR.':>8} {'PICO (MB)':>10}")
+    for registro in etapas:
+        tempo_anterior = anteriores.get(registro["etapa"], {}).get("segundos")
+        variacao = f"{registro['segundos'] / tempo_anterior - 1:>+7.0%}" if tempo_anterior else f"{'-':>8}"
+        pico = f"{registro['pico_mb']:>10,.1f}" if "pico_mb" in registro else f"{'-':>10}"
+        print(f"{registro['etapa']:<36} {registro['segundos']:>10.3f} {variacao:>8} {pico}"
+              + (f"  ERRO: {registro['erro']}" if "erro" in registro else ""))
+    total = sum(registro["segundos"] for registro in etapas)
+    print(f"{'TOTAL':<36} {total:>10.3f}")
+    if anterior:
+        print(f"(variação em relação à execução de {anterior['data']}, commit {anterior['commit']})")
+
+    execucao["etapas"] = etapas
+    execucao["total_segundos"] = round(total, 4)
+    with open(arquivo, "a", encoding="utf-8") as f:
+        f.write(json.dumps(execucao, ensure_ascii=False) + "\n")
+    return execucao
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks do pipeline da Alura Store")
+    parser.add_argument("--suite", choices=["datas", "importacao", "pipeline", "todos"], default="todos")
+    parser.add_argument("--escala", choices=list(ESCALAS), default="pequena")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--sem-memoria", action="store_true",
+                        help="não mede o pico de memória (tracemalloc deixa as etapas mais lentas)")
+    parser.add_argument("--saida", default=ARQUIVO_RESULTADOS, help="arquivo JSONL de resultados")
+    args = parser.parse_args()
+
+    if args.suite in ("datas", "todos"):
+        benchmark_datas()
+    if args.suite in ("importacao", "todos"):
+        benchmark_importacao()
+    if args.suite in ("pipeline", "todos"):
+        benchmark_pipeline(args.escala, args.seed, memoria=not args.sem_memoria, arquivo=args.saida)
+
+if __name__ == "__main__":
+    main()
@@ -13,37 +13,205 @@ Funcionalidades:
 
 """
 
+import io
+import os
+import re
+import json
+import time
+import contextlib
+import cProfile
+import hashlib
+import functools
+import threading
+import tracemalloc
+import unicodedata
+from decimal import ROUND_HALF_EVEN, Decimal
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
+
 import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
 
-# Configuração de estilo
-plt.style.use('ggplot') 
+# Download, formato colunar e cache de resultados ficam em armazenamento_alura_store.py,
+# que não importa este módulo
+from armazenamento_alura_store import (
+    ARQUIVOS_LOJAS, FONTE_DADOS, DIR_CACHE, PoolConexoes, _obter_arquivo_remoto,
+    filtrar_periodo, DIR_COLUNAR, ARQUIVO_MANIFESTO_COLUNAR, VERSAO_COLUNAR, _salvar_array, _tipo_codigos,
+    LojasColunares, impressao_arquivo,
+)
+# Distâncias, células e índices espaciais ficam em geo_alura_store.py
+from geo_alura_store import (
+    LIMITES_BRASIL, TAMANHO_CELULA_GEO, distancia_haversine_km, agregar_celulas, IndiceEspacial, ArvoreLojas,
+)
+
+# Os gráficos (matplotlib) ficam em graficos_alura_store.py e só são importados
+# quando um gráfico é desenhado: uso apenas de cálculo não paga esse custo.
 
 # ==============================================================================
 # 1. FUNÇÕES DE SUPORTE E TRATAMENTO DE DADOS
 # ==============================================================================
 
-def verificar_e_converter_datas(df, nome_loja, coluna="Data da Compra"):
+# ------------------------------------------------------------------------------
+# Instrumentação por etapa (tempo, CPU, pico de memória, linhas e cProfile)
+# ------------------------------------------------------------------------------
+
+_PERFIL = {"ativo": False, "arquivo": None, "dir_cprofile": None, "memoria": True,
+           "eventos": [], "inicio": 0.0, "concorrentes": 0}
+
+# Pilha de etapas em andamento, uma por thread
+_PILHAS = threading.local()
+
+ARQUIVO_PERFIL = os.environ.get("ALURA_STORE_PERFIL")
+DIR_CPROFILE = os.environ.get("ALURA_STORE_CPROFILE")
+
+def ativar_perfil(arquivo_trace=None, dir_cprofile=None, memoria=True):
+    """
+    Liga a instrumentação das funções com @instrumentar (tempo, CPU, pico de memória e linhas
+    por chamada); com `dir_cprofile`, grava também um .prof por etapa.
+    """
+    if dir_cprofile:
+        os.makedirs(dir_cprofile, exist_ok=True)
+    if memoria and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _PERFIL.update(ativo=True, arquivo=arquivo_trace, dir_cprofile=dir_cprofile, memoria=memoria,
+                   eventos=[], inicio=time.perf_counter())
+
+def finalizar_perfil():
+    """
+    Desliga a instrumentação, imprime o resumo por etapa (tempo total e tempo
+    próprio, sem as subetapas) e grava o trace JSON, se pedido. Retorna os eventos.
+    """
+    eventos = _PERFIL["eventos"]
+    if _PERFIL["memoria"] and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _PERFIL["ativo"] = False
+
+    print("\n" + "=" * 80)
+    print("PERFIL DE EXECUÇÃO POR ETAPA")
+    print("=" * 80)
+    resumo = pd.DataFrame(eventos, columns=["etapa", "nivel", "parede_s", "proprio_s", "cpu_s", "pico_mb", "linhas"])
+    if not resumo.empty:
+        resumo = (resumo.groupby("etapa", sort=False)
+                  .agg(chamadas=("etapa", "size"), parede_s=("parede_s", "sum"), proprio_s=("proprio_s", "sum"),
+                       cpu_s=("cpu_s", "sum"), pico_mb=("pico_mb", "max"), linhas=("linhas", "max"))
+                  .sort_values("proprio_s", ascending=False))
+        resumo = resumo.round(4)
+        # Etapas que só rodaram em threads paralelas não têm pico de memória próprio
+        resumo["pico_mb"] = resumo["pico_mb"].astype(object).where(resumo["pico_mb"].notna(), "n/a")
+        print(resumo.to_string())
+
+    if _PERFIL["arquivo"]:
+        with open(_PERFIL["arquivo"], "w", encoding="utf-8") as f:
+            json.dump({"data": time.strftime("%Y-%m-%dT%H:%M:%S"), "eventos": eventos}, f,
+                      ensure_ascii=False, indent=1)
+        print(f"Trace salvo em {_PERFIL['arquivo']}")
+    return eventos
+
+def _contar_linhas(objeto):
+    """Linhas de um DataFrame/Series ou de um dicionário de DataFrames (None se não aplicável)."""
+    if isinstance(objeto, (pd.DataFrame, pd.Series)):
+        return len(objeto)
+    if isinstance(objeto, dict) and objeto and all(isinstance(v, pd.DataFrame) for v in objeto.values()):
+        return sum(len(v) for v in objeto.values())
+    return None
+
+def instrumentar(funcao):
+    """
+    Decorador das etapas do pipeline. Com a instrumentação desligada o custo
+    é um único teste de flag por chamada.
+    """
+    @functools.wraps(funcao)
+    def envoltorio(*args, **kwargs):
+        if not _PERFIL["ativo"]:
+            return funcao(*args, **kwargs)
+        return _executar_instrumentado(funcao, args, kwargs)
+    return envoltorio
+
+def _executar_instrumentado(funcao, args, kwargs):
+    if not hasattr(_PILHAS, "pilha"):
+        _PILHAS.pilha = []
+    pilha = _PILHAS.pilha
+    # O pico do tracemalloc é global ao processo: com etapas em threads paralelas ele
+    # misturaria as alocações de todas, então essas etapas ficam sem pico (n/a)
+    memoria = _PERFIL["memoria"] and tracemalloc.is_tracing() and not _PERFIL["concorrentes"]
+    # Pico de memória por etapa: o pico global é zerado na entrada e repassado à etapa pai na saída
+    if memoria:
+        atual, pico = tracemalloc.get_traced_memory()
+        if pilha:
+            pilha[-1]["pico"] = max(pilha[-1]["pico"], pico)
+        tracemalloc.reset_peak()
+    quadro = {"filhos_s": 0.0, "pico": 0, "memoria_inicial": atual if memoria else 0}
+    pilha.append(quadro)
+
+    perfilador = None
+    if _PERFIL["dir_cprofile"] and len(pilha) == 1 and threading.current_thread() is threading.main_thread():
+        perfilador = cProfile.Profile()
+        perfilador.enable()
+    inicio, inicio_cpu = time.perf_counter(), time.process_time()
+    try:
+        return funcao(*args, **kwargs)
+    finally:
+        parede = time.perf_counter() - inicio
+        cpu = time.process_time() - inicio_cpu
+        if perfilador is not None:
+            perfilador.disable()
+            perfilador.dump_stats(os.path.join(_PERFIL["dir_cprofile"], f"{funcao.__name__}.prof"))
+        pilha.pop()
+        if memoria:
+            quadro["pico"] = max(quadro["pico"], tracemalloc.get_traced_memory()[1])
+        if pilha:
+            pilha[-1]["filhos_s"] += parede
+            pilha[-1]["pico"] = max(pilha[-1]["pico"], quadro["pico"])
+        _PERFIL["eventos"].append({
+            "etapa": funcao.__name__,
+            "nivel": len(pilha),
+            "inicio_s": round(inicio - _PERFIL["inicio"], 6),
+            "parede_s": round(parede, 6),
+            "proprio_s": round(parede - quadro["filhos_s"], 6),
+            "cpu_s": round(cpu, 6),
+            "pico_mb": round((quadro["pico"] - quadro["memoria_inicial"]) / 2**20, 3) if memoria else None,
+            "linhas": _contar_linhas(args[0]) if args else None,
+        })
+
+@instrumentar
+def converter_datas(serie, formato="%d/%m/%Y"):
+    """
+    Converte datas em texto fazendo o parse de cada valor distinto uma única vez.
+    Retorna (datas, linhas_invalidas), com as linhas que viraram NaT.
+    """
+    codigos, unicos = pd.factorize(serie)
+    unicos = pd.Index(unicos).astype(str).str.strip()
+    datas_unicas = pd.DatetimeIndex(pd.to_datetime(unicos, format=formato, errors="coerce"))
+
+    # Código -1 (valor nulo no CSV) também vira NaT
+    datas = datas_unicas.take(codigos, allow_fill=True, fill_value=pd.NaT)
+    datas = pd.Series(datas, index=serie.index, name=serie.name)
+    return datas, serie.index[datas.isna().to_numpy()]
+
+def verificar_e_converter_datas(df, nome_loja, coluna="Data da Compra", max_exemplos=10):
     """
     Limpa a coluna de data, força formato %d/%m/%Y e trata erros.
+    Datas inválidas viram NaT e as linhas afetadas são listadas.
     """
+    datas, linhas_invalidas = converter_datas(df[coluna])
+    relatar_datas_invalidas(df.loc[linhas_invalidas, coluna], nome_loja, max_exemplos)
+    return datas
+
+def relatar_datas_invalidas(invalidas, nome_loja, max_exemplos=10):
+    """Verificador de datas de uma loja a partir dos textos (Series por linha) que não viraram data."""
     print("-" * 80)
     print(f"VERIFICADOR DE DATAS - {nome_loja}")
     print("-" * 80)
 
-    serie_raw = df[coluna].astype(str).str.strip()
-
-    try:
-        datas = pd.to_datetime(serie_raw, format="%d/%m/%Y", errors="raise")
+    if len(invalidas) == 0:
         print("Todas as datas foram convertidas com sucesso para datetime (%d/%m/%Y).\n")
-        return datas
-    except Exception as e:
-        print("ERRO AO CONVERTER ALGUMAS DATAS. Tentando recuperação...")
-        datas_coerce = pd.to_datetime(serie_raw, format="%d/%m/%Y", errors="coerce")
-        if datas_coerce.isna().any():
-            print(f"Aviso: {datas_coerce.isna().sum()} datas inválidas encontradas (transformadas em NaT).")
-        return datas_coerce
+        return
+
+    print("ERRO AO CONVERTER ALGUMAS DATAS.")
+    print(f"Aviso: {len(invalidas)} datas inválidas encontradas (transformadas em NaT).")
+    print(invalidas[:max_exemplos].to_frame().to_string())
+    if len(invalidas) > max_exemplos:
+        print(f"... e mais {len(invalidas) - max_exemplos} linhas.")
+    print()
 
 def gerar_lat_lon_simulado(n_rows):
     """
@@ -54,37 +222,322 @@ def gerar_lat_lon_simulado(n_rows):
     lon = np.random.uniform(-60.0, -40.0, n_rows)
     return lat, lon
 
-def carregar_dados():
+# ------------------------------------------------------------------------------
+# Geração de bases sintéticas (mesmo esquema dos loja_N.csv) para testes de escala
+# ------------------------------------------------------------------------------
+
+# Catálogo base: categoria -> (produtos, preço mediano em R$)
+CATALOGO_SINTETICO = {
+    "eletronicos": (["Smartwatch", "Celular ABXY", "TV Led UHD 4K", "Fone de ouvido", "Tablet ABXY",
+                     "Impressora", "Celular Plus X42", "Jogo de tabuleiro", "Headset"], 1400.0),
+    "eletrodomesticos": (["Geladeira", "Lava louças", "Micro-ondas", "Lavadora de roupas",
+                          "Fogão", "Ar condicionado", "Secadora de roupas"], 1700.0),
+    "moveis": (["Mesa de jantar", "Sofá retrátil", "Guarda roupas", "Cama king", "Cama box",
+                "Cômoda", "Mesa de centro", "Poltrona"], 500.0),
+    "instrumentos musicais": (["Guitarra", "Bateria", "Violão", "Teclado", "Flauta doce"], 600.0),
+    "esporte e lazer": (["Bola de basquete", "Bicicleta", "Corda de pular", "Carrinho controle remoto",
+                         "Kit banquetas", "Bola de vôlei"], 180.0),
+    "brinquedos": (["Boneca bebê", "Dinossauro Rex", "Blocos de montar", "Xadrez de madeira",
+                    "Cubo mágico 8x8"], 60.0),
+    "livros": (["Iniciando em programação", "Dashboards com Power BI", "Ciência de dados com python",
+                "Pandas", "Modelagem preditiva"], 50.0),
+    "utilidades domesticas": (["Panela de pressão", "Jogo de panelas", "Copo térmico",
+                               "Faqueiro", "Assistente virtual", "Mochila"], 90.0),
+}
+
+# Local da compra (UF) -> (lat, lon, peso aproximado nas vendas)
+LOCAIS_SINTETICOS = {
+    "SP": (-22.19, -48.79, 0.37), "RJ": (-22.25, -42.66, 0.13), "MG": (-18.10, -44.38, 0.11),
+    "RS": (-30.17, -53.50, 0.06), "PR": (-24.89, -51.55, 0.05), "SC": (-27.45, -50.95, 0.04),
+    "BA": (-13.29, -41.71, 0.04), "DF": (-15.83, -47.86, 0.03), "GO": (-15.98, -49.86, 0.03),
+    "PE": (-8.38, -37.86, 0.03), "ES": (-19.19, -40.34, 0.02), "CE": (-5.20, -39.53, 0.02),
+    "PA": (-3.79, -52.48, 0.02), "MT": (-12.64, -55.42, 0.01), "MS": (-20.51, -54.54, 0.01),
+    "AM": (-3.47, -65.10, 0.01), "MA": (-5.42, -45.44, 0.01), "PB": (-7.28, -36.72, 0.01),
+}
+
+VENDEDORES_SINTETICOS = ["Pedro Gomes", "Beatriz Moraes", "João Souza", "Thiago Silva", "Camila Ribeiro",
+                         "Mariana Ferreira", "Lucas Oliveira", "Maria Alves", "Juliana Costa",
+                         "Felipe Santos", "Larissa Alves", "Rafael Costa", "Bianca Santos", "Bruno Rodrigues"]
+
+PAGAMENTOS_SINTETICOS = (["cartao_credito", "boleto", "cupom", "cartao_debito"], [0.74, 0.20, 0.04, 0.02])
+
+# Distribuição das notas (1 a 5), concentrada em 5 como nas bases reais
+PESOS_AVALIACAO = [0.12, 0.03, 0.08, 0.19, 0.58]
+
+def arquivos_lojas(n_lojas):
+    """Mapa {"Loja i": "loja_i.csv"} para n lojas (mesmo padrão de ARQUIVOS_LOJAS)."""
+    return {f"Loja {i}": f"loja_{i}.csv" for i in range(1, n_lojas + 1)}
+
+def _catalogo_sintetico(n_produtos=None):
     """
-    Carrega os dados das 4 lojas e aplica o tratamento inicial.
+    Arrays (produtos, categorias, preço mediano) do catálogo. Com `n_produtos`
+    maior que o catálogo base, cria variações (SKUs) "<produto> <n>".
     """
-    urls = {
-        "Loja 1": "https://raw.githubusercontent.com/alura-es-cursos/challenge1-data-science/refs/heads/main/base-de-dados-challenge-1/loja_1.csv",
-        "Loja 2": "https://raw.githubusercontent.com/alura-es-cursos/challenge1-data-science/refs/heads/main/base-de-dados-challenge-1/loja_2.csv",
-        "Loja 3": "https://raw.githubusercontent.com/alura-es-cursos/challenge1-data-science/refs/heads/main/base-de-dados-challenge-1/loja_3.csv",
-        "Loja 4": "https://raw.githubusercontent.com/alura-es-cursos/challenge1-data-science/refs/heads/main/base-de-dados-challenge-1/loja_4.csv",
-    }
+    produtos, categorias, precos = [], [], []
+    for categoria, (nomes, preco) in CATALOGO_SINTETICO.items():
+        produtos += nomes
+        categorias += [categoria] * len(nomes)
+        precos += [preco] * len(nomes)
+    produtos, categorias, precos = np.array(produtos, dtype=object), np.array(categorias, dtype=object), np.array(precos)
+    if n_produtos and n_produtos > len(produtos):
+        base = np.arange(n_produtos) % len(produtos)
+        sufixo = (np.arange(n_produtos) // len(produtos)).astype(str)
+        variacoes = np.where(sufixo == "0", produtos[base], produtos[base] + " " + sufixo.astype(object))
+        produtos, categorias, precos = variacoes, categorias[base], precos[base]
+    return produtos, categorias, precos
+
+def gerar_loja_sintetica(n_linhas, rng, local_loja=None, n_produtos=None,
+                         inicio="2020-01-01", fim="2023-03-31"):
+    """
+    Gera, de forma vetorizada, as vendas de uma loja no esquema dos loja_N.csv
+    (clientes mais prováveis perto de `local_loja`).
+    """
+    produtos, categorias, precos_base = _catalogo_sintetico(n_produtos)
+    popularidade = 1.0 / np.arange(1, len(produtos) + 1) ** 0.8
+    idx_produto = rng.choice(len(produtos), n_linhas, p=popularidade / popularidade.sum())
+
+    preco = np.round(precos_base[idx_produto] * rng.lognormal(0.0, 0.45, n_linhas), 2)
+
+    ufs = list(LOCAIS_SINTETICOS)
+    coordenadas = np.array([LOCAIS_SINTETICOS[uf][:2] for uf in ufs])
+    pesos = np.array([LOCAIS_SINTETICOS[uf][2] for uf in ufs])
+    if local_loja is not None:
+        # Mais vendas para os estados próximos da loja
+        distancias = distancia_haversine_km(local_loja[0], local_loja[1], coordenadas[:, 0], coordenadas[:, 1])
+        pesos = pesos * np.exp(-distancias / 800.0)
+    idx_uf = rng.choice(len(ufs), n_linhas, p=pesos / pesos.sum())
+    lat = np.round(coordenadas[idx_uf, 0] + rng.normal(0, 1.0, n_linhas), 4)
+    lon = np.round(coordenadas[idx_uf, 1] + rng.normal(0, 1.0, n_linhas), 4)
+
+    frete = preco * rng.uniform(0.03, 0.07, n_linhas)
+    if local_loja is not None:
+        frete += distancia_haversine_km(local_loja[0], local_loja[1], lat, lon) * 0.01
+    frete = np.round(frete, 6)
+
+    dias = pd.date_range(inicio, fim, freq="D")
+    datas_texto = dias.strftime("%d/%m/%Y").to_numpy(dtype=object)
+
+    tipos_pagamento, pesos_pagamento = PAGAMENTOS_SINTETICOS
+    pagamento = rng.choice(len(tipos_pagamento), n_linhas, p=pesos_pagamento)
+    parcelas = np.where(pagamento == 0, np.minimum(rng.geometric(0.35, n_linhas), 24), 1)
+
+    return pd.DataFrame({
+        "Produto": produtos[idx_produto],
+        "Categoria do Produto": categorias[idx_produto],
+        "Preço": preco,
+        "Frete": frete,
+        "Data da Compra": datas_texto[rng.integers(0, len(dias), n_linhas)],
+        "Vendedor": np.array(VENDEDORES_SINTETICOS, dtype=object)[rng.integers(0, len(VENDEDORES_SINTETICOS), n_linhas)],
+        "Local da compra": np.array(ufs, dtype=object)[idx_uf],
+        "Avaliação da compra": rng.choice(5, n_linhas, p=PESOS_AVALIACAO) + 1,
+        "Tipo de pagamento": np.array(tipos_pagamento, dtype=object)[pagamento],
+        "Quantidade de parcelas": parcelas,
+        "lat": lat,
+        "lon": lon,
+    })
+
+def gerar_base_sintetica(dir_saida, n_linhas, n_lojas=4, seed=42, n_produtos=None,
+                         tamanho_bloco=1_000_000):
+    """
+    Grava em `dir_saida` as lojas sintéticas (em blocos) e lojas.csv; a mesma seed gera os mesmos
+    arquivos. Retorna {loja: arquivo}, pronto para carregar_dados(fonte=dir_saida, arquivos=...).
+    """
+    os.makedirs(dir_saida, exist_ok=True)
+    sementes = np.random.SeedSequence(seed)
+    rng = np.random.default_rng(sementes.spawn(1)[0])
+
+    arquivos = arquivos_lojas(n_lojas)
+    tamanhos = rng.lognormal(0.0, 0.5, n_lojas)
+    linhas_por_loja = rng.multinomial(n_linhas, tamanhos / tamanhos.sum())
+
+    ufs = list(LOCAIS_SINTETICOS)
+    pesos = np.array([LOCAIS_SINTETICOS[uf][2] for uf in ufs])
+    idx_uf = rng.choice(len(ufs), n_lojas, p=pesos / pesos.sum())
+    locais = pd.DataFrame({
+        "Loja": list(arquivos),
+        "lat": np.round([LOCAIS_SINTETICOS[ufs[i]][0] for i in idx_uf] + rng.normal(0, 0.5, n_lojas), 4),
+        "lon": np.round([LOCAIS_SINTETICOS[ufs[i]][1] for i in idx_uf] + rng.normal(0, 0.5, n_lojas), 4),
+    })
+    locais.to_csv(os.path.join(dir_saida, "lojas.csv"), index=False)
+
+    for arquivo, n_loja, semente, local in zip(
+            arquivos.values(), linhas_por_loja, sementes.spawn(n_lojas), locais[["lat", "lon"]].to_numpy()):
+        rng_loja = np.random.default_rng(semente)
+        caminho = os.path.join(dir_saida, arquivo)
+        with open(caminho, "w", encoding="utf-8", newline="") as saida:
+            for inicio in range(0, max(n_loja, 1), tamanho_bloco):
+                n_bloco = min(tamanho_bloco, n_loja - inicio)
+                bloco = gerar_loja_sintetica(n_bloco, rng_loja, tuple(local), n_produtos)
+                bloco.to_csv(saida, index=False, header=(inicio == 0))
+    return arquivos
+
+# ------------------------------------------------------------------------------
+# Validação vetorizada dos dados e quarentena
+# ------------------------------------------------------------------------------
+
+# Diretório dos arquivos de quarentena (linhas que violam alguma regra)
+DIR_QUARENTENA = os.environ.get("ALURA_STORE_QUARENTENA")
+
+def _fora_da_faixa(valores, minimo, maximo):
+    return (valores < minimo) | (valores > maximo)
+
+# Regra -> (colunas usadas, teste sobre os arrays das colunas: True = linha viola a regra).
+# Nas regras numéricas, valores nulos não violam (são contados em verificar_nulos); em
+# data_invalida a violação é justamente a data nula (vazia ou fora do formato %d/%m/%Y).
+# Uma regra só é avaliada se todas as suas colunas foram carregadas.
+REGRAS_VALIDACAO = {
+    "avaliacao_fora_de_1_a_5": (("Avaliação da compra",),
+                                lambda c: _fora_da_faixa(c["Avaliação da compra"], 1, 5)),
+    "preco_negativo": (("Preço",), lambda c: c["Preço"] < 0),
+    "frete_negativo": (("Frete",), lambda c: c["Frete"] < 0),
+    "data_invalida": (("Data da Compra",), lambda c: np.isnat(c["Data da Compra"])),
+    "gps_fora_do_brasil": (("lat", "lon"), lambda c: _fora_da_faixa(c["lat"], *LIMITES_BRASIL["lat"])
+                                                     | _fora_da_faixa(c["lon"], *LIMITES_BRASIL["lon"])),
+}
+
+# Colunas que as regras tratam como datas (as demais são convertidas para número)
+COLUNAS_DATA = ("Data da Compra",)
+
+def validar_dados(df):
+    """
+    Avalia de uma vez, com comparações vetorizadas, as REGRAS_VALIDACAO aplicáveis a `df`.
+    Retorna um DataFrame booleano com as violações (uma coluna por regra, mesmo índice de `df`).
+    """
+    arrays, violacoes = {}, {}
+    for regra, (colunas, teste) in REGRAS_VALIDACAO.items():
+        if not all(coluna in df.columns for coluna in colunas):
+            continue
+        for coluna in colunas:
+            if coluna not in arrays:
+                serie = df[coluna]
+                if pd.api.types.is_datetime64_any_dtype(serie):
+                    arrays[coluna] = serie.to_numpy(dtype="datetime64[ns]")
+                elif coluna in COLUNAS_DATA:
+                    # Datas ainda em texto: conversão explícita, inválidas viram NaT
+                    arrays[coluna] = converter_datas(serie)[0].to_numpy(dtype="datetime64[ns]")
+                else:
+                    arrays[coluna] = pd.to_numeric(serie, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        violacoes[regra] = teste(arrays)
+    return pd.DataFrame(violacoes, index=df.index, dtype=bool)
+
+def arquivo_quarentena(dir_quarentena, nome_loja, parte=None):
+    """Caminho do CSV de quarentena da loja (`parte`: fragmento do map-reduce)."""
+    sufixo = "" if parte is None else f"_{parte}"
+    return os.path.join(dir_quarentena, f"quarentena_{_nome_arquivo(nome_loja)}{sufixo}.csv")
+
+def separar_quarentena(df, violacoes, arquivo, anexar=False):
+    """
+    Grava em `arquivo` as linhas com violação ("Linha" e "Regras violadas"; com `anexar`, acrescenta)
+    e retorna `df` sem elas.
+    """
+    matriz = violacoes.to_numpy()
+    falhas = matriz.any(axis=1)
+    if not anexar and os.path.exists(arquivo):
+        os.remove(arquivo)
+    if not falhas.any():
+        return df
+    codigos = matriz[falhas] @ (1 << np.arange(matriz.shape[1]))
+    nomes = {codigo: ";".join(regra for i, regra in enumerate(violacoes.columns) if codigo >> i & 1)
+             for codigo in np.unique(codigos)}
+    quarentena = df[falhas].assign(**{"Regras violadas": pd.Series(codigos).map(nomes).to_numpy()})
+    os.makedirs(os.path.dirname(arquivo) or ".", exist_ok=True)
+    cabecalho = not (anexar and os.path.exists(arquivo))
+    quarentena.to_csv(arquivo, mode="a" if anexar else "w", header=cabecalho, index_label="Linha")
+    return df[~falhas]
+
+def imprimir_validacao(nome_loja, contagens, total_linhas, linhas_com_violacao, arquivo=None):
+    """Resumo da validação de uma loja: linhas com violação e contagem por regra."""
+    if not linhas_com_violacao:
+        print(f"Validação - {nome_loja}: {total_linhas:,} linhas sem violações ({len(contagens)} regras).")
+        return
+    destino = f" (em quarentena: {arquivo})" if arquivo else ""
+    print(f"Validação - {nome_loja}: {linhas_com_violacao:,} de {total_linhas:,} linhas com violações{destino}")
+    for regra, quantidade in contagens[contagens > 0].items():
+        print(f"    {regra}: {quantidade:,}")
+
+# ------------------------------------------------------------------------------
+# Download dos CSVs (pool de conexões, retentativas e cache em disco)
+# ------------------------------------------------------------------------------
+
+@instrumentar
+def obter_arquivos_lojas(fonte=None, dir_cache=None, arquivos=None, max_workers=4, tentativas=3):
+    """
+    Resolve o CSV local de cada loja: diretório espelho em `fonte` ou download paralelo
+    (pool de conexões, retentativas e cache em disco).
+    """
+    fonte = fonte or FONTE_DADOS
+    dir_cache = dir_cache or DIR_CACHE
+    arquivos = arquivos or ARQUIVOS_LOJAS
 
-    lojas = {}
+    if os.path.isdir(fonte):
+        return {nome_loja: os.path.join(fonte, arquivo) for nome_loja, arquivo in arquivos.items()}
+
+    os.makedirs(dir_cache, exist_ok=True)
+    urls = {nome_loja: f"{fonte.rstrip('/')}/{arquivo}" for nome_loja, arquivo in arquivos.items()}
+    pool = PoolConexoes(tamanho=max_workers)
+    caminhos = {}
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futuros = {nome_loja: executor.submit(_obter_arquivo_remoto, pool, url, dir_cache, tentativas)
+                       for nome_loja, url in urls.items()}
+            for nome_loja, futuro in futuros.items():
+                try:
+                    caminhos[nome_loja], origem = futuro.result()
+                    print(f"{nome_loja}: {arquivos[nome_loja]} ({origem})")
+                except Exception as e:
+                    print(f"Erro crítico ao baixar {nome_loja}: {e}")
+    finally:
+        pool.fechar()
+    return caminhos
+
+@instrumentar
+def carregar_dados(fonte=None, dir_cache=None, compacto=False, arquivos=None,
+                   colunas=None, inicio=None, fim=None, categorias=None, caminhos=None,
+                   dir_quarentena=None):
+    """
+    Carrega os dados das lojas e aplica o tratamento inicial.
+    Com `colunas`, `inicio`/`fim` e `categorias`, só o necessário é lido do disco (ver ler_loja).
+    """
     print(">>> Iniciando carregamento e verificação de dados...")
-    for nome_loja, url in urls.items():
+    if caminhos is None:
+        caminhos = obter_arquivos_lojas(fonte, dir_cache, arquivos)
+
+    lojas = {}
+    for nome_loja, caminho in caminhos.items():
         try:
-            df = pd.read_csv(url)
-            
-            # Tratamento de Data
-            df["Data da Compra"] = verificar_e_converter_datas(df, nome_loja)
+            df, bytes_lidos, datas_invalidas = ler_loja(caminho, colunas, inicio, fim, categorias, dir_cache)
+            if inicio is not None or fim is not None or categorias is not None:
+                tamanho = max(os.path.getsize(caminho), 1)
+                print(f"{nome_loja}: {len(df):,} linhas selecionadas "
+                      f"({bytes_lidos / tamanho:.1%} dos bytes do arquivo lidos).")
+
+            # Tratamento de Data (nas leituras filtradas as datas já vêm convertidas)
+            if datas_invalidas is not None:
+                relatar_datas_invalidas(datas_invalidas, nome_loja)
+            elif "Data da Compra" in df.columns and not pd.api.types.is_datetime64_any_dtype(df["Data da Compra"]):
+                df["Data da Compra"] = verificar_e_converter_datas(df, nome_loja)
+
+            # Validação: todas as regras em uma passada vetorizada, antes dos preenchimentos
+            violacoes = validar_dados(df)
+            destino = arquivo_quarentena(dir_quarentena, nome_loja) if dir_quarentena else None
+            imprimir_validacao(nome_loja, violacoes.sum(), len(df), int(violacoes.any(axis=1).sum()), destino)
+            if destino:
+                df = separar_quarentena(df, violacoes, destino)
             
             # Tratamento de Colunas Numéricas
-            if 'Avaliação da compra' not in df.columns: df['Avaliação da compra'] = 0.0
-            if 'Frete' not in df.columns: df['Frete'] = 0.0
+            if colunas is None or 'Avaliação da compra' in colunas:
+                if 'Avaliação da compra' not in df.columns: df['Avaliação da compra'] = 0.0
+            if colunas is None or 'Frete' in colunas:
+                if 'Frete' not in df.columns: df['Frete'] = 0.0
             
             # --- TRATAMENTO GEO (LAT/LON) ---
             # Verifica se as colunas 'lat' e 'lon' existem. Se não, cria dados fictícios
             # para que o gráfico de dispersão funcione no exemplo.
-            if 'lat' not in df.columns or 'lon' not in df.columns:
+            geo_pedido = colunas is None or 'lat' in colunas or 'lon' in colunas
+            if geo_pedido and ('lat' not in df.columns or 'lon' not in df.columns):
                 print(f"Aviso: Colunas de GPS ausentes em {nome_loja}. Gerando dados simulados para demonstração.")
                 df['lat'], df['lon'] = gerar_lat_lon_simulado(len(df))
-            else:
+            elif geo_pedido:
                 # Garante que são numéricos (caso venham como string)
                 df['lat'] = pd.to_numeric(df['lat'], errors='coerce')
                 df['lon'] = pd.to_numeric(df['lon'], errors='coerce')
@@ -93,36 +546,1240 @@ def carregar_dados():
         except Exception as e:
             print(f"Erro crítico ao carregar {nome_loja}: {e}")
             
+    if compacto and lojas:
+        memoria_antes = memoria_por_coluna(lojas)
+        lojas = compactar_lojas(lojas)
+        relatorio_memoria(memoria_antes, memoria_por_coluna(lojas))
+
     return lojas
 
+# ------------------------------------------------------------------------------
+# Leitura seletiva: projeção de colunas e filtros aplicados na leitura
+# ------------------------------------------------------------------------------
+
+DIR_INDICES = os.path.join(DIR_CACHE, "indices")
+
+# Dia (desde 1970-01-01) das linhas sem data válida no índice
+_DIA_INVALIDO = np.iinfo(np.int32).min
+
+def _filtrar_bloco(bloco, inicio=None, fim=None, categorias=None, datas_invalidas=None):
+    """
+    Filtra um bloco por categoria e período (datas convertidas só nas linhas que sobram);
+    `datas_invalidas` (lista) recebe os textos das datas não convertidas.
+    """
+    if categorias is not None:
+        bloco = bloco[bloco["Categoria do Produto"].isin(categorias)]
+    if "Data da Compra" in bloco.columns and not pd.api.types.is_datetime64_any_dtype(bloco["Data da Compra"]):
+        datas, linhas_invalidas = converter_datas(bloco["Data da Compra"])
+        if datas_invalidas is not None:
+            datas_invalidas.append(bloco.loc[linhas_invalidas, "Data da Compra"])
+        bloco = bloco.assign(**{"Data da Compra": datas})
+    if inicio is not None or fim is not None:
+        bloco = filtrar_periodo(bloco, inicio, fim)
+    return bloco
+
+def _arquivo_indice(caminho, dir_cache=None):
+    """Diretório dos índices, prefixo do arquivo e caminho do índice da versão atual do CSV."""
+    info = os.stat(caminho)
+    chave = hashlib.sha1(os.path.abspath(caminho).encode()).hexdigest()[:16]
+    dir_indices = os.path.join(dir_cache, "indices") if dir_cache else DIR_INDICES
+    return dir_indices, chave, os.path.join(dir_indices, f"{chave}_{info.st_size}_{info.st_mtime_ns}.npz")
+
+def indice_linhas(caminho, dir_cache=None):
+    """
+    Índice de linhas salvo do CSV (posição em bytes, dia e categoria), ou None se ainda não foi
+    criado para esta versão do arquivo. Retorna (indice, bytes lidos do índice).
+    """
+    _, _, arquivo_indice = _arquivo_indice(caminho, dir_cache)
+    if not os.path.exists(arquivo_indice):
+        return None, 0
+    with np.load(arquivo_indice, allow_pickle=False) as dados:
+        return {nome: dados[nome] for nome in dados.files}, os.path.getsize(arquivo_indice)
+
+def _salvar_indice(caminho, dir_cache, indice):
+    """Salva o índice da versão atual do CSV e apaga os das versões anteriores."""
+    dir_indices, chave, arquivo_indice = _arquivo_indice(caminho, dir_cache)
+    os.makedirs(dir_indices, exist_ok=True)
+    for antigo in os.listdir(dir_indices):
+        if antigo.startswith(f"{chave}_") and antigo.endswith(".npz"):
+            os.remove(os.path.join(dir_indices, antigo))
+    np.savez(arquivo_indice, **indice)
+
+def _ler_criando_indice(caminho, colunas=None, inicio=None, fim=None, categorias=None, dir_cache=None,
+                        tamanho_leitura=16 * 2**20):
+    """
+    Uma única passada pelo CSV, em blocos de bytes terminados em linha completa: filtra cada bloco
+    e anota a posição, o dia e a categoria de cada linha no índice. Retorna (df, bytes_lidos, datas_invalidas).
+    """
+    leitura = None if colunas is None else set(colunas) | {"Data da Compra", "Categoria do Produto"}
+    partes, invalidas, inicios, dias, codigos = [], [], [], [], []
+    nomes_categorias = pd.Index([], dtype=object)
+    indexavel, linha, resto = True, 0, b""
+    with open(caminho, "rb") as arquivo:
+        cabecalho = arquivo.readline()
+        nomes = pd.read_csv(io.BytesIO(cabecalho)).columns.tolist()
+        posicao = len(cabecalho)
+        while True:
+            lido = arquivo.read(tamanho_leitura)
+            bloco = resto + lido
+            if not bloco: break
+            corte = bloco.rfind(b"\n") + 1 if lido else len(bloco)
+            if corte == 0:
+                resto = bloco
+                continue
+            bloco, resto = bloco[:corte], bloco[corte:]
+
+            inicios_bloco = np.flatnonzero(np.frombuffer(bloco, dtype=np.uint8) == ord("\n")) + 1
+            inicios_bloco = np.concatenate(([0], inicios_bloco[inicios_bloco < len(bloco)]))
+            df = pd.read_csv(io.BytesIO(bloco), header=None, names=nomes,
+                             usecols=None if leitura is None else (lambda coluna: coluna in leitura))
+            # Quebra de linha dentro de um campo ou linha em branco: as posições não batem com as linhas
+            indexavel &= len(df) == len(inicios_bloco)
+            df.index = pd.RangeIndex(linha, linha + len(df))
+            linha += len(df)
+
+            datas, linhas_invalidas = converter_datas(df["Data da Compra"])
+            dias_bloco = datas.to_numpy(dtype="datetime64[D]").astype(np.int64)
+            dias.append(np.where(datas.isna().to_numpy(), _DIA_INVALIDO, dias_bloco).astype(np.int32))
+            novas = pd.Index(df["Categoria do Produto"].dropna().unique()).difference(nomes_categorias)
+            nomes_categorias = nomes_categorias.append(novas)
+            codigos.append(nomes_categorias.get_indexer(df["Categoria do Produto"]).astype(np.int32))
+            inicios.append(inicios_bloco + posicao)
+            posicao += corte
+
+            textos_invalidos = df.loc[linhas_invalidas, "Data da Compra"]
+            df = df.assign(**{"Data da Compra": datas})
+            if categorias is not None:
+                textos_invalidos = textos_invalidos[df.loc[linhas_invalidas, "Categoria do Produto"].isin(categorias)]
+            invalidas.append(textos_invalidos)
+            partes.append(_filtrar_bloco(df, inicio, fim, categorias))
+
+    if indexavel:
+        _salvar_indice(caminho, dir_cache, {
+            "inicios": np.concatenate(inicios) if inicios else np.empty(0, dtype=np.int64),
+            "fim_arquivo": np.array([posicao], dtype=np.int64),
+            "dias": np.concatenate(dias) if dias else np.empty(0, dtype=np.int32),
+            "categorias": np.concatenate(codigos) if codigos else np.empty(0, dtype=np.int32),
+            "nomes_categorias": nomes_categorias.to_numpy(dtype=str),
+        })
+    df = pd.concat(partes) if partes else pd.DataFrame(columns=nomes)
+    datas_invalidas = None
+    if colunas is None or "Data da Compra" in colunas:
+        datas_invalidas = pd.concat(invalidas) if invalidas else pd.Series(dtype=object, name="Data da Compra")
+    if colunas is not None:
+        df = df[[coluna for coluna in df.columns if coluna in colunas]]
+    return df, posicao, datas_invalidas
+
+def _ler_linhas_indice(caminho, indice, inicio=None, fim=None, categorias=None, colunas=None):
+    """
+    Lê do disco só as linhas selecionadas pelo índice (e as de data inválida).
+    Retorna (df, bytes_lidos, textos das datas inválidas ou None).
+    """
+    selecionadas = np.ones(len(indice["dias"]), dtype=bool)
+    if inicio is not None or fim is not None:
+        dias = indice["dias"]
+        selecionadas &= dias != _DIA_INVALIDO
+        if inicio is not None: selecionadas &= dias >= (pd.Timestamp(inicio) - pd.Timestamp(0)).days
+        if fim is not None: selecionadas &= dias <= (pd.Timestamp(fim) - pd.Timestamp(0)).days
+    invalidas = indice["dias"] == _DIA_INVALIDO
+    if categorias is not None:
+        codigos = np.flatnonzero(np.isin(indice["nomes_categorias"], list(categorias)))
+        na_categoria = np.isin(indice["categorias"], codigos)
+        selecionadas &= na_categoria
+        invalidas &= na_categoria
+    ler_datas = colunas is None or "Data da Compra" in colunas
+    linhas = np.flatnonzero(selecionadas | invalidas if ler_datas else selecionadas)
+
+    inicios = indice["inicios"]
+    fins = np.append(inicios[1:], indice["fim_arquivo"][0])
+    conteudo = np.memmap(caminho, dtype=np.uint8, mode="r")
+    partes = [conteudo[:inicios[0]].tobytes() if len(inicios) else conteudo[:].tobytes()]
+    # Posição de cada byte das linhas selecionadas, sem laço por linha (em lotes, para limitar a memória)
+    for lote in range(0, len(linhas), 50_000):
+        selecao = linhas[lote:lote + 50_000]
+        tamanhos = fins[selecao] - inicios[selecao]
+        deslocamento = np.repeat(inicios[selecao] - np.cumsum(tamanhos) + tamanhos, tamanhos)
+        partes.append(conteudo[deslocamento + np.arange(tamanhos.sum())].tobytes())
+    dados = b"".join(partes)
+    del conteudo
+
+    usecols = None if colunas is None else (lambda coluna: coluna in colunas)
+    df = pd.read_csv(io.BytesIO(dados), usecols=usecols)
+    df.index = linhas
+    if not ler_datas:
+        return df, len(dados), None
+    textos = df["Data da Compra"]
+    df["Data da Compra"], linhas_invalidas = converter_datas(textos)
+    return df[selecionadas[linhas]], len(dados), textos.loc[linhas_invalidas]
+
+def ler_loja(caminho, colunas=None, inicio=None, fim=None, categorias=None, dir_cache=None,
+             tamanho_bloco=100_000, usar_indice=True):
+    """
+    Lê o CSV de uma loja só com as `colunas` pedidas e os filtros aplicados na leitura
+    (pelo índice de linhas ou em blocos). Retorna (df, bytes_lidos, datas_invalidas).
+    """
+    usecols = None if colunas is None else (lambda coluna: coluna in colunas)
+    tamanho = os.path.getsize(caminho)
+    if inicio is None and fim is None and categorias is None:
+        return pd.read_csv(caminho, usecols=usecols), tamanho, None
+
+    if usar_indice:
+        indice, bytes_indice = indice_linhas(caminho, dir_cache)
+        if indice is None:
+            return _ler_criando_indice(caminho, colunas, inicio, fim, categorias, dir_cache)
+        df, bytes_lidos, datas_invalidas = _ler_linhas_indice(caminho, indice, inicio, fim, categorias, colunas)
+        return df, bytes_indice + bytes_lidos, datas_invalidas
+
+    filtro = set()
+    if inicio is not None or fim is not None: filtro.add("Data da Compra")
+    if categorias is not None: filtro.add("Categoria do Produto")
+    leitura = None if colunas is None else set(colunas) | filtro
+    leitor = pd.read_csv(caminho, usecols=None if leitura is None else (lambda coluna: coluna in leitura),
+                         chunksize=tamanho_bloco)
+    invalidas = []
+    partes = [_filtrar_bloco(bloco, inicio, fim, categorias, invalidas) for bloco in leitor]
+    df = pd.concat(partes) if partes else pd.DataFrame()
+    datas_invalidas = None
+    if colunas is None or "Data da Compra" in colunas:
+        datas_invalidas = pd.concat(invalidas) if invalidas else pd.Series(dtype=object, name="Data da Compra")
+    if colunas is not None:
+        df = df[[coluna for coluna in df.columns if coluna in colunas]]
+    return df, tamanho, datas_invalidas
+
+@instrumentar
 def combinar_lojas(dict_lojas):
+    # Lojas compactas já guardam o DataFrame combinado: nenhuma nova cópia
+    if isinstance(dict_lojas, LojasCombinadas):
+        return dict_lojas.combinado
     lista = [df for df in dict_lojas.values()]
     nomes = list(dict_lojas.keys())
     return pd.concat(lista, keys=nomes)
 
+# ------------------------------------------------------------------------------
+# Representação compacta em memória (opcional)
+# ------------------------------------------------------------------------------
+
+# Colunas de texto com proporção de valores distintos abaixo deste limite viram categóricas
+LIMITE_CATEGORICA = 0.5
+
+MODO_COMPACTO = os.environ.get("ALURA_STORE_COMPACTO") == "1"
+
+class LojasCombinadas(dict):
+    """
+    Dicionário nome_loja -> fatia (sem cópia) de um único DataFrame combinado,
+    que combinar_lojas devolve direto, sem concatenar de novo.
+    """
+    def __init__(self, combinado):
+        super().__init__()
+        self.combinado = combinado
+        # Lojas contíguas no combinado: os limites das fatias saem de uma passada pelos códigos
+        codigos = np.asarray(combinado.index.codes[0])
+        inicios = np.flatnonzero(np.diff(codigos, prepend=-1))
+        fins = np.append(inicios[1:], len(codigos))
+        linhas = combinado.index.get_level_values(1)
+        for inicio, fim in zip(inicios, fins):
+            fatia = combinado.iloc[inicio:fim]
+            fatia.index = linhas[inicio:fim]
+            self[combinado.index.levels[0][codigos[inicio]]] = fatia
+
+def _reduzir_numerica(serie):
+    """Reduz o tipo numérico só quando a conversão não perde informação."""
+    if pd.api.types.is_integer_dtype(serie):
+        return pd.to_numeric(serie, downcast="integer")
+    if pd.api.types.is_float_dtype(serie) and serie.dtype != np.float32:
+        reduzida = serie.astype(np.float32)
+        if np.array_equal(reduzida.to_numpy(np.float64), serie.to_numpy(np.float64), equal_nan=True):
+            return reduzida
+    return serie
+
+@instrumentar
+def compactar_lojas(dict_lojas, limite_categorica=LIMITE_CATEGORICA):
+    """
+    Modo compacto: textos repetitivos viram categóricas com o mesmo dicionário em todas as lojas
+    e números são reduzidos sem perda. Retorna LojasCombinadas.
+    """
+    primeiro = next(iter(dict_lojas.values()))
+    colunas_texto = [
+        coluna for coluna in primeiro.columns
+        if pd.api.types.is_object_dtype(primeiro[coluna]) or pd.api.types.is_string_dtype(primeiro[coluna])
+    ]
+
+    # Dicionário único por coluna: categorias iguais permitem concatenar sem voltar a object
+    categorias = {}
+    for coluna in colunas_texto:
+        valores = pd.concat([df[coluna] for df in dict_lojas.values() if coluna in df.columns])
+        unicos = valores.dropna().unique()
+        if len(unicos) <= limite_categorica * len(valores):
+            categorias[coluna] = pd.Index(unicos).sort_values()
+
+    compactas = []
+    for df in dict_lojas.values():
+        df = df.copy(deep=False)
+        for coluna in df.columns:
+            if coluna in categorias:
+                df[coluna] = pd.Categorical(df[coluna], categories=categorias[coluna])
+            else:
+                df[coluna] = _reduzir_numerica(df[coluna])
+        compactas.append(df)
+
+    combinado = pd.concat(compactas, keys=list(dict_lojas.keys()))
+    return LojasCombinadas(combinado)
+
+def memoria_por_coluna(dict_lojas):
+    """
+    Bytes ocupados por coluna, somando todas as lojas (inclui o conteúdo das strings).
+    """
+    if isinstance(dict_lojas, LojasCombinadas):
+        return dict_lojas.combinado.memory_usage(deep=True, index=False)
+    return sum(df.memory_usage(deep=True, index=False) for df in dict_lojas.values())
+
+def relatorio_memoria(antes, depois):
+    print("\n" + "-" * 80)
+    print("RELATÓRIO DE MEMÓRIA POR COLUNA (MODO COMPACTO)")
+    print("-" * 80)
+    tabela = pd.DataFrame({"Antes (bytes)": antes, "Depois (bytes)": depois})
+    tabela.loc["TOTAL"] = tabela.sum()
+    tabela["Redução"] = (1 - tabela["Depois (bytes)"] / tabela["Antes (bytes)"]) * 100
+    print(tabela.to_string(formatters={
+        "Antes (bytes)": "{:,.0f}".format,
+        "Depois (bytes)": "{:,.0f}".format,
+        "Redução": "{:.1f}%".format,
+    }))
+    print()
+
+# Colunas numéricas pré-agregadas no cubo (soma e contagem de cada uma)
+COLUNAS_CUBO = ["Preço", "Frete", "Avaliação da compra"]
+
+# As somas do cubo são inteiras, em milionésimos (R$ 0,000001). Soma de inteiros
+# não depende da ordem das linhas, então cubos parciais (blocos, lojas,
+# processos ou máquinas) somados dão exatamente o total da execução única.
+ESCALA_SOMAS = 10**6
+
+@instrumentar
+def construir_cubo(dict_lojas):
+    """
+    Pré-agrega todas as lojas em um cubo Loja x Categoria x Ano x Mês (soma e contagem de
+    Preço, Frete e Avaliação da compra), lido pelos relatórios.
+    """
+    df_combinado = combinar_lojas(dict_lojas)
+    return _agregar_cubo(df_combinado, df_combinado.index.get_level_values(0))
+
+def _agregar_cubo(df, lojas):
+    """
+    Agrega `df` no formato do cubo. `lojas` indica a loja de cada linha
+    (nível do MultiIndex ou array com o nome da loja repetido).
+    """
+    # Colunas não carregadas (leitura seletiva) viram níveis vazios do cubo
+    vazio = pd.Series(pd.NA, index=df.index, dtype="Int64")
+    datas = df["Data da Compra"] if "Data da Compra" in df.columns else None
+    chaves = [
+        pd.Index(lojas, name="Loja"),
+        df["Categoria do Produto"] if "Categoria do Produto" in df.columns else vazio.rename("Categoria do Produto"),
+        datas.dt.year.astype("Int64").rename("Ano") if datas is not None else vazio.rename("Ano"),
+        datas.dt.month.astype("Int64").rename("Mês") if datas is not None else vazio.rename("Mês"),
+    ]
+    colunas = [coluna for coluna in COLUNAS_CUBO if coluna in df.columns]
+    # Soma inteira (ESCALA_SOMAS) e contagem de valores não nulos de cada coluna
+    medidas = {}
+    for coluna in colunas:
+        valores = df[coluna].astype("float64")
+        medidas[(coluna, "sum")] = (valores * ESCALA_SOMAS).round().fillna(0).astype("int64")
+        medidas[(coluna, "count")] = valores.notna().astype("int64")
+    # dropna=False mantém no cubo as vendas sem data/categoria (entram nos totais da loja)
+    return pd.DataFrame(medidas, index=df.index).groupby(chaves, dropna=False, observed=True).sum()
+
+def _somar_cubos(cubos):
+    """
+    Combina cubos parciais (ex.: um por bloco de linhas) somando somas e contagens.
+    """
+    return pd.concat(cubos).groupby(level=list(range(4)), dropna=False, observed=True).sum()
+
+@instrumentar
+def contar_produtos(dict_lojas):
+    """
+    Quantidade de vendas por produto de todas as lojas, indexada por (Loja, Produto).
+    """
+    df_combinado = combinar_lojas(dict_lojas)
+    return df_combinado.groupby(
+        [df_combinado.index.get_level_values(0).rename("Loja"), "Produto"], observed=True, sort=False
+        ).size()
+
+# Colunas lidas no modo streaming (apenas o necessário para os agregados)
+COLUNAS_STREAMING = ["Produto", "Categoria do Produto", "Preço", "Frete",
+                     "Data da Compra", "Avaliação da compra"]
+
+def _colunas_streaming(dir_quarentena=None):
+    """Colunas lidas em blocos; com quarentena, também as que as regras de validação usam."""
+    if not dir_quarentena:
+        return set(COLUNAS_STREAMING)
+    return set(COLUNAS_STREAMING).union(*(colunas for colunas, _ in REGRAS_VALIDACAO.values()))
+
+@instrumentar
+def carregar_agregados_em_blocos(fonte=None, dir_cache=None, tamanho_bloco=100_000,
+                                 capacidade_sketch=None, arquivos=None, inicio=None, fim=None,
+                                 categorias=None, dir_quarentena=None):
+    """
+    Modo streaming: lê cada CSV em blocos de `tamanho_bloco` linhas e acumula só os agregados
+    (cubo, produtos, distribuição); retorna {"cubo", "produtos", "distribuicao", "linhas"}.
+    """
+    print(">>> Iniciando carregamento em blocos (streaming)...")
+    caminhos = obter_arquivos_lojas(fonte, dir_cache, arquivos)
+
+    colunas_lidas = _colunas_streaming(dir_quarentena)
+    cubos, produtos, distribuicoes, linhas = [], {}, [], {}
+    for nome_loja, caminho in caminhos.items():
+        try:
+            leitor = pd.read_csv(caminho, usecols=lambda c: c in colunas_lidas,
+                                 chunksize=tamanho_bloco)
+            destino = arquivo_quarentena(dir_quarentena, nome_loja) if dir_quarentena else None
+            cubo_loja, produtos_loja, distribuicao_loja, total_linhas = _agregar_blocos(
+                nome_loja, leitor, capacidade_sketch, inicio, fim, categorias, destino)
+
+            if cubo_loja is None: continue
+            print(f"{nome_loja}: {total_linhas} linhas agregadas em blocos de {tamanho_bloco}.")
+            cubos.append(cubo_loja)
+            produtos[nome_loja] = produtos_loja
+            distribuicoes.append(distribuicao_loja)
+            linhas[nome_loja] = total_linhas
+        except Exception as e:
+            print(f"Erro crítico ao carregar {nome_loja}: {e}")
+
+    if not linhas:
+        return {"cubo": None, "produtos": None, "distribuicao": None, "linhas": linhas}
+    if capacidade_sketch:
+        return {"cubo": pd.concat(cubos), "produtos": None, "distribuicao": pd.concat(distribuicoes),
+                "linhas": linhas, "sketches_produtos": produtos}
+    return {
+        "cubo": pd.concat(cubos),
+        "produtos": pd.concat(produtos, names=["Loja", "Produto"]),
+        "distribuicao": pd.concat(distribuicoes),
+        "linhas": linhas,
+    }
+
+def _agregar_blocos(nome_loja, leitor, capacidade_sketch=None, inicio=None, fim=None, categorias=None,
+                    arquivo_quarentena=None, anexar_quarentena=False):
+    """
+    Acumula cubo, produtos e distribuição de uma loja bloco a bloco (filtros e quarentena por bloco).
+    Retorna (cubo_loja, produtos_loja, distribuicao_loja, total_linhas).
+    """
+    cubo_loja, produtos_loja, distribuicao_loja = None, None, None
+    if capacidade_sketch:
+        produtos_loja = SketchHeavyHitters(capacidade_sketch)
+    total_linhas, datas_invalidas = 0, 0
+    violacoes_loja, linhas_validadas, linhas_com_violacao = None, 0, 0
+    anexar = anexar_quarentena
+    for bloco in leitor:
+        bloco["Data da Compra"], linhas_invalidas = converter_datas(bloco["Data da Compra"])
+        datas_invalidas += len(linhas_invalidas)
+        if inicio is not None or fim is not None or categorias is not None:
+            bloco = _filtrar_bloco(bloco, inicio, fim, categorias)
+
+        violacoes = validar_dados(bloco)
+        contagens = violacoes.sum()
+        violacoes_loja = contagens if violacoes_loja is None else violacoes_loja + contagens
+        linhas_validadas += len(bloco)
+        linhas_com_violacao += int(violacoes.any(axis=1).sum())
+        if arquivo_quarentena:
+            bloco = separar_quarentena(bloco, violacoes, arquivo_quarentena, anexar)
+            anexar = True
+        lojas_bloco = np.repeat(nome_loja, len(bloco))
+        # Distribuição antes dos preenchimentos: colunas ausentes não viram zeros
+        parcial = _agregar_distribuicao(bloco, lojas_bloco)
+        distribuicao_loja = parcial if distribuicao_loja is None else _somar_distribuicoes([distribuicao_loja, parcial])
+        if 'Avaliação da compra' not in bloco.columns: bloco['Avaliação da compra'] = 0.0
+        if 'Frete' not in bloco.columns: bloco['Frete'] = 0.0
+
+        parcial = _agregar_cubo(bloco, lojas_bloco)
+        cubo_loja = parcial if cubo_loja is None else _somar_cubos([cubo_loja, parcial])
+        if capacidade_sketch:
+            produtos_loja.atualizar(bloco["Produto"])
+        else:
+            contagem = bloco["Produto"].value_counts(sort=False)
+            produtos_loja = contagem if produtos_loja is None else produtos_loja.add(contagem, fill_value=0)
+        total_linhas += len(bloco)
+
+    if datas_invalidas:
+        print(f"Aviso: {datas_invalidas} datas inválidas em {nome_loja} (transformadas em NaT).")
+    if linhas_validadas:
+        imprimir_validacao(nome_loja, violacoes_loja, linhas_validadas, linhas_com_violacao, arquivo_quarentena)
+    if produtos_loja is not None and not capacidade_sketch:
+        produtos_loja = produtos_loja.astype("int64")
+    return cubo_loja, produtos_loja, distribuicao_loja, total_linhas
+
+# ------------------------------------------------------------------------------
+# Armazenamento colunar mapeado em memória (abertura sem cópia, compartilhada)
+# ------------------------------------------------------------------------------
+
+@instrumentar
+def converter_para_colunar(dir_saida=None, fonte=None, dir_cache=None, arquivos=None, dir_quarentena=None):
+    """
+    Converte as lojas tratadas em um diretório colunar (um .npy por coluna e loja, textos como
+    códigos de um dicionário único em colunar.json), uma loja por vez. Retorna o manifesto.
+    """
+    dir_saida = dir_saida or DIR_COLUNAR
+    caminhos = obter_arquivos_lojas(fonte, dir_cache, arquivos)
+    os.makedirs(dir_saida, exist_ok=True)
+
+    manifesto = {"versao": VERSAO_COLUNAR, "lojas": {}, "colunas": {}, "categorias": {}}
+    dicionarios = {}  # coluna -> {loja: valores distintos da loja, na ordem dos códigos gravados}
+    for nome_loja, caminho in caminhos.items():
+        dados = carregar_dados(caminhos={nome_loja: caminho}, dir_quarentena=dir_quarentena)
+        if nome_loja not in dados: continue
+        df = dados.pop(nome_loja)
+        pasta = _nome_arquivo(nome_loja)
+        os.makedirs(os.path.join(dir_saida, pasta), exist_ok=True)
+        for coluna in df.columns:
+            serie = df[coluna]
+            info = manifesto["colunas"].setdefault(coluna, {"arquivo": f"{_nome_arquivo(coluna)}.npy"})
+            if pd.api.types.is_object_dtype(serie) or pd.api.types.is_string_dtype(serie):
+                # Códigos do dicionário ordenado da loja; em geral já são os do dicionário único
+                codigos, unicos = pd.factorize(serie, sort=True)
+                valores = codigos.astype(_tipo_codigos(len(unicos)))
+                dicionarios.setdefault(coluna, {})[nome_loja] = pd.Index(unicos)
+                info["tipo"] = "categorica"
+            else:
+                valores = serie.to_numpy()
+                info["tipo"] = "data" if pd.api.types.is_datetime64_any_dtype(serie) else "numerica"
+            _salvar_array(os.path.join(dir_saida, pasta, info["arquivo"]), valores)
+        manifesto["lojas"][nome_loja] = {"pasta": pasta, "linhas": len(df), "colunas": list(df.columns),
+                                         "origem": impressao_arquivo(caminho)}
+        print(f"{nome_loja}: {len(df):,} linhas convertidas para o formato colunar.")
+
+    # Dicionário único e ordenado por coluna: só as lojas cujos códigos não coincidem com ele
+    # (valores que faltam na loja ou tipo de código maior) são regravadas
+    for coluna, por_loja in dicionarios.items():
+        categorias = pd.Index(np.concatenate([unicos.to_numpy(dtype=object) for unicos in por_loja.values()]))
+        categorias = categorias.unique().sort_values()
+        tipo = _tipo_codigos(len(categorias))
+        for nome_loja, unicos in por_loja.items():
+            posicoes = categorias.get_indexer(unicos)
+            if tipo == _tipo_codigos(len(unicos)) and (posicoes == np.arange(len(unicos))).all():
+                continue
+            caminho = os.path.join(dir_saida, manifesto["lojas"][nome_loja]["pasta"],
+                                   manifesto["colunas"][coluna]["arquivo"])
+            mapa = np.append(posicoes, -1).astype(tipo)
+            _salvar_array(caminho, mapa[np.load(caminho)])  # código -1 (nulo) vira mapa[-1] = -1
+        manifesto["categorias"][coluna] = categorias.tolist()
+
+    # O manifesto é gravado por último: o diretório só é aberto depois de completo
+    with open(os.path.join(dir_saida, ARQUIVO_MANIFESTO_COLUNAR + ".tmp"), "w", encoding="utf-8") as arquivo:
+        json.dump(manifesto, arquivo, ensure_ascii=False)
+    os.replace(os.path.join(dir_saida, ARQUIVO_MANIFESTO_COLUNAR + ".tmp"),
+               os.path.join(dir_saida, ARQUIVO_MANIFESTO_COLUNAR))
+    return manifesto
+
+@instrumentar
+def carregar_colunar(diretorio=None, lojas=None, colunas=None, inicio=None, fim=None, categorias=None):
+    """
+    Abre um diretório de converter_para_colunar sem ler nem copiar os dados, com os mesmos filtros
+    de carregar_dados (`lojas` limita as lojas abertas). Retorna LojasColunares.
+    """
+    lojas_colunares = LojasColunares(diretorio or DIR_COLUNAR, lojas, colunas, inicio, fim, categorias)
+    print(f">>> Dados colunares abertos de {diretorio or DIR_COLUNAR}: {len(lojas_colunares)} lojas, "
+          f"{sum(len(df) for df in lojas_colunares.values()):,} linhas (mapeados em memória, sem cópia).")
+    return lojas_colunares
+
+# ------------------------------------------------------------------------------
+# Atualização incremental dos agregados (apenas linhas novas no fim dos CSVs)
+# ------------------------------------------------------------------------------
+
+ARQUIVO_ESTADO_INCREMENTAL = os.path.join(DIR_CACHE, "agregados_incrementais.pkl")
+
+# Bytes finais do trecho já processado usados para conferir que o arquivo só cresceu
+TAMANHO_ASSINATURA = 64 * 1024
+
+def _assinatura_arquivo(arquivo, posicao):
+    """
+    Cabeçalho e hash dos últimos TAMANHO_ASSINATURA bytes antes de `posicao`.
+    Se mudarem, o arquivo foi reescrito (não apenas acrescido) e a loja é recalculada.
+    """
+    arquivo.seek(0)
+    cabecalho = arquivo.readline()
+    inicio = max(0, posicao - TAMANHO_ASSINATURA)
+    arquivo.seek(inicio)
+    return cabecalho, hashlib.sha256(arquivo.read(posicao - inicio)).hexdigest()
+
+def _fim_ultima_linha(arquivo, inicio, tamanho, tamanho_leitura=64 * 1024):
+    """Posição logo após o último b"\\n" entre `inicio` e `tamanho` (ou `inicio`, se não houver)."""
+    fim = tamanho
+    while fim > inicio:
+        comeco = max(inicio, fim - tamanho_leitura)
+        arquivo.seek(comeco)
+        encontrado = arquivo.read(fim - comeco).rfind(b"\n")
+        if encontrado >= 0:
+            return comeco + encontrado + 1
+        fim = comeco
+    return inicio
+
+@instrumentar
+def atualizar_agregados_incrementais(fonte=None, dir_cache=None, arquivo_estado=None,
+                                     tamanho_bloco=100_000, arquivos=None, dir_quarentena=None):
+    """
+    Modo incremental: soma aos agregados salvos só as linhas acrescentadas ao fim de cada CSV
+    (loja reescrita é recalculada). Retorna o formato de carregar_agregados_em_blocos.
+    """
+    arquivo_estado = arquivo_estado or ARQUIVO_ESTADO_INCREMENTAL
+    print(">>> Atualizando agregados incrementais...")
+    caminhos = obter_arquivos_lojas(fonte, dir_cache, arquivos)
+    colunas_lidas = _colunas_streaming(dir_quarentena)
+
+    estado = {"lojas": {}, "cubo": None, "produtos": None, "distribuicao": None,
+              "escala_somas": ESCALA_SOMAS, "precisao_distribuicao": PRECISAO_DISTRIBUICAO}
+    if os.path.exists(arquivo_estado):
+        salvo = pd.read_pickle(arquivo_estado)
+        if (salvo.get("escala_somas") == ESCALA_SOMAS
+                and salvo.get("precisao_distribuicao") == PRECISAO_DISTRIBUICAO):
+            estado = salvo
+        else:
+            print("Aviso: agregados salvos em formato antigo; recalculando todas as lojas.")
+
+    for nome_loja, caminho in caminhos.items():
+        try:
+            info = estado["lojas"].get(nome_loja)
+            with open(caminho, "rb") as arquivo:
+                cabecalho = arquivo.readline()
+                colunas = pd.read_csv(io.BytesIO(cabecalho)).columns.tolist()
+                tamanho = os.fstat(arquivo.fileno()).st_size
+
+                retomar = (
+                    info is not None
+                    and info["bytes"] <= tamanho
+                    and _assinatura_arquivo(arquivo, info["bytes"]) == (info["cabecalho"], info["assinatura"])
+                )
+                if not retomar:
+                    if info is not None:
+                        print(f"Aviso: {nome_loja} foi reescrita; recalculando desde o início.")
+                    estado["cubo"], estado["produtos"], estado["distribuicao"] = _remover_loja(
+                        nome_loja, estado["cubo"], estado["produtos"], estado["distribuicao"])
+                    info = {"linhas": 0, "bytes": len(cabecalho)}
+
+                # Só linhas completas: uma linha ainda sem "\n" pode estar sendo escrita
+                posicao = _fim_ultima_linha(arquivo, info["bytes"], tamanho)
+                if posicao < tamanho:
+                    print(f"Aviso: {nome_loja} termina em linha incompleta; ela fica para a próxima atualização.")
+                arquivo.seek(info["bytes"])
+                trecho = io.BufferedReader(_TrechoArquivo(arquivo, posicao - info["bytes"]))
+                leitor = pd.read_csv(trecho, header=None, names=colunas,
+                                     usecols=lambda c: c in colunas_lidas,
+                                     chunksize=tamanho_bloco)
+                destino = arquivo_quarentena(dir_quarentena, nome_loja) if dir_quarentena else None
+                cubo_novo, produtos_novos, distribuicao_nova, novas_linhas = _agregar_blocos(
+                    nome_loja, leitor, arquivo_quarentena=destino, anexar_quarentena=retomar)
+
+                _, assinatura = _assinatura_arquivo(arquivo, posicao)
+
+            if cubo_novo is not None:
+                partes_cubo = [parte for parte in (estado["cubo"], cubo_novo) if parte is not None]
+                estado["cubo"] = _somar_cubos(partes_cubo)
+                estado["distribuicao"] = _somar_distribuicoes(
+                    [parte for parte in (estado["distribuicao"], distribuicao_nova) if parte is not None])
+                produtos_novos = pd.concat({nome_loja: produtos_novos}, names=["Loja", "Produto"])
+                if estado["produtos"] is None:
+                    estado["produtos"] = produtos_novos
+                else:
+                    estado["produtos"] = estado["produtos"].add(produtos_novos, fill_value=0).astype("int64")
+
+            estado["lojas"][nome_loja] = {
+                "linhas": info["linhas"] + novas_linhas, "bytes": posicao,
+                "cabecalho": cabecalho, "assinatura": assinatura,
+            }
+            print(f"{nome_loja}: {novas_linhas} linhas novas "
+                  f"(total processado: {estado['lojas'][nome_loja]['linhas']}).")
+        except Exception as e:
+            print(f"Erro crítico ao atualizar {nome_loja}: {e}")
+
+    # Grava em arquivo temporário e troca de uma vez para nunca deixar estado pela metade
+    os.makedirs(os.path.dirname(arquivo_estado) or ".", exist_ok=True)
+    pd.to_pickle(estado, arquivo_estado + ".tmp")
+    os.replace(arquivo_estado + ".tmp", arquivo_estado)
+
+    linhas = {nome: info["linhas"] for nome, info in estado["lojas"].items()
+              if nome in caminhos and info["linhas"] > 0}
+    return {"cubo": estado["cubo"], "produtos": estado["produtos"], "distribuicao": estado["distribuicao"],
+            "linhas": linhas}
+
+def _remover_loja(nome_loja, *agregados):
+    """Remove uma loja de cada agregado indexado por "Loja" (para recálculo)."""
+    return [agregado.drop(nome_loja, level="Loja")
+            if agregado is not None and nome_loja in agregado.index.get_level_values("Loja") else agregado
+            for agregado in agregados]
+
+# ------------------------------------------------------------------------------
+# Agregação fragmentada (map-reduce) com agregados parciais mescláveis
+# ------------------------------------------------------------------------------
+
+# Tamanho aproximado, em bytes, de cada fragmento de CSV processado por um worker
+TAMANHO_FRAGMENTO = 64 * 2**20
+
+class _TrechoArquivo(io.RawIOBase):
+    """Leitura limitada a `tamanho` bytes de um arquivo aberto (um fragmento do CSV)."""
+    def __init__(self, arquivo, tamanho):
+        self._arquivo = arquivo
+        self._restante = tamanho
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        lidos = self._arquivo.readinto(memoryview(buffer)[:min(len(buffer), self._restante)])
+        self._restante -= lidos
+        return lidos
+
+def fragmentar_arquivos(caminhos, tamanho_fragmento=TAMANHO_FRAGMENTO):
+    """
+    Divide os CSVs em fragmentos de cerca de `tamanho_fragmento` bytes, sempre no início de uma linha.
+    Cada fragmento é um dict serializável (loja, caminho, colunas, intervalo de bytes).
+    """
+    fragmentos = []
+    for nome_loja, caminho in caminhos.items():
+        with open(caminho, "rb") as arquivo:
+            cabecalho = arquivo.readline()
+            colunas = pd.read_csv(io.BytesIO(cabecalho)).columns.tolist()
+            tamanho = os.fstat(arquivo.fileno()).st_size
+            inicio = len(cabecalho)
+            while inicio < tamanho:
+                fim = inicio + tamanho_fragmento
+                if fim < tamanho:
+                    # Avança até o fim da linha em andamento
+                    arquivo.seek(fim - 1)
+                    arquivo.readline()
+                    fim = arquivo.tell()
+                fim = min(fim, tamanho)
+                fragmentos.append({"loja": nome_loja, "caminho": caminho, "colunas": colunas,
+                                   "inicio": inicio, "fim": fim})
+                inicio = fim
+    return fragmentos
+
+def agregar_fragmento(fragmento, tamanho_bloco=100_000, capacidade_sketch=None,
+                      inicio=None, fim=None, categorias=None, dir_quarentena=None):
+    """
+    Etapa map: agrega as linhas de um fragmento em um parcial mesclável (cubo, produtos,
+    distribuição, linhas, saída e erro). Erros ficam no parcial, não são propagados.
+    """
+    parcial = {"loja": fragmento["loja"], "cubo": None, "produtos": None, "distribuicao": None,
+               "linhas": 0, "erro": None}
+    colunas_lidas = _colunas_streaming(dir_quarentena)
+    saida = io.StringIO()
+    try:
+        with open(fragmento["caminho"], "rb") as arquivo, contextlib.redirect_stdout(saida):
+            arquivo.seek(fragmento["inicio"])
+            trecho = io.BufferedReader(_TrechoArquivo(arquivo, fragmento["fim"] - fragmento["inicio"]))
+            leitor = pd.read_csv(trecho, header=None, names=fragmento["colunas"],
+                                 usecols=lambda c: c in colunas_lidas, chunksize=tamanho_bloco)
+            destino = None
+            if dir_quarentena:
+                destino = arquivo_quarentena(dir_quarentena, fragmento["loja"], f"{fragmento['inicio']:012d}")
+            parcial["cubo"], parcial["produtos"], parcial["distribuicao"], parcial["linhas"] = _agregar_blocos(
+                fragmento["loja"], leitor, capacidade_sketch, inicio, fim, categorias, destino)
+    except Exception as e:
+        parcial["erro"] = f"{type(e).__name__}: {e}"
+    parcial["saida"] = saida.getvalue()
+    return parcial
+
+def mesclar_parciais(parciais, capacidade_sketch=None):
+    """
+    Etapa reduce: combina os parciais, em qualquer ordem, no formato de carregar_agregados_em_blocos,
+    com o mesmo resultado da execução em um único processo.
+    """
+    com_erro = {}
+    for parcial in parciais:
+        print(parcial["saida"], end="")
+        if parcial["erro"] and parcial["loja"] not in com_erro:
+            com_erro[parcial["loja"]] = parcial["erro"]
+            print(f"Erro crítico ao agregar {parcial['loja']}: {parcial['erro']}")
+
+    cubos, produtos, distribuicoes, linhas = [], {}, [], {}
+    for parcial in parciais:
+        nome_loja = parcial["loja"]
+        if nome_loja in com_erro or parcial["cubo"] is None:
+            continue
+        cubos.append(parcial["cubo"])
+        distribuicoes.append(parcial["distribuicao"])
+        linhas[nome_loja] = linhas.get(nome_loja, 0) + parcial["linhas"]
+        produtos.setdefault(nome_loja, []).append(parcial["produtos"])
+
+    if not linhas:
+        return {"cubo": None, "produtos": None, "distribuicao": None, "linhas": linhas}
+    cubo = _somar_cubos(cubos)
+    distribuicao = _somar_distribuicoes(distribuicoes)
+    if capacidade_sketch:
+        sketches = {}
+        for nome_loja, partes in produtos.items():
+            sketches[nome_loja] = SketchHeavyHitters(capacidade_sketch)
+            for sketch in partes:
+                sketches[nome_loja].mesclar(sketch)
+        return {"cubo": cubo, "produtos": None, "distribuicao": distribuicao, "linhas": linhas,
+                "sketches_produtos": sketches}
+    contagens = {nome_loja: pd.concat(partes).groupby(level=0, sort=False).sum().astype("int64")
+                 for nome_loja, partes in produtos.items()}
+    return {"cubo": cubo, "produtos": pd.concat(contagens, names=["Loja", "Produto"]),
+            "distribuicao": distribuicao, "linhas": linhas}
+
+@instrumentar
+def carregar_agregados_fragmentados(fonte=None, dir_cache=None, tamanho_fragmento=TAMANHO_FRAGMENTO,
+                                    max_workers=None, tamanho_bloco=100_000, capacidade_sketch=None,
+                                    arquivos=None, inicio=None, fim=None, categorias=None,
+                                    dir_quarentena=None):
+    """
+    Modo fragmentado (map-reduce): agrega os fragmentos em `max_workers` processos (0 = no processo
+    atual) e mescla os parciais, com o mesmo resultado de carregar_agregados_em_blocos.
+    """
+    print(">>> Iniciando agregação fragmentada (map-reduce)...")
+    caminhos = obter_arquivos_lojas(fonte, dir_cache, arquivos)
+    fragmentos = fragmentar_arquivos(caminhos, tamanho_fragmento)
+    agregar = functools.partial(agregar_fragmento, tamanho_bloco=tamanho_bloco,
+                                capacidade_sketch=capacidade_sketch,
+                                inicio=inicio, fim=fim, categorias=categorias, dir_quarentena=dir_quarentena)
+    if max_workers == 0:
+        parciais = [agregar(fragmento) for fragmento in fragmentos]
+    else:
+        # Lotes de fragmentos por envio: com milhares de lojas pequenas, evita um envio por loja
+        lote = max(1, len(fragmentos) // (4 * (max_workers or os.cpu_count() or 1)))
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            parciais = list(executor.map(agregar, fragmentos, chunksize=lote))
+
+    agregados = mesclar_parciais(parciais, capacidade_sketch)
+    n_fragmentos = pd.Series([fragmento["loja"] for fragmento in fragmentos]).value_counts()
+    for nome_loja, total_linhas in agregados["linhas"].items():
+        print(f"{nome_loja}: {total_linhas} linhas agregadas em {n_fragmentos[nome_loja]} fragmento(s).")
+    return agregados
+
+@instrumentar
+def consultar_cubo(cubo, niveis, coluna="Preço", medida="soma"):
+    """
+    Reagrega o cubo nos níveis pedidos (medida "soma" ou "media"). Com "Ano" e "Mês" juntos,
+    o nível vira um Period mensal "Data da Compra".
+    """
+    agregado = cubo[coluna].groupby(level=niveis, observed=True).sum()
+    soma = agregado["sum"] / ESCALA_SOMAS
+    if medida == "media":
+        resultado = soma / agregado["count"]
+    else:
+        resultado = soma
+    resultado.name = coluna
+
+    if "Ano" in niveis and "Mês" in niveis:
+        chaves = resultado.index.to_frame(index=False)
+        posicao = min(niveis.index("Ano"), niveis.index("Mês"))
+        periodo = pd.to_datetime(pd.DataFrame({
+            "year": chaves.pop("Ano").astype(int),
+            "month": chaves.pop("Mês").astype(int),
+            "day": 1,
+        })).dt.to_period("M")
+        chaves.insert(posicao, "Data da Compra", periodo)
+        if chaves.shape[1] == 1:
+            resultado.index = pd.PeriodIndex(chaves["Data da Compra"], name="Data da Compra")
+        else:
+            resultado.index = pd.MultiIndex.from_frame(chaves)
+
+    return resultado
+
+# ------------------------------------------------------------------------------
+# Séries temporais: receita diária densa, janelas móveis e crescimento
+# ------------------------------------------------------------------------------
+
+class SerieDiaria:
+    """
+    Receita diária densa (séries x dias, em inteiros de ESCALA_SOMAS), da qual saem receita mensal,
+    anual, acumulada, janelas móveis e crescimento sem novos groupbys sobre as linhas.
+    """
+    def __init__(self, chaves, valores, primeiro_dia):
+        self.chaves = chaves
+        self.valores = valores
+        self.dias = pd.date_range(primeiro_dia, periods=valores.shape[1], freq="D", name="Data da Compra")
+
+    def _tabela(self, valores, indice):
+        """DataFrame com um período por linha e uma série por coluna."""
+        return pd.DataFrame(valores.T, index=indice, columns=self.chaves)
+
+    def agrupar(self, nivel):
+        """Soma as séries mantendo só o nível pedido (ex.: "Loja")."""
+        codigos, rotulos = pd.factorize(self.chaves.get_level_values(nivel), sort=True)
+        somados = np.zeros((len(rotulos), self.valores.shape[1]), dtype=np.int64)
+        np.add.at(somados, codigos, self.valores)
+        return SerieDiaria(pd.Index(rotulos, name=nivel), somados, self.dias[0])
+
+    def diaria(self):
+        return self._tabela(self.valores / ESCALA_SOMAS, self.dias)
+
+    def acumulada(self):
+        """Receita acumulada até cada dia (soma de prefixos)."""
+        return self._tabela(np.cumsum(self.valores, axis=1) / ESCALA_SOMAS, self.dias)
+
+    def janela_movel(self, dias=30, medida="soma"):
+        """
+        Soma (ou média) dos últimos `dias` dias por somas de prefixo; sem janela completa, NaN
+        como em rolling(dias).
+        """
+        n_series, n_dias = self.valores.shape
+        prefixo = np.zeros((n_series, n_dias + 1), dtype=np.int64)
+        np.cumsum(self.valores, axis=1, out=prefixo[:, 1:])
+        resultado = np.full((n_series, n_dias), np.nan)
+        if dias <= n_dias:
+            resultado[:, dias - 1:] = (prefixo[:, dias:] - prefixo[:, :-dias]) / ESCALA_SOMAS
+        if medida == "media":
+            resultado /= dias
+        return self._tabela(resultado, self.dias)
+
+    def _por_periodo(self, frequencia):
+        """Soma dos dias de cada período ("M" ou "Y") com np.add.reduceat."""
+        periodos = self.dias.to_period(frequencia)
+        inicios = np.flatnonzero(np.r_[True, periodos[1:] != periodos[:-1]])
+        return np.add.reduceat(self.valores, inicios, axis=1), periodos[inicios]
+
+    def mensal(self):
+        valores, periodos = self._por_periodo("M")
+        return self._tabela(valores / ESCALA_SOMAS, periodos)
+
+    def anual(self):
+        valores, periodos = self._por_periodo("Y")
+        return self._tabela(valores / ESCALA_SOMAS, periodos.year.rename("Ano"))
+
+    def crescimento(self, defasagem=1):
+        """
+        Crescimento da receita mensal sobre `defasagem` meses antes (1 = mês a mês, 12 = ano a ano),
+        como fração; NaN sem mês de comparação ou com receita zero nele.
+        """
+        valores, periodos = self._por_periodo("M")
+        resultado = np.full(valores.shape, np.nan)
+        if defasagem < valores.shape[1]:
+            atual, base = valores[:, defasagem:], valores[:, :-defasagem]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                resultado[:, defasagem:] = np.where(base != 0, atual / base - 1, np.nan)
+        return self._tabela(resultado, periodos)
+
+@instrumentar
+def construir_serie_diaria(dict_lojas):
+    """
+    Monta a SerieDiaria Loja x Categoria do Produto em uma passada (np.bincount por série e dia).
+    Vendas sem data válida ficam de fora; retorna None se não houver nenhuma.
+    """
+    df = combinar_lojas(dict_lojas)
+    validas = df["Data da Compra"].notna().to_numpy()
+    if not validas.any():
+        return None
+    dias = df["Data da Compra"].to_numpy()[validas].astype("datetime64[D]")
+    primeiro_dia = dias.min().astype("datetime64[M]").astype("datetime64[D]")
+    fim = (dias.max().astype("datetime64[M]") + 1).astype("datetime64[D]")
+    n_dias = int((fim - primeiro_dia).astype(np.int64))
+
+    # Código de cada série (Loja, Categoria) a partir dos códigos de cada nível
+    codigos_loja, nomes_lojas = pd.factorize(df.index.get_level_values(0)[validas], sort=True)
+    codigos_categoria, nomes_categorias = pd.factorize(df["Categoria do Produto"].to_numpy()[validas],
+                                                       sort=True, use_na_sentinel=False)
+    codigos, pares = pd.factorize(codigos_loja * len(nomes_categorias) + codigos_categoria, sort=True)
+    series = pd.MultiIndex.from_arrays(
+        [nomes_lojas[pares // len(nomes_categorias)], nomes_categorias[pares % len(nomes_categorias)]],
+        names=["Loja", "Categoria do Produto"])
+    precos = np.round(df["Preço"].to_numpy(np.float64)[validas] * ESCALA_SOMAS)
+    # Os pesos são inteiros em float64: a soma é exata até 2**53 milionésimos por célula
+    celulas = codigos * n_dias + (dias - primeiro_dia).astype(np.int64)
+    valores = np.bincount(celulas, weights=np.nan_to_num(precos), minlength=len(series) * n_dias)
+    return SerieDiaria(series, valores.round().astype(np.int64).reshape(len(series), n_dias), primeiro_dia)
+
+def combinar_series_diarias(series):
+    """
+    Junta SeriesDiarias de lojas distintas (None = loja sem vendas) com o mesmo resultado
+    de construir_serie_diaria sobre as lojas juntas.
+    """
+    series = sorted((serie for serie in series if serie is not None), key=lambda serie: serie.chaves[0][0])
+    if not series:
+        return None
+    primeiro_dia = min(serie.dias[0] for serie in series)
+    n_dias = (max(serie.dias[-1] for serie in series) - primeiro_dia).days + 1
+    valores = np.zeros((sum(len(serie.chaves) for serie in series), n_dias), dtype=np.int64)
+    linha = 0
+    for serie in series:
+        deslocamento = (serie.dias[0] - primeiro_dia).days
+        valores[linha:linha + len(serie.chaves), deslocamento:deslocamento + len(serie.dias)] = serie.valores
+        linha += len(serie.chaves)
+    chaves = series[0].chaves.append([serie.chaves for serie in series[1:]])
+    return SerieDiaria(chaves, valores, primeiro_dia)
+
+# ------------------------------------------------------------------------------
+# Distribuições mescláveis: sketches de quantis de Preço, Frete e Avaliação
+# ------------------------------------------------------------------------------
+
+# Colunas com distribuição (percentis e histogramas) por loja e categoria
+COLUNAS_DISTRIBUICAO = ["Preço", "Frete", "Avaliação da compra"]
+
+NIVEIS_DISTRIBUICAO = ["Loja", "Categoria do Produto", "Coluna", "Balde"]
+
+# Erro relativo máximo dos percentis. Os baldes crescem em progressão
+# geométrica de razão 1 + PRECISAO_DISTRIBUICAO, então dois valores do mesmo
+# balde diferem no máximo 1% e o tamanho do sketch depende da faixa de valores
+# (cerca de 1.900 baldes entre R$ 0,01 e R$ 1 milhão), não do número de linhas.
+PRECISAO_DISTRIBUICAO = 0.01
+
+# Valores com módulo abaixo deste (menos de um centavo) vão para o balde do zero
+VALOR_MINIMO_DISTRIBUICAO = 0.01
+
+QUANTIS_DISTRIBUICAO = (0.5, 0.9, 0.99)
+
+def _baldes_distribuicao(valores, precisao=PRECISAO_DISTRIBUICAO):
+    """Balde de cada valor (0 perto de zero, k >= 1 positivos, -k negativos), na mesma ordem dos valores."""
+    razao = np.log1p(precisao)
+    modulos = np.abs(valores)
+    grandes = modulos >= VALOR_MINIMO_DISTRIBUICAO
+    k = (np.ceil(np.log(np.where(grandes, modulos, 1.0)) / razao)
+         - np.ceil(np.log(VALOR_MINIMO_DISTRIBUICAO) / razao) + 1)
+    return np.where(grandes, np.sign(valores) * k, 0).astype(np.int64)
+
+def _agregar_distribuicao(df, lojas, precisao=PRECISAO_DISTRIBUICAO):
+    """
+    Sketch de distribuição de `df`: contagem e soma inteira de cada Loja x Categoria x Coluna x Balde.
+    `lojas` indica a loja de cada linha, como em _agregar_cubo.
+    """
+    codigos_lojas, nomes_lojas = pd.factorize(pd.Index(lojas), use_na_sentinel=False)
+    if "Categoria do Produto" in df.columns:
+        codigos_categorias, categorias = pd.factorize(df["Categoria do Produto"], use_na_sentinel=False)
+    else:
+        codigos_categorias, categorias = np.zeros(len(df), dtype=np.int64), pd.array([pd.NA], dtype="Int64")
+    # Loja x Categoria x Balde vira uma única chave inteira (um groupby de uma chave por coluna)
+    grupos = codigos_lojas.astype(np.int64) * len(categorias) + codigos_categorias
+    partes = {}
+    for coluna in COLUNAS_DISTRIBUICAO:
+        if coluna not in df.columns: continue
+        valores = df[coluna].to_numpy(dtype=np.float64, na_value=np.nan)
+        validos = ~np.isnan(valores)
+        valores = valores[validos]
+        baldes = _baldes_distribuicao(valores, precisao)
+        menor = baldes.min(initial=0)
+        largura = baldes.max(initial=0) - menor + 1
+        medidas = pd.DataFrame({"count": np.ones(len(valores), dtype=np.int64),
+                                "sum": np.round(valores * ESCALA_SOMAS).astype(np.int64)})
+        somas = medidas.groupby(grupos[validos] * largura + (baldes - menor)).sum()
+        chaves = somas.index.to_numpy()
+        somas.index = pd.MultiIndex.from_arrays([
+            nomes_lojas[chaves // largura // len(categorias)],
+            categorias[chaves // largura % len(categorias)],
+            chaves % largura + menor,
+        ], names=["Loja", "Categoria do Produto", "Balde"])
+        partes[coluna] = somas
+    if not partes:
+        indice = pd.MultiIndex.from_arrays([[]] * len(NIVEIS_DISTRIBUICAO), names=NIVEIS_DISTRIBUICAO)
+        return pd.DataFrame({"count": [], "sum": []}, index=indice, dtype="int64")
+    return pd.concat(partes, names=["Coluna"]).reorder_levels(NIVEIS_DISTRIBUICAO)
+
+def _somar_distribuicoes(distribuicoes):
+    """
+    Mescla sketches de distribuição somando contagens e somas inteiras de cada balde
+    (exato, em qualquer ordem).
+    """
+    return pd.concat(distribuicoes).groupby(level=NIVEIS_DISTRIBUICAO, dropna=False, observed=True).sum()
+
+@instrumentar
+def construir_distribuicao(dict_lojas, precisao=PRECISAO_DISTRIBUICAO):
+    """
+    Sketch de distribuição de Preço, Frete e Avaliação da compra de todas as
+    lojas, por loja e categoria, em uma única passada sobre as linhas.
+    """
+    df_combinado = combinar_lojas(dict_lojas)
+    return _agregar_distribuicao(df_combinado, df_combinado.index.get_level_values(0), precisao)
+
+def calcular_percentis(distribuicao, niveis=(), quantis=QUANTIS_DISTRIBUICAO):
+    """
+    Percentis (np.quantile com method="lower") de cada coluna do sketch nos `niveis` pedidos,
+    com erro relativo de no máximo PRECISAO_DISTRIBUICAO. Colunas "Vendas", "p50", "p90", ...
+    """
+    grupos = list(niveis) + ["Coluna"]
+    baldes = distribuicao.groupby(level=grupos + ["Balde"], dropna=False, observed=True).sum()
+    contagens = baldes["count"].to_numpy()
+    acumuladas = np.cumsum(contagens)
+    medias = baldes["sum"].to_numpy() / ESCALA_SOMAS / contagens
+    # Os baldes de cada grupo são contíguos e ordenados por valor
+    totais = baldes["count"].groupby(level=grupos, dropna=False, observed=True, sort=False).sum()
+    n = totais.to_numpy()
+    inicios = np.cumsum(n) - n
+    percentis = pd.DataFrame({"Vendas": n}, index=totais.index)
+    for quantil in quantis:
+        posicoes = inicios + np.floor(quantil * (n - 1)).astype(np.int64)
+        percentis[f"p{quantil * 100:g}"] = medias[np.searchsorted(acumuladas, posicoes, side="right")]
+    return percentis
+
+def calcular_histograma(distribuicao, coluna, niveis=(), n_faixas=10):
+    """
+    Vendas por faixa de valor de `coluna` nos níveis pedidos, com as mesmas `n_faixas` faixas
+    (do menor valor ao p99) em todos os grupos. Retorna Series indexada por (níveis..., "Faixa").
+    """
+    da_coluna = distribuicao.xs(coluna, level="Coluna", drop_level=False)
+    gerais = da_coluna.groupby(level="Balde").sum()
+    medias = gerais["sum"].to_numpy() / ESCALA_SOMAS / gerais["count"].to_numpy()
+    distintos = np.unique(medias)
+    if len(distintos) <= n_faixas:
+        bordas = distintos
+        rotulos = [f"{valor:g}" for valor in distintos]
+    else:
+        p99 = calcular_percentis(da_coluna, (), (0.99,)).iloc[0, -1]
+        bordas = np.linspace(distintos[0], p99, n_faixas)
+        rotulos = [f"{a:,.2f} a {b:,.2f}" for a, b in zip(bordas[:-1], bordas[1:])] + [f"{bordas[-1]:,.2f} ou mais"]
+
+    faixa_balde = np.clip(np.searchsorted(bordas, medias, side="right") - 1, 0, len(bordas) - 1)
+    baldes = da_coluna.groupby(level=list(niveis) + ["Balde"], dropna=False, observed=True).sum()
+    codigos = faixa_balde[gerais.index.get_indexer(baldes.index.get_level_values("Balde"))]
+    faixas = pd.CategoricalIndex(pd.Categorical.from_codes(codigos, categories=rotulos, ordered=True), name="Faixa")
+    chaves = [baldes.index.get_level_values(nivel) for nivel in niveis] + [faixas]
+    return baldes["count"].groupby(chaves, dropna=False, observed=False).sum().rename("Vendas")
+
 # ==============================================================================
 # 2. FUNÇÕES DE RELATÓRIOS (ANÁLISES FINANCEIRAS E TEMPORAIS)
 # ==============================================================================
 
-def verificar_nulos(dict_lojas):
+# ------------------------------------------------------------------------------
+# Formatação para leitura e exportação das tabelas (CSV, JSON, Parquet)
+# ------------------------------------------------------------------------------
+
+_SAIDA_TABELAS = {"dir": None, "formatos": ("csv",), "arquivos": []}
+
+DIR_TABELAS = os.environ.get("ALURA_STORE_TABELAS")
+FORMATOS_TABELAS = tuple(os.environ.get("ALURA_STORE_FORMATOS_TABELAS", "csv").split(","))
+
+_POTENCIAS_10 = 10 ** np.arange(1, 19, dtype=np.int64)
+
+# Acima disso a parte inteira não cabe em int64: esses valores (e nan/inf) usam str.format
+LIMITE_REAIS_VETORIZADO = 1e18
+
+def formatar_reais(dados):
+    """Versão vetorizada de f"R$ {x:,.2f}" para Series/DataFrame, usada apenas na exibição (console)."""
+    if isinstance(dados, pd.DataFrame):
+        return dados.apply(formatar_reais)
+    valores = dados.to_numpy(dtype=np.float64, na_value=np.nan)
+    especiais = ~(np.abs(valores) < LIMITE_REAIS_VETORIZADO)
+    absolutos = np.where(especiais, 0.0, np.abs(valores))
+    inteiros = np.trunc(absolutos)
+
+    # A fração × 100 erra por poucos ulps; só valores a um fio de meio centavo são
+    # arredondados de novo sobre o valor binário exato (Decimal), como faz o f-string
+    fracao = (absolutos - inteiros) * 100
+    centavos = np.round(fracao)
+    for i in np.flatnonzero(np.abs(fracao - np.floor(fracao) - 0.5) < 1e-9):
+        centavos[i] = int(Decimal(absolutos[i] - inteiros[i]).scaleb(2).to_integral_value(ROUND_HALF_EVEN))
+    inteiros = inteiros.astype(np.int64) + (centavos == 100)
+    centavos = centavos.astype(np.int64) % 100
+    n_digitos = 1 + np.searchsorted(_POTENCIAS_10, inteiros, side="right")
+    negativo = np.signbit(valores) & ~especiais
+
+    # Dígitos, vírgulas e ponto escritos direto em uma matriz de bytes (uma coluna por posição)
+    fim = 3 + negativo + n_digitos + (n_digitos - 1) // 3 + 2
+    caracteres = np.zeros((len(valores), max(fim.max(initial=0) + 1, 4)), dtype=np.uint8)
+    caracteres[:, :3] = np.frombuffer(b"R$ ", dtype=np.uint8)
+    caracteres[negativo, 3] = ord("-")
+    linhas = np.arange(len(valores))
+    caracteres[linhas, fim] = ord("0") + centavos % 10
+    caracteres[linhas, fim - 1] = ord("0") + centavos // 10
+    caracteres[linhas, fim - 2] = ord(".")
+    for k in range(n_digitos.max(initial=0)):
+        ativos = k < n_digitos
+        caracteres[linhas[ativos], fim[ativos] - 3 - k - k // 3] = ord("0") + inteiros[ativos] // 10 ** k % 10
+        if k % 3 == 2:
+            virgula = k + 1 < n_digitos
+            caracteres[linhas[virgula], fim[virgula] - 4 - k - k // 3] = ord(",")
+
+    texto = caracteres.view(f"S{caracteres.shape[1]}").ravel().astype(str)
+    if especiais.any():
+        texto = texto.astype(object)
+        texto[especiais] = [f"R$ {x:,.2f}" for x in valores[especiais]]
+    return pd.Series(texto, index=dados.index, name=dados.name)
+
+def configurar_exportacao(dir_saida, formatos=("csv",)):
+    """
+    Ativa a exportação das tabelas dos relatórios, com valores numéricos (sem R$),
+    para `dir_saida` nos `formatos` pedidos (csv, json, parquet).
+    """
+    formatos = tuple(f.strip().lower() for f in formatos if f.strip())
+    invalidos = set(formatos) - {"csv", "json", "parquet"}
+    if invalidos:
+        raise ValueError(f"Formatos de exportação não suportados: {sorted(invalidos)}")
+    if "parquet" in formatos:
+        # Falha aqui, antes das análises, se não houver engine de Parquet instalada
+        pd.io.parquet.get_engine("auto")
+    os.makedirs(dir_saida, exist_ok=True)
+    _SAIDA_TABELAS.update(dir=dir_saida, formatos=formatos, arquivos=[])
+
+def finalizar_exportacao():
+    """Desativa a exportação e retorna a lista de arquivos gravados."""
+    arquivos = _SAIDA_TABELAS["arquivos"]
+    _SAIDA_TABELAS.update(dir=None, arquivos=[])
+    return arquivos
+
+def exportar_tabela(tabela, nome):
+    """
+    Grava uma tabela de resultado em formato longo (índices viram colunas, períodos AAAA-MM).
+    Sem exportação configurada, não faz nada.
+    """
+    if _SAIDA_TABELAS["dir"] is None:
+        return
+    df = tabela.to_frame() if isinstance(tabela, pd.Series) else tabela.copy()
+    df.columns = [str(c) for c in df.columns]
+    df = df.reset_index()
+    for coluna in df.columns:
+        if isinstance(df[coluna].dtype, pd.PeriodDtype):
+            df[coluna] = df[coluna].astype(str)
+
+    caminho_base = os.path.join(_SAIDA_TABELAS["dir"], _nome_arquivo(nome))
+    for formato in _SAIDA_TABELAS["formatos"]:
+        caminho = f"{caminho_base}.{formato}"
+        if formato == "csv":
+            df.to_csv(caminho, index=False)
+        elif formato == "json":
+            df.to_json(caminho, orient="records", force_ascii=False, indent=1, date_format="iso")
+        else:
+            df.to_parquet(caminho, index=False)
+        _SAIDA_TABELAS["arquivos"].append(caminho)
+
+def calcular_nulos(dict_lojas):
+    """Quantidade de valores nulos por coluna de cada loja: {loja: Series}."""
+    return {nome_loja: df.isnull().sum() for nome_loja, df in dict_lojas.items()}
+
+@instrumentar
+def verificar_nulos(dict_lojas, nulos=None):
     print("\n" + "#" * 80)
     print("VERIFICAÇÃO DE DADOS NULOS (APÓS LIMPEZA E CONVERSÃO DE DATAS)")
     print("#" * 80)
-    for nome_loja, df in dict_lojas.items():
+    if nulos is None: nulos = calcular_nulos(dict_lojas)
+    for nome_loja, nulos_loja in nulos.items():
         print("-" * 50)
         print(nome_loja)
         print("-" * 50)
-        print(df.isnull().sum(), "\n")
+        print(nulos_loja, "\n")
 
-def relatorio_vendas_por_loja(dict_lojas):
-    for nome_loja, df in dict_lojas.items():
+def calcular_vendas_por_loja(cubo):
+    """
+    Vendas de cada loja: total ("total"), por ano ("anual") e por mês
+    ("mensal", índice Period), como Series com a Loja no índice.
+    """
+    return {
+        "total": consultar_cubo(cubo, ["Loja"]),
+        "anual": consultar_cubo(cubo, ["Loja", "Ano"]),
+        "mensal": consultar_cubo(cubo, ["Loja", "Ano", "Mês"]),
+    }
+
+def _sem_vendas(nome_loja, lojas_com_vendas):
+    """Avisa e retorna True se a loja não tem vendas no cubo (ex.: período filtrado sem linhas dela)."""
+    if nome_loja in lojas_com_vendas:
+        return False
+    print(f"Sem vendas de {nome_loja} nos filtros selecionados.\n")
+    return True
+
+@instrumentar
+def relatorio_vendas_por_loja(dict_lojas, cubo=None):
+    if cubo is None: cubo = construir_cubo(dict_lojas)
+
+    vendas = calcular_vendas_por_loja(cubo)
+    total_vendas_lojas, vendas_ano_lojas, vendas_mes_ano_lojas = vendas["total"], vendas["anual"], vendas["mensal"]
+    exportar_tabela(total_vendas_lojas, "vendas_total_por_loja")
+    exportar_tabela(vendas_ano_lojas, "vendas_anuais_por_loja")
+    exportar_tabela(vendas_mes_ano_lojas, "vendas_mensais_por_loja")
+
+    for nome_loja in dict_lojas:
         print("=" * 50)
         print(f"RELATÓRIO DE VENDAS GERAL - {nome_loja}")
         print("=" * 50)
+        if _sem_vendas(nome_loja, total_vendas_lojas.index): continue
 
-        total_vendas_loja = df["Preço"].sum()
-        vendas_ano = df.groupby(df["Data da Compra"].dt.year)["Preço"].sum()
-        vendas_mes_ano = df.groupby(df["Data da Compra"].dt.to_period("M"))["Preço"].sum()
+        total_vendas_loja = total_vendas_lojas[nome_loja]
+        vendas_ano = vendas_ano_lojas.xs(nome_loja, level="Loja")
+        vendas_mes_ano = vendas_mes_ano_lojas.xs(nome_loja, level="Loja")
 
         print("-" * 50)
         print("TOTAL DE VENDAS")
@@ -133,137 +1790,97 @@ def relatorio_vendas_por_loja(dict_lojas):
         print("\n" + "-" * 50)
         print(f"TABELA DE DADOS: VENDAS ANUAIS ({nome_loja})")
         print("-" * 50)
-        print(vendas_ano.apply(lambda x: f"R$ {x:,.2f}"))
+        print(formatar_reais(vendas_ano))
 
         # Gráfico anual
-        plt.figure(figsize=(14, 5))
-        ax1 = vendas_ano.plot(kind="line", marker="o", color="#1f77b4", linewidth=3)
-        ax1.set_title(f"VENDAS ANUAIS - {nome_loja}", fontsize=20)
-        ax1.set_xlabel("ANO", fontsize=12)
-        ax1.set_ylabel("VENDAS (R$)", fontsize=12)
-        ax1.grid(axis="y", linestyle="--")
-        plt.xticks(vendas_ano.index)
-
-        for x, y in zip(vendas_ano.index, vendas_ano.values):
-            ax1.text(x, y + 100, f"R$ {y:,.2f}", ha="center")
-
-        plt.tight_layout()
-        plt.show()
+        exibir_grafico("grafico_vendas_anuais_loja", f"vendas_anuais_{nome_loja}", vendas_ano, nome_loja)
 
         # TABELA DE DADOS: VENDAS MENSAIS
         print("\n" + "-" * 50)
         print(f"TABELA DE DADOS: VENDAS MENSAIS ({nome_loja})")
         print("-" * 50)
-        print(vendas_mes_ano.apply(lambda x: f"R$ {x:,.2f}"))
+        print(formatar_reais(vendas_mes_ano))
 
         # Gráfico mês/ano
-        plt.figure(figsize=(14, 5))
-        # Ajuste para garantir plotagem temporal correta
-        ax2 = vendas_mes_ano.to_timestamp().plot(kind="line", marker="o", color="#ff7f0e", linewidth=2)
-        ax2.set_title(f"VENDAS MÊS/ANO - {nome_loja}", fontsize=20)
-        ax2.set_xlabel("MÊS/ANO", fontsize=12)
-        ax2.set_ylabel("VENDAS (R$)", fontsize=12)
-        ax2.grid(axis="y", linestyle="--")
-        
-        # Rótulos ajustados para datetime
-        for x_time, y_value in zip(vendas_mes_ano.to_timestamp().index, vendas_mes_ano.values):
-            rotulo_data = x_time.strftime("%m/%Y")
-            ax2.text(x_time, y_value + 300, rotulo_data,
-                     ha="center", fontsize=10, color="darkorange", rotation=90)
+        exibir_grafico("grafico_vendas_mensais_loja", f"vendas_mensais_{nome_loja}", vendas_mes_ano, nome_loja)
 
-        plt.tight_layout()
-        plt.show()
+def calcular_comparativo_vendas(cubo):
+    """
+    Vendas por ano ("anual") e por mês ("mensal") com uma coluna por loja
+    (zero onde a loja não vendeu no período).
+    """
+    return {
+        "anual": consultar_cubo(cubo, ["Ano", "Loja"]).unstack(level=1).fillna(0),
+        "mensal": consultar_cubo(cubo, ["Ano", "Mês", "Loja"]).unstack(level=1).fillna(0),
+    }
 
-def graficos_comparativos_vendas(dict_lojas):
+@instrumentar
+def graficos_comparativos_vendas(dict_lojas, cubo=None):
     print("\n" + "=" * 80)
     print("DASHBOARD COMPARATIVO DE VENDAS")
     print("=" * 80)
     
-    df_combinado = combinar_lojas(dict_lojas)
+    if cubo is None: cubo = construir_cubo(dict_lojas)
+    comparativo = calcular_comparativo_vendas(cubo)
 
     # Comparação anual
-    vendas_comparativas_ano = df_combinado.groupby(
-        [df_combinado["Data da Compra"].dt.year,
-         df_combinado.index.get_level_values(0)]
-        )["Preço"].sum()
-
-    df_comp_anual = vendas_comparativas_ano.unstack(level=1).fillna(0)
+    df_comp_anual = comparativo["anual"]
 
     # TABELA DE DADOS: COMPARATIVO ANUAL
     print("\n" + "-" * 50)
     print("TABELA DE DADOS: COMPARATIVO ANUAL POR LOJA")
     print("-" * 50)
     # Formata o DataFrame para exibição (aplica R$ em todas as células)
-    print(df_comp_anual.applymap(lambda x: f"R$ {x:,.2f}"))
-
-    plt.figure(figsize=(16, 8))
-    ax_comp_ano = df_comp_anual.plot(kind="bar", rot=0, figsize=(16, 8), width=0.8, ax=plt.gca())
-
-    ax_comp_ano.set_title("COMPARAÇÃO VENDAS ANUAIS - TODAS LOJAS", fontsize=20, pad=15)
-    ax_comp_ano.set_xlabel("ANO", fontsize=12)
-    ax_comp_ano.set_ylabel("VENDAS (R$)", fontsize=12)
-    ax_comp_ano.legend(title="LOJA", fontsize=12)
-    ax_comp_ano.grid(axis="y", linestyle="--")
-
-    for p in ax_comp_ano.patches:
-        ax_comp_ano.annotate(
-            f"R$ {p.get_height():,.2f}",
-            (p.get_x() + p.get_width() / 2., p.get_height()),
-            ha="center", va="center", xytext=(0, 10),
-            textcoords="offset points", fontsize=10
-        )
+    print(formatar_reais(df_comp_anual))
+    exportar_tabela(df_comp_anual, "comparativo_vendas_anuais")
 
-    plt.tight_layout()
-    plt.show()
+    exibir_grafico("grafico_comparativo_anual", "comparativo_vendas_anuais_todas_lojas", df_comp_anual)
 
     # Comparação mês/ano
-    vendas_comparativas_mes_ano = df_combinado.groupby(
-        [df_combinado["Data da Compra"].dt.to_period("M"),
-         df_combinado.index.get_level_values(0)]
-        )["Preço"].sum()
-
-    df_comp_mes_ano = vendas_comparativas_mes_ano.unstack(level=1).fillna(0)
+    df_comp_mes_ano = comparativo["mensal"]
     
     # TABELA DE DADOS: COMPARATIVO MENSAL
     print("\n" + "-" * 50)
     print("TABELA DE DADOS: COMPARATIVO MENSAL POR LOJA")
     print("-" * 50)
-    print(df_comp_mes_ano.applymap(lambda x: f"R$ {x:,.2f}"))
-
-    df_comp_mes_ano.index = df_comp_mes_ano.index.to_timestamp()
+    print(formatar_reais(df_comp_mes_ano))
+    exportar_tabela(df_comp_mes_ano, "comparativo_vendas_mensais")
 
-    plt.figure(figsize=(16, 8))
-    ax_comp_mes_ano = df_comp_mes_ano.plot(kind="line", marker="o", figsize=(16, 8), linewidth=2, ax=plt.gca())
+    df_comp_mes_ano = df_comp_mes_ano.set_axis(df_comp_mes_ano.index.to_timestamp())
 
-    ax_comp_mes_ano.set_title("COMPARAÇÃO VENDAS MENSAIS - TODAS LOJAS", fontsize=20, pad=15)
-    ax_comp_mes_ano.set_xlabel("MÊS/ANO", fontsize=12)
-    ax_comp_mes_ano.set_ylabel("VENDAS (R$)", fontsize=12)
-    ax_comp_mes_ano.legend(title="LOJA", fontsize=12)
-    ax_comp_mes_ano.grid(axis="y", linestyle="--")
+    exibir_grafico("grafico_comparativo_mensal", "comparativo_vendas_mensais_todas_lojas", df_comp_mes_ano)
 
-    plt.tight_layout()
-    plt.show()
+def calcular_vendas_por_categoria(cubo):
+    """Vendas por (Loja, Categoria) ("total") e por (Loja, Ano, Categoria) ("anual")."""
+    return {
+        "total": consultar_cubo(cubo, ["Loja", "Categoria do Produto"]),
+        "anual": consultar_cubo(cubo, ["Loja", "Ano", "Categoria do Produto"]),
+    }
 
-def relatorio_vendas_por_categoria(dict_lojas):
+@instrumentar
+def relatorio_vendas_por_categoria(dict_lojas, cubo=None):
     print("\n" + "=" * 80)
     print("ANÁLISE DE VENDAS POR CATEGORIA")
     print("=" * 80)
     
-    for nome_loja, df in dict_lojas.items():
+    if cubo is None: cubo = construir_cubo(dict_lojas)
+    vendas = calcular_vendas_por_categoria(cubo)
+    vendas_categoria_lojas, vendas_ano_categoria_lojas = vendas["total"], vendas["anual"]
+    exportar_tabela(vendas_categoria_lojas, "vendas_por_categoria_loja")
+    exportar_tabela(vendas_ano_categoria_lojas, "vendas_por_categoria_ano_loja")
+
+    for nome_loja in dict_lojas:
         print("=" * 50)
         print(f"RELATÓRIO DE VENDAS POR CATEGORIA - {nome_loja}")
         print("=" * 50)
+        if _sem_vendas(nome_loja, vendas_categoria_lojas.index.get_level_values("Loja")): continue
 
         total_vendas_categoria = (
-            df.groupby("Categoria do Produto")["Preço"]
-              .sum()
+            vendas_categoria_lojas.xs(nome_loja, level="Loja")
               .sort_values(ascending=False)
         )
 
-        vendas_ano_categoria = df.groupby([
-            df["Data da Compra"].dt.year.rename("Ano"),
-            "Categoria do Produto"
-            ])["Preço"].sum()
+        vendas_ano_categoria = vendas_ano_categoria_lojas.xs(nome_loja, level="Loja")
 
         vendas_ano_categoria = vendas_ano_categoria.sort_index(level="Ano", ascending=True)
         # Ajuste para garantir ordenação correta sem warning de level
@@ -275,73 +1892,67 @@ def relatorio_vendas_por_categoria(dict_lojas):
         print("-" * 50)
         print("TABELA DE DADOS: TOTAL POR CATEGORIA")
         print("-" * 50)
-        print(total_vendas_categoria.apply(lambda x: f"R$ {x:,.2f}"))
+        print(formatar_reais(total_vendas_categoria))
 
         # Gráfico total por categoria
-        plt.figure(figsize=(14, 5))
-        ax1 = total_vendas_categoria.plot(kind="barh", color=plt.cm.Set2.colors[0],
-                                          title=f"TOTAL VENDAS POR CATEGORIA - {nome_loja}")
-        ax1.invert_yaxis()
-        ax1.grid(axis="x", linestyle="--")
-        plt.tight_layout()
-        plt.show()
+        exibir_grafico("grafico_total_categoria_loja", f"vendas_categoria_{nome_loja}",
+                       total_vendas_categoria, nome_loja)
 
         # TABELA DE DADOS: POR CATEGORIA E ANO
         print("\n" + "-" * 50)
         print("TABELA DE DADOS: TOTAL POR CATEGORIA E ANO")
         print("-" * 50)
-        print(vendas_ano_categoria.apply(lambda x: f"R$ {x:,.2f}"))
+        print(formatar_reais(vendas_ano_categoria))
         print("\n")
 
         # Gráfico vendas anuais por categoria
-        plt.figure(figsize=(14, 5))
         df_vendas_ano_cat = vendas_ano_categoria.unstack(level="Ano", fill_value=0)
-        ax2 = df_vendas_ano_cat.plot(kind="bar", ax=plt.gca(), rot=0,
-                                     title=f"VENDAS POR CATEGORIA/ANO - {nome_loja}")
-        ax2.grid(axis="y", linestyle="--")
-        plt.tight_layout()
-        plt.show()
+        exibir_grafico("grafico_categoria_ano_loja", f"vendas_categoria_ano_{nome_loja}",
+                       df_vendas_ano_cat, nome_loja)
 
-def graficos_categorias_comparativas(dict_lojas):
+def calcular_comparativo_categorias(cubo):
+    """
+    Vendas categoria x loja ("categoria_loja") e evolução anual de cada categoria
+    por loja ("evolucao").
+    """
+    df_vendas_lojas_categoria = consultar_cubo(cubo, ["Categoria do Produto", "Loja"]).unstack(level=1).fillna(0)
+    df_vendas_lojas_categoria["Total"] = df_vendas_lojas_categoria.sum(axis=1)
+    df_vendas_lojas_categoria = df_vendas_lojas_categoria.sort_values(
+        by="Total", ascending=True
+        ).drop(columns=["Total"])
+    return {
+        "categoria_loja": df_vendas_lojas_categoria,
+        "evolucao": consultar_cubo(cubo, ["Categoria do Produto", "Ano", "Loja"]),
+    }
+
+@instrumentar
+def graficos_categorias_comparativas(dict_lojas, cubo=None):
     print("\n" + "=" * 80)
     print("COMPARATIVO DE CATEGORIAS ENTRE LOJAS")
     print("=" * 80)
     
-    df_combinado = combinar_lojas(dict_lojas)
+    if cubo is None: cubo = construir_cubo(dict_lojas)
+    comparativo = calcular_comparativo_categorias(cubo)
 
     # Total por categoria e loja
-    total_vendas_lojas_categoria = df_combinado.groupby(
-        ["Categoria do Produto", df_combinado.index.get_level_values(0)]
-    )["Preço"].sum()
-
-    df_vendas_lojas_categoria = total_vendas_lojas_categoria.unstack(level=1).fillna(0)
-    df_vendas_lojas_categoria["Total"] = df_vendas_lojas_categoria.sum(axis=1)
-    df_vendas_lojas_categoria = df_vendas_lojas_categoria.sort_values(
-        by="Total", ascending=True
-        ).drop(columns=["Total"])
+    df_vendas_lojas_categoria = comparativo["categoria_loja"]
 
     # TABELA DE DADOS: CATEGORIA x LOJA
     print("\n" + "-" * 50)
     print("TABELA DE DADOS: CATEGORIA x LOJA")
     print("-" * 50)
-    print(df_vendas_lojas_categoria.applymap(lambda x: f"R$ {x:,.2f}"))
+    print(formatar_reais(df_vendas_lojas_categoria))
+    exportar_tabela(df_vendas_lojas_categoria, "comparativo_vendas_categoria_loja")
 
-    plt.figure(figsize=(14, 8))
-    ax_categoria = df_vendas_lojas_categoria.plot(kind="bar", figsize=(14, 8), ax=plt.gca(),
-                                                  title="COMPARAÇÃO DE VENDAS TOTAIS POR CATEGORIA E LOJA")
-    ax_categoria.grid(axis="x", linestyle="--")
-    plt.tight_layout()
-    plt.show()
+    exibir_grafico("grafico_categoria_loja", "comparativo_vendas_categoria_todas_lojas", df_vendas_lojas_categoria)
 
     # Gráficos por categoria ao longo dos anos (Loops de gráficos de linha)
-    todas_categorias = df_combinado["Categoria do Produto"].dropna().unique()
+    vendas_categoria_ano_loja = comparativo["evolucao"]
+    exportar_tabela(vendas_categoria_ano_loja.unstack(level="Loja").fillna(0), "evolucao_anual_categorias")
+    todas_categorias = vendas_categoria_ano_loja.index.get_level_values("Categoria do Produto").unique()
 
     for categoria in todas_categorias:
-        df_cat = df_combinado[df_combinado["Categoria do Produto"] == categoria].copy()
-        vendas_cat_ano_loja = df_cat.groupby(
-            [df_cat["Data da Compra"].dt.year,
-             df_cat.index.get_level_values(0)]
-            )["Preço"].sum()
+        vendas_cat_ano_loja = vendas_categoria_ano_loja.xs(categoria, level="Categoria do Produto")
 
         df_cat_comp = vendas_cat_ano_loja.unstack(level=1).fillna(0)
 
@@ -349,72 +1960,70 @@ def graficos_categorias_comparativas(dict_lojas):
         print("\n" + "-" * 50)
         print(f"TABELA DE DADOS: EVOLUÇÃO ANUAL - {categoria}")
         print("-" * 50)
-        print(df_cat_comp.applymap(lambda x: f"R$ {x:,.2f}"))
-
-        plt.figure(figsize=(12, 6))
-        ax_categoria_ano = df_cat_comp.plot(kind="line", marker="o", figsize=(12, 6), ax=plt.gca())
-        ax_categoria_ano.set_title(f"VENDAS ANUAIS DA CATEGORIA {categoria}", fontsize=20)
-        ax_categoria_ano.set_xlabel("ANO", fontsize=12)
-        ax_categoria_ano.set_ylabel("VENDAS (R$)", fontsize=12)
-        ax_categoria_ano.legend(title="LOJA")
-        ax_categoria_ano.grid(axis="y", linestyle="--")
-        plt.xticks(df_cat_comp.index)
-        plt.tight_layout()
-        plt.show()
-
-def avaliacao_por_categoria(dict_lojas):
+        print(formatar_reais(df_cat_comp))
+
+        exibir_grafico("grafico_evolucao_categoria", f"comparativo_vendas_{categoria}_todas_lojas",
+                       df_cat_comp, categoria)
+
+def calcular_avaliacao_por_categoria(cubo):
+    """Avaliação média por (Loja, Categoria)."""
+    return consultar_cubo(cubo, ["Loja", "Categoria do Produto"], coluna="Avaliação da compra", medida="media")
+
+@instrumentar
+def avaliacao_por_categoria(dict_lojas, cubo=None):
     print("\n" + "#" * 80)
     print("ANÁLISE DE AVALIAÇÕES (NPS/CSAT)")
     print("#" * 80)
-    for nome_loja, df in dict_lojas.items():
+    if cubo is None: cubo = construir_cubo(dict_lojas)
+    media_cat_lojas = calcular_avaliacao_por_categoria(cubo)
+    exportar_tabela(media_cat_lojas, "avaliacao_por_categoria_loja")
+    for nome_loja in dict_lojas:
         print("=" * 80)
         print(f"RELATÓRIO DE AVALIAÇÕES POR CATEGORIA - {nome_loja}")
         print("=" * 80)
-        media_cat = round(
-            df.groupby("Categoria do Produto")["Avaliação da compra"].mean(), 2
-            )
+        if _sem_vendas(nome_loja, media_cat_lojas.index.get_level_values("Loja")): continue
+        media_cat = round(media_cat_lojas.xs(nome_loja, level="Loja"), 2)
         print(f"MÉDIA DA AVALIAÇÃO POR CATEGORIA:\n{media_cat}\n")
 
-def avaliacao_comparativa_categorias(dict_lojas):
-    df_combinado = combinar_lojas(dict_lojas)
-
-    media_avaliacao_loja_categoria = df_combinado.groupby(
-        ["Categoria do Produto", df_combinado.index.get_level_values(0)]
-        )["Avaliação da compra"].mean()
+def calcular_comparativo_avaliacao(cubo):
+    """Avaliação média categoria x loja, ordenada pela maior média da categoria."""
+    media_avaliacao_loja_categoria = consultar_cubo(
+        cubo, ["Categoria do Produto", "Loja"], coluna="Avaliação da compra", medida="media"
+        )
 
     df_avaliacao_lojas_categoria = media_avaliacao_loja_categoria.unstack(level=1).fillna(0)
     df_avaliacao_lojas_categoria["Média Máxima"] = df_avaliacao_lojas_categoria.max(axis=1)
-    df_avaliacao_lojas_categoria = df_avaliacao_lojas_categoria.sort_values(
+    return df_avaliacao_lojas_categoria.sort_values(
         by="Média Máxima", ascending=True
         ).drop(columns=["Média Máxima"])
 
+@instrumentar
+def avaliacao_comparativa_categorias(dict_lojas, cubo=None):
+    if cubo is None: cubo = construir_cubo(dict_lojas)
+
+    df_avaliacao_lojas_categoria = calcular_comparativo_avaliacao(cubo)
+
     # TABELA DE DADOS: AVALIAÇÃO COMPARATIVA
     print("\n" + "-" * 50)
     print("TABELA DE DADOS: AVALIAÇÃO MÉDIA (CATEGORIA x LOJA)")
     print("-" * 50)
     print(df_avaliacao_lojas_categoria.round(2))
+    exportar_tabela(df_avaliacao_lojas_categoria, "comparativo_avaliacao_categoria_loja")
 
-    plt.figure(figsize=(14, 8))
-    ax = df_avaliacao_lojas_categoria.plot(kind="bar", figsize=(14, 8), ax=plt.gca(),
-                                           title="COMPARAÇÃO DE AVALIAÇÕES POR CATEGORIA E LOJA")
+    exibir_grafico("grafico_avaliacao_categoria_loja", "comparativo_avaliacao_categoria_todas_lojas",
+                   df_avaliacao_lojas_categoria)
 
-    for p in ax.patches:
-        valor_rotulo = f"{p.get_height():.2f}"
-        ax.annotate(valor_rotulo,
-                    (p.get_x() + p.get_width() / 2., p.get_height()),
-                    ha="center", va="center", xytext=(0, 10),
-                    textcoords="offset points", fontsize=6)
+def calcular_avaliacao_geral(cubo):
+    """Avaliação média de cada loja, da maior para a menor."""
+    return consultar_cubo(
+        cubo, ["Loja"], coluna="Avaliação da compra", medida="media"
+        ).sort_values(ascending=False)
 
-    ax.grid(axis="y", linestyle="--")
-    plt.tight_layout()
-    plt.show()
+@instrumentar
+def avaliacao_geral_por_loja(dict_lojas, cubo=None):
+    if cubo is None: cubo = construir_cubo(dict_lojas)
 
-def avaliacao_geral_por_loja(dict_lojas):
-    df_combinado = combinar_lojas(dict_lojas)
-
-    media_avaliacao_loja = df_combinado.groupby(
-        df_combinado.index.get_level_values(0)
-        )["Avaliação da compra"].mean().sort_values(ascending=False)
+    media_avaliacao_loja = calcular_avaliacao_geral(cubo)
 
     print("\n" + "#" * 80)
     print("AVALIAÇÃO GERAL POR LOJA")
@@ -426,46 +2035,162 @@ def avaliacao_geral_por_loja(dict_lojas):
     print("-" * 50)
     for loja, media in media_avaliacao_loja.items():
         print(f"{loja}: {media:.2f}")
+    exportar_tabela(media_avaliacao_loja, "avaliacao_geral_por_loja")
 
-    plt.figure(figsize=(10, 6))
-    ax = media_avaliacao_loja.plot(kind="bar", ax=plt.gca(), rot=0, color="teal",
-                                   title="MÉDIA DE AVALIAÇÃO GERAL POR LOJA")
-
-    for p in ax.patches:
-        valor_rotulo = f"{p.get_height():.2f}"
-        ax.annotate(valor_rotulo,
-                    (p.get_x() + p.get_width() / 2., p.get_height()),
-                    ha="center", va="center", xytext=(0, 10),
-                    textcoords="offset points", fontsize=8)
+    exibir_grafico("grafico_barras_por_loja", "media_avaliacao_geral_todas_lojas", media_avaliacao_loja,
+                   "MÉDIA DE AVALIAÇÃO GERAL POR LOJA", "{:.2f}")
 
-    ax.grid(axis="y", linestyle="--")
-    plt.tight_layout()
-    plt.show()
+def selecionar_top_k(contagem, k, maiores=True):
+    """
+    Os k maiores (ou menores) valores de uma Series por np.argpartition, em ordem decrescente;
+    empates no corte são desfeitos pelo rótulo.
+    """
+    if k <= 0: return contagem.iloc[:0]
+    valores = contagem.to_numpy()
+    chave = -valores if maiores else valores
+    escolhidos = np.arange(len(valores))
+    if k < len(valores):
+        escolhidos = np.argpartition(chave, k - 1)[:k]
+        corte = chave[escolhidos].max()
+        # As vagas que sobram após os valores acima do corte vão para os empatados de menor rótulo
+        dentro = escolhidos[chave[escolhidos] < corte]
+        empatados = np.flatnonzero(chave == corte)
+        vagas = k - len(dentro)
+        if vagas < len(empatados):
+            rotulos = contagem.index[empatados].to_numpy().astype(str)
+            empatados = empatados[np.argpartition(rotulos, vagas - 1)[:vagas]]
+        escolhidos = np.concatenate([dentro, empatados])
+    ordem = np.lexsort((contagem.index[escolhidos].to_numpy().astype(str), -valores[escolhidos]))
+    return contagem.iloc[escolhidos[ordem]]
+
+class SketchHeavyHitters:
+    """
+    Resumo Misra-Gries mesclável com até `capacidade` contadores: cada estimativa fica entre
+    a contagem real menos `erro` e a contagem real, com erro <= total / (capacidade + 1).
+    """
+    def __init__(self, capacidade=1000):
+        self.capacidade = capacidade
+        self.contadores = pd.Series(dtype="int64")
+        self.total = 0
+        self.erro = 0
+
+    def atualizar(self, valores):
+        """Acrescenta um bloco de itens (ex.: a coluna Produto de um bloco do CSV)."""
+        contagem = pd.Series(valores).value_counts(sort=False)
+        self._combinar(contagem, int(contagem.sum()), 0)
+        return self
+
+    def mesclar(self, outro):
+        """Incorpora outro sketch (de outra loja, bloco ou processo)."""
+        self._combinar(outro.contadores, outro.total, outro.erro)
+        return self
+
+    def _combinar(self, contadores, total, erro):
+        somados = self.contadores.add(contadores, fill_value=0)
+        self.total += total
+        self.erro += erro
+        if len(somados) > self.capacidade:
+            # Subtrai o (capacidade+1)-ésimo maior contador e descarta os que zeram
+            valores = somados.to_numpy()
+            corte = np.partition(valores, len(valores) - self.capacidade - 1)[len(valores) - self.capacidade - 1]
+            somados = somados[somados > corte] - corte
+            self.erro += int(corte)
+        self.contadores = somados.astype("int64")
+
+    def top(self, k):
+        """
+        Os k itens mais frequentes com os limites da contagem real.
+        """
+        estimativa = selecionar_top_k(self.contadores, k)
+        return pd.DataFrame({
+            "Contagem (mín.)": estimativa,
+            "Contagem (máx.)": estimativa + self.erro,
+        })
+
+def calcular_top_produtos(contagem_produtos, lojas, top=10):
+    """
+    Top-k produtos mais ("mais") e menos ("menos") vendidos de cada loja a
+    partir de contar_produtos: {"mais": {loja: Series}, "menos": {loja: Series}}.
+    """
+    lojas_contagem = contagem_produtos.index.get_level_values("Loja")
+    mais_vendidos, menos_vendidos = {}, {}
+    for nome_loja in lojas:
+        qtd_venda_produto = (
+            contagem_produtos[lojas_contagem == nome_loja]
+              .droplevel("Loja")
+              .rename("Produto")
+            )
+        mais_vendidos[nome_loja] = selecionar_top_k(qtd_venda_produto, top)
+        menos_vendidos[nome_loja] = selecionar_top_k(qtd_venda_produto, top, maiores=False)
+    return {"mais": mais_vendidos, "menos": menos_vendidos}
 
-def produtos_mais_menos_vendidos(dict_lojas, top=10):
+@instrumentar
+def produtos_mais_menos_vendidos(dict_lojas, top=10, contagem_produtos=None, sketches_produtos=None):
+    """
+    Top-k produtos mais e menos vendidos por loja, sem ordenar o catálogo inteiro.
+    Com `sketches_produtos`, mostra os mais vendidos aproximados, com limites de erro.
+    """
     print("\n" + "#" * 80)
     print("PRODUTOS MAIS E MENOS VENDIDOS (POR LOJA)")
     print("#" * 80)
-    for nome_loja, df in dict_lojas.items():
+    if sketches_produtos is not None:
+        _produtos_mais_vendidos_aproximado(sketches_produtos, top)
+        return
+
+    if contagem_produtos is None: contagem_produtos = contar_produtos(dict_lojas)
+    tops = calcular_top_produtos(contagem_produtos, dict_lojas, top)
+    mais_vendidos, menos_vendidos = tops["mais"], tops["menos"]
+    for nome_loja in dict_lojas:
         print("=" * 80)
         print(f"PRODUTOS MAIS E MENOS VENDIDOS - {nome_loja}")
         print("=" * 80)
-        qtd_venda_produto = (
-            df.groupby("Produto")["Produto"]
-              .count()
-              .sort_values(ascending=False)
-            )
+        if _sem_vendas(nome_loja, contagem_produtos.index.get_level_values("Loja")): continue
         print("TOP MAIS VENDIDOS:")
-        print(qtd_venda_produto.head(top), "\n")
+        print(mais_vendidos[nome_loja], "\n")
         print("TOP MENOS VENDIDOS:")
-        print(qtd_venda_produto.tail(top), "\n")
+        print(menos_vendidos[nome_loja], "\n")
 
-def frete_medio_por_loja(dict_lojas):
-    df_combinado = combinar_lojas(dict_lojas)
+    if mais_vendidos:
+        exportar_tabela(pd.concat(mais_vendidos, names=["Loja"]).rename("Quantidade"), "produtos_mais_vendidos")
+        exportar_tabela(pd.concat(menos_vendidos, names=["Loja"]).rename("Quantidade"), "produtos_menos_vendidos")
 
-    media_custo_frete_loja = df_combinado.groupby(
-        df_combinado.index.get_level_values(0)
-        )["Frete"].mean().sort_values(ascending=False)
+def _produtos_mais_vendidos_aproximado(sketches_produtos, top):
+    mesclado = None
+    tops = {}
+    for nome_loja, sketch in sketches_produtos.items():
+        print("=" * 80)
+        print(f"PRODUTOS MAIS VENDIDOS (APROXIMADO) - {nome_loja}")
+        print("=" * 80)
+        print(f"Vendas: {sketch.total:,} | erro máximo por produto: {sketch.erro:,}")
+        tops[nome_loja] = sketch.top(top)
+        print(tops[nome_loja], "\n")
+        if mesclado is None:
+            mesclado = SketchHeavyHitters(sketch.capacidade)
+        mesclado.mesclar(sketch)
+
+    if mesclado is not None and len(sketches_produtos) > 1:
+        print("=" * 80)
+        print("PRODUTOS MAIS VENDIDOS (APROXIMADO) - TODAS AS LOJAS")
+        print("=" * 80)
+        print(f"Vendas: {mesclado.total:,} | erro máximo por produto: {mesclado.erro:,}")
+        tops["Todas as lojas"] = mesclado.top(top)
+        print(tops["Todas as lojas"], "\n")
+    if tops:
+        exportar_tabela(pd.concat(tops, names=["Loja"]), "produtos_mais_vendidos_aproximado")
+    print("Obs.: no modo aproximado os menos vendidos não são estimados "
+          "(o sketch só garante os itens frequentes).\n")
+
+def calcular_frete_medio(cubo):
+    """Frete médio de cada loja, do maior para o menor."""
+    return consultar_cubo(
+        cubo, ["Loja"], coluna="Frete", medida="media"
+        ).sort_values(ascending=False)
+
+@instrumentar
+def frete_medio_por_loja(dict_lojas, cubo=None):
+    if cubo is None: cubo = construir_cubo(dict_lojas)
+
+    media_custo_frete_loja = calcular_frete_medio(cubo)
 
     print("\n" + "#" * 80)
     print("FRETE MÉDIO POR LOJA")
@@ -475,121 +2200,675 @@ def frete_medio_por_loja(dict_lojas):
     print("-" * 50)
     print("TABELA DE DADOS: CUSTO MÉDIO DE FRETE")
     print("-" * 50)
-    for nome_loja, df in dict_lojas.items():
-        media = df["Frete"].mean()
+    for nome_loja in dict_lojas:
+        if nome_loja not in media_custo_frete_loja.index:
+            print(f"{nome_loja}: sem vendas nos filtros selecionados")
+            continue
+        media = media_custo_frete_loja[nome_loja]
         print(f"{nome_loja}: R$ {media:,.2f}")
+    exportar_tabela(media_custo_frete_loja, "frete_medio_por_loja")
+
+    exibir_grafico("grafico_barras_por_loja", "frete_medio_todas_lojas", media_custo_frete_loja,
+                   "MÉDIA DE CUSTO DE FRETE POR LOJA (R$)", "R$ {:.2f}")
+
+FORMATOS_DISTRIBUICAO = {"Preço": "R$ {:,.2f}", "Frete": "R$ {:,.2f}", "Avaliação da compra": "{:.2f}"}
+
+@instrumentar
+def relatorio_distribuicoes(dict_lojas, distribuicao=None, quantis=QUANTIS_DISTRIBUICAO, n_faixas=10):
+    """
+    Percentis e histogramas de Preço, Frete e Avaliação da compra por loja, por categoria
+    e de todas as lojas juntas, a partir do sketch mesclável.
+    """
+    if distribuicao is None: distribuicao = construir_distribuicao(dict_lojas)
+
+    print("\n" + "#" * 80)
+    print("DISTRIBUIÇÃO DE PREÇO, FRETE E AVALIAÇÃO (PERCENTIS E HISTOGRAMAS)")
+    print("#" * 80)
+
+    por_loja = calcular_percentis(distribuicao, ["Loja"], quantis)
+    por_categoria = calcular_percentis(distribuicao, ["Categoria do Produto"], quantis)
+    geral = calcular_percentis(distribuicao, (), quantis)
+    exportar_tabela(por_loja, "percentis_por_loja")
+    exportar_tabela(por_categoria, "percentis_por_categoria")
+    exportar_tabela(calcular_percentis(distribuicao, ["Loja", "Categoria do Produto"], quantis),
+                    "percentis_loja_categoria")
+
+    histogramas = {}
+    for coluna in [coluna for coluna in COLUNAS_DISTRIBUICAO if coluna in geral.index]:
+        formato = FORMATOS_DISTRIBUICAO[coluna]
+        formatos = {percentil: formato.format for percentil in geral.columns}
+        formatos["Vendas"] = "{:,.0f}".format
+        todas = geral.loc[[coluna]].set_axis(["Todas as lojas"])
+
+        # TABELA DE DADOS: PERCENTIS POR LOJA
+        print("-" * 50)
+        print(f"TABELA DE DADOS: PERCENTIS DE {coluna.upper()} POR LOJA")
+        print("-" * 50)
+        lojas_coluna = por_loja.xs(coluna, level="Coluna")
+        if len(lojas_coluna) > LIMITE_LOJAS_DETALHADAS:
+            print(todas.to_string(formatters=formatos))
+            print(f"({len(lojas_coluna)} lojas: percentis de cada loja em percentis_por_loja.)")
+        else:
+            print(pd.concat([lojas_coluna, todas]).to_string(formatters=formatos))
+
+        # TABELA DE DADOS: PERCENTIS POR CATEGORIA
+        print(f"\nTABELA DE DADOS: PERCENTIS DE {coluna.upper()} POR CATEGORIA")
+        print(por_categoria.xs(coluna, level="Coluna").to_string(formatters=formatos))
+
+        # TABELA DE DADOS: HISTOGRAMA
+        histogramas[coluna] = calcular_histograma(distribuicao, coluna, ["Loja"], n_faixas)
+        total = histogramas[coluna].groupby(level="Faixa", observed=False).sum()
+        print(f"\nTABELA DE DADOS: HISTOGRAMA DE {coluna.upper()} (TODAS AS LOJAS)")
+        print(pd.DataFrame({"Vendas": total, "Participação": total / total.sum()}).to_string(
+            formatters={"Vendas": "{:,.0f}".format, "Participação": "{:.1%}".format}))
+        print()
+
+        exibir_grafico("grafico_histograma_distribuicao", f"distribuicao_{coluna}", total,
+                       geral.loc[coluna].drop("Vendas"), f"DISTRIBUIÇÃO DE {coluna.upper()} - TODAS AS LOJAS",
+                       formato)
+
+    if histogramas:
+        exportar_tabela(pd.concat(histogramas, names=["Coluna"]), "histogramas_por_loja")
+
+def calcular_series_temporais(serie, janela=30):
+    """
+    Séries por loja de uma SerieDiaria (diária, média móvel, acumulada, mensal e crescimento)
+    e o crescimento ano a ano de cada categoria.
+    """
+    por_loja = serie.agrupar("Loja")
+    return {
+        "diaria": por_loja.diaria(),
+        "media_movel": por_loja.janela_movel(janela, medida="media"),
+        "acumulada": por_loja.acumulada(),
+        "mensal": por_loja.mensal(),
+        "crescimento_mensal": por_loja.crescimento(1),
+        "crescimento_anual": por_loja.crescimento(12),
+        "crescimento_anual_categoria": serie.agrupar("Categoria do Produto").crescimento(12),
+    }
+
+def _formatar_percentual(valor):
+    return "-" if pd.isna(valor) else f"{valor:+.1%}"
+
+@instrumentar
+def relatorio_series_temporais(dict_lojas, serie=None, janela=30, meses=12):
+    """
+    Receita acumulada, média móvel de `janela` dias e crescimento mês a mês e
+    ano a ano dos últimos `meses` meses de cada loja, a partir da SerieDiaria.
+    """
+    print("\n" + "=" * 80)
+    print("SÉRIES TEMPORAIS DE VENDAS (MÉDIA MÓVEL, CRESCIMENTO E ACUMULADO)")
+    print("=" * 80)
+
+    if serie is None: serie = construir_serie_diaria(dict_lojas)
+    if serie is None:
+        print("Sem vendas com data válida.\n")
+        return
+    series = calcular_series_temporais(serie, janela)
+    for nome, tabela in series.items():
+        exportar_tabela(tabela, f"serie_{nome}" if nome.endswith("categoria") else f"serie_{nome}_por_loja")
+
+    # TABELA DE DADOS: POSIÇÃO NO ÚLTIMO DIA
+    ultimo_dia = series["diaria"].index[-1]
+    print("\n" + "-" * 50)
+    print(f"TABELA DE DADOS: ACUMULADO E MÉDIA MÓVEL DE {janela} DIAS ({ultimo_dia:%d/%m/%Y})")
+    print("-" * 50)
+    print(formatar_reais(pd.DataFrame({
+        "Receita acumulada": series["acumulada"].iloc[-1],
+        f"Média diária ({janela} dias)": series["media_movel"].iloc[-1],
+    })))
+
+    for nome_loja in series["mensal"].columns:
+        # TABELA DE DADOS: CRESCIMENTO MENSAL E ANUAL
+        print("\n" + "-" * 50)
+        print(f"TABELA DE DADOS: CRESCIMENTO - {nome_loja} (ÚLTIMOS {meses} MESES)")
+        print("-" * 50)
+        tabela = pd.DataFrame({
+            "Receita": formatar_reais(series["mensal"][nome_loja]),
+            "Mês a mês": series["crescimento_mensal"][nome_loja],
+            "Ano a ano": series["crescimento_anual"][nome_loja],
+        }).tail(meses)
+        print(tabela.to_string(formatters={"Mês a mês": _formatar_percentual, "Ano a ano": _formatar_percentual}))
+
+    # TABELA DE DADOS: CATEGORIAS NO ÚLTIMO MÊS
+    crescimento_categoria = series["crescimento_anual_categoria"].iloc[-1].sort_values(ascending=False)
+    print("\n" + "-" * 50)
+    print(f"TABELA DE DADOS: CRESCIMENTO ANO A ANO POR CATEGORIA ({crescimento_categoria.name})")
+    print("-" * 50)
+    for categoria, valor in crescimento_categoria.items():
+        print(f"{categoria}: {_formatar_percentual(valor)}")
+    print()
+
+    exibir_grafico("grafico_media_movel_lojas", f"media_movel_{janela}_dias_todas_lojas",
+                   series["media_movel"], janela)
+
+# ------------------------------------------------------------------------------
+# Modo multilojas: métricas de todas as lojas de uma vez e resumos ranqueados
+# ------------------------------------------------------------------------------
 
-    plt.figure(figsize=(10, 6))
-    ax = media_custo_frete_loja.plot(kind="bar", ax=plt.gca(), rot=0, color="teal",
-                                     title="MÉDIA DE CUSTO DE FRETE POR LOJA (R$)")
+# Acima deste número de lojas, os relatórios com uma seção por loja dão lugar ao resumo multilojas
+LIMITE_LOJAS_DETALHADAS = int(os.environ.get("ALURA_STORE_LIMITE_LOJAS_DETALHADAS", "20"))
 
-    for p in ax.patches:
-        valor_rotulo = f"R$ {p.get_height():.2f}"
-        ax.annotate(valor_rotulo,
-                    (p.get_x() + p.get_width() / 2., p.get_height()),
-                    ha="center", va="center", xytext=(0, 10),
-                    textcoords="offset points", fontsize=8)
+RELATORIOS_POR_LOJA = ("vendas", "categorias", "avaliacao_categorias", "produtos")
 
-    ax.grid(axis="y", linestyle="--")
-    plt.tight_layout()
-    plt.show()
+# Fora da execução padrão: só com --relatorios, --multilojas ou acima de LIMITE_LOJAS_DETALHADAS lojas
+RELATORIOS_SOB_DEMANDA = ("multilojas",)
+
+# Limite do z-score robusto (mediana e MAD) acima do qual a loja é um outlier
+LIMITE_OUTLIER = 3.5
+
+FORMATOS_METRICAS = {
+    "Faturamento": "R$ {:,.2f}".format,
+    "Vendas": "{:,.0f}".format,
+    "Ticket médio": "R$ {:,.2f}".format,
+    "Frete médio": "R$ {:,.2f}".format,
+    "Avaliação média": "{:.2f}".format,
+    "Crescimento anual": _formatar_percentual,
+}
+
+def _lider_por_loja(valores):
+    """
+    Rótulo do maior valor de cada loja em uma Series indexada por (Loja, rótulo),
+    com empate decidido pelo menor rótulo, sem laço por loja.
+    """
+    maximos = valores.groupby(level=0, observed=True).transform("max")
+    candidatos = valores.index[(valores == maximos).to_numpy()]
+    codigos, rotulos = pd.factorize(candidatos.get_level_values(1), sort=True, use_na_sentinel=False)
+    menores = pd.Series(codigos, index=candidatos.get_level_values(0)).groupby(level=0, observed=True).min()
+    return pd.Series(rotulos[menores.to_numpy()], index=menores.index)
+
+def calcular_metricas_lojas(cubo, contagem_produtos=None):
+    """
+    Uma linha por loja com faturamento, vendas, ticket médio, frete, avaliação, crescimento e líderes,
+    calculadas para todas as lojas de uma vez. Métricas de colunas não carregadas ficam de fora.
+    """
+    por_loja = cubo.groupby(level="Loja", observed=True).sum()
+    colunas = cubo.columns.get_level_values(0)
+    metricas = pd.DataFrame(index=por_loja.index)
+    if "Preço" in colunas:
+        metricas["Faturamento"] = por_loja[("Preço", "sum")] / ESCALA_SOMAS
+        metricas["Vendas"] = por_loja[("Preço", "count")]
+        metricas["Ticket médio"] = metricas["Faturamento"] / metricas["Vendas"]
+    if "Frete" in colunas:
+        metricas["Frete médio"] = por_loja[("Frete", "sum")] / ESCALA_SOMAS / por_loja[("Frete", "count")]
+    if "Avaliação da compra" in colunas:
+        metricas["Avaliação média"] = (por_loja[("Avaliação da compra", "sum")] / ESCALA_SOMAS
+                                       / por_loja[("Avaliação da compra", "count")])
+    if "Preço" in colunas:
+        precos = cubo[("Preço", "sum")]
+        anos = precos.index.get_level_values("Ano").to_numpy(dtype=np.float64, na_value=np.nan)
+        meses = precos.index.get_level_values("Mês").to_numpy(dtype=np.float64, na_value=np.nan)
+        if np.isfinite(anos).any():
+            ultimo_ano = np.nanmax(anos)
+            ultimo_mes = np.nanmax(meses[anos == ultimo_ano])
+            ate_o_mes = meses <= ultimo_mes
+            atual = precos[(anos == ultimo_ano) & ate_o_mes].groupby(level="Loja", observed=True).sum()
+            anterior = precos[(anos == ultimo_ano - 1) & ate_o_mes].groupby(level="Loja", observed=True).sum()
+            if len(anterior):
+                crescimento = atual.reindex(metricas.index, fill_value=0) / anterior.where(anterior != 0) - 1
+                metricas["Crescimento anual"] = crescimento.reindex(metricas.index)
+                metricas.attrs["periodo_crescimento"] = (f"{int(ultimo_ano)} x {int(ultimo_ano) - 1}, "
+                                                         f"meses 1 a {int(ultimo_mes)}")
+        categorias = consultar_cubo(cubo, ["Loja", "Categoria do Produto"])
+        if len(categorias):
+            metricas["Categoria líder"] = _lider_por_loja(categorias).reindex(metricas.index)
+    if contagem_produtos is not None and len(contagem_produtos):
+        metricas["Produto mais vendido"] = _lider_por_loja(contagem_produtos).reindex(metricas.index)
+    return metricas
+
+def calcular_ranking_lojas(metricas, n=5):
+    """
+    As `n` lojas com os maiores e os `n` com os menores valores de cada métrica numérica
+    (nlargest/nsmallest, sem ordenar todas as lojas).
+    """
+    partes = []
+    for metrica in metricas.select_dtypes("number").columns:
+        valores = metricas[metrica].dropna()
+        for grupo, selecao in (("maiores", valores.nlargest(n)), ("menores", valores.nsmallest(n))):
+            partes.append(pd.DataFrame({"Métrica": metrica, "Grupo": grupo, "Posição": range(1, len(selecao) + 1),
+                                        "Loja": selecao.index, "Valor": selecao.to_numpy()}))
+    if not partes:
+        return pd.DataFrame(columns=["Métrica", "Grupo", "Posição", "Loja", "Valor"])
+    return pd.concat(partes, ignore_index=True)
+
+def detectar_outliers_lojas(metricas, limite=LIMITE_OUTLIER):
+    """
+    Lojas fora do padrão em cada métrica pelo z-score robusto (mediana e MAD).
+    Retorna (Loja, Métrica, Valor, Z robusto), do mais extremo para o menos extremo.
+    """
+    numericas = metricas.select_dtypes("number")
+    mediana = numericas.median()
+    mad = (numericas - mediana).abs().median() * 1.4826
+    z = ((numericas - mediana) / mad.where(mad > 0)).stack()
+    z = z[z.abs() > limite]
+    outliers = pd.DataFrame({
+        "Loja": z.index.get_level_values(0),
+        "Métrica": z.index.get_level_values(1),
+        "Valor": numericas.stack()[z.index].to_numpy(),
+        "Z robusto": z.to_numpy(),
+    })
+    return outliers.iloc[np.argsort(-outliers["Z robusto"].abs().to_numpy(), kind="stable")].reset_index(drop=True)
+
+@instrumentar
+def relatorio_multilojas(dict_lojas, cubo=None, contagem_produtos=None, n=5):
+    """
+    Resumo ranqueado de todas as lojas: as `n` de maior faturamento, as `n` maiores e menores
+    em cada métrica e as lojas outliers.
+    """
+    print("\n" + "#" * 80)
+    print("RESUMO MULTILOJAS (RANKING DE LOJAS E OUTLIERS)")
+    print("#" * 80)
+
+    if cubo is None: cubo = construir_cubo(dict_lojas)
+    metricas = calcular_metricas_lojas(cubo, contagem_produtos)
+    ranking = calcular_ranking_lojas(metricas, n)
+    outliers = detectar_outliers_lojas(metricas)
+    exportar_tabela(metricas, "metricas_por_loja")
+    exportar_tabela(ranking, "ranking_lojas")
+    exportar_tabela(outliers, "outliers_lojas")
+    formatos = {metrica: formato for metrica, formato in FORMATOS_METRICAS.items() if metrica in metricas.columns}
+
+    # TABELA DE DADOS: LOJAS DE MAIOR FATURAMENTO
+    if "Faturamento" in metricas.columns:
+        print("-" * 50)
+        print(f"TABELA DE DADOS: {n} LOJAS DE MAIOR FATURAMENTO (DE {len(metricas)})")
+        print("-" * 50)
+        print(metricas.nlargest(n, "Faturamento").to_string(formatters=formatos))
+
+    # TABELA DE DADOS: MAIORES E MENORES POR MÉTRICA
+    for metrica, grupos in ranking.groupby("Métrica", sort=False):
+        titulo = metrica
+        if metrica == "Crescimento anual":
+            titulo = f"{metrica} ({metricas.attrs['periodo_crescimento']})"
+        print("\n" + "-" * 50)
+        print(f"TABELA DE DADOS: {titulo.upper()} - MAIORES E MENORES")
+        print("-" * 50)
+        formato = FORMATOS_METRICAS.get(metrica, "{:,.2f}".format)
+        rotulos = grupos["Loja"].astype(str) + " (" + grupos["Valor"].map(formato) + ")"
+        tabela = pd.DataFrame({grupo.capitalize(): rotulos[grupos["Grupo"] == grupo].to_numpy()
+                               for grupo in ("maiores", "menores")},
+                              index=pd.RangeIndex(1, len(grupos) // 2 + 1, name="Posição"))
+        print(tabela.to_string())
+
+    # TABELA DE DADOS: OUTLIERS
+    print("\n" + "-" * 50)
+    print(f"TABELA DE DADOS: LOJAS OUTLIERS (Z ROBUSTO > {LIMITE_OUTLIER})")
+    print("-" * 50)
+    if outliers.empty:
+        print("Nenhuma loja fora do padrão.")
+    else:
+        print(outliers.head(20).to_string(index=False, formatters={
+            "Valor": "{:,.2f}".format, "Z robusto": "{:+.1f}".format}))
+        if len(outliers) > 20:
+            print(f"... e mais {len(outliers) - 20} (tabela completa em outliers_lojas).")
+    print()
+
+    if "Faturamento" in metricas.columns:
+        extremos = ranking[ranking["Métrica"] == "Faturamento"].drop_duplicates("Loja")
+        extremos = extremos.sort_values("Valor", ascending=False).set_index("Loja")["Valor"]
+        exibir_grafico("grafico_barras_por_loja", "faturamento_maiores_menores_lojas", extremos,
+                       f"FATURAMENTO: {n} MAIORES E {n} MENORES LOJAS", "R$ {:,.0f}")
+
+def aplicar_modo_multilojas(nomes, n_lojas, multilojas=None):
+    """
+    Com `multilojas=True` (ou None e mais de LIMITE_LOJAS_DETALHADAS lojas), troca os relatórios
+    com uma seção por loja pelo relatório "multilojas".
+    """
+    if multilojas is None:
+        multilojas = n_lojas > LIMITE_LOJAS_DETALHADAS
+    substituidos = [nome for nome in nomes if nome in RELATORIOS_POR_LOJA]
+    if not multilojas or not substituidos:
+        return nomes
+    print(f"Modo multilojas ({n_lojas} lojas): {', '.join(substituidos)} "
+          f"substituído(s) pelo resumo ranqueado (multilojas).")
+    return list(dict.fromkeys("multilojas" if nome in RELATORIOS_POR_LOJA else nome for nome in nomes))
 
 # ==============================================================================
 # 3. ANÁLISE GEOGRÁFICA
 # ==============================================================================
 
-def analise_geografica_clientes(dict_lojas):
+def construir_indices_espaciais(dict_lojas, tamanho_celula=0.5):
+    """
+    Índice espacial reutilizável por loja: {nome_loja: IndiceEspacial}.
+    Ex.: df.iloc[indices["Loja 1"].consultar_raio(-23.55, -46.63, 50)]
+    """
+    return {nome_loja: IndiceEspacial(df["lat"], df["lon"], tamanho_celula)
+            for nome_loja, df in dict_lojas.items()}
+
+def calcular_densidade_geografica(dict_lojas, tamanho_celula=TAMANHO_CELULA_GEO, tipo_celula="grade"):
+    """
+    Pedidos de cada loja agregados em células, com o percentual sobre os pedidos com GPS.
+    Lojas sem nenhum ponto GPS válido ficam de fora.
+    """
+    celulas_lojas = {}
+    for nome_loja, df in dict_lojas.items():
+        lat = df['lat'].to_numpy(dtype=np.float64)
+        lon = df['lon'].to_numpy(dtype=np.float64)
+        validos = ~(np.isnan(lat) | np.isnan(lon))
+        if not validos.any():
+            continue
+        geo_agrupado = agregar_celulas(lat[validos], lon[validos], tamanho_celula, tipo_celula)
+        geo_agrupado['percentual'] = (geo_agrupado['contagem'] / int(validos.sum())) * 100
+        celulas_lojas[nome_loja] = geo_agrupado
+    return celulas_lojas
+
+@instrumentar
+def analise_geografica_clientes(dict_lojas, tamanho_celula=TAMANHO_CELULA_GEO, tipo_celula="grade",
+                                celulas_lojas=None):
     """
     Gera um gráfico de dispersão (Scatter Plot) onde o tamanho do ponto
-    indica a frequência RELATIVA (percentual) de pedidos naquele local.
+    indica a frequência RELATIVA (percentual) de pedidos em cada célula (grade ou hexágono).
     """
     print("\n" + "=" * 80)
     print("ANÁLISE GEOGRÁFICA DE PEDIDOS (DENSIDADE POR PERCENTUAL)")
     print("=" * 80)
     
-    plt.figure(figsize=(12, 10))
-    cores = plt.cm.tab10.colors 
+    pontos_lojas = []
+    top_locais_lojas = {}
     
     # TABELA DE DADOS: GEOGRÁFICA (Top 5 Locais por Loja)
     print("\n" + "-" * 50)
     print("TABELA DE DADOS: TOP 5 LOCAIS COM MAIOR CONCENTRAÇÃO (%)")
     print("-" * 50)
 
-    for i, (nome_loja, df) in enumerate(dict_lojas.items()):
-        df_geo = df.dropna(subset=['lat', 'lon'])
-        
-        if df_geo.empty:
+    # Pedidos agregados em células, com o percentual de cada célula no total da loja
+    if celulas_lojas is None:
+        celulas_lojas = calcular_densidade_geografica(dict_lojas, tamanho_celula, tipo_celula)
+
+    for i, nome_loja in enumerate(dict_lojas):
+        if nome_loja not in celulas_lojas:
             print(f"Sem dados de GPS válidos para {nome_loja}")
             continue
-            
-        # 1. Agrupa por coordenadas para contar a frequência
-        geo_agrupado = df_geo.groupby(['lat', 'lon']).size().reset_index(name='contagem')
-        
-        # 2. Calcula o percentual representativo de cada ponto em relação ao total da loja
-        total_pedidos_loja = len(df_geo)
-        geo_agrupado['percentual'] = (geo_agrupado['contagem'] / total_pedidos_loja) * 100
+        geo_agrupado = celulas_lojas[nome_loja]
+        total_pedidos_loja = int(geo_agrupado['contagem'].sum())
         
-        # Imprime os Top 5 locais
-        top_locais = geo_agrupado.sort_values(by='percentual', ascending=False).head(5)
+        # Imprime os Top 5 locais (seleção parcial, sem ordenar todas as células)
+        top_locais = geo_agrupado.nlargest(5, 'percentual')
         print(f"\n>> {nome_loja} (Total Pedidos com GPS: {total_pedidos_loja})")
         print(top_locais[['lat', 'lon', 'percentual']].to_string(index=False, formatters={'percentual': '{:.2f}%'.format}))
+        top_locais_lojas[nome_loja] = top_locais.set_axis(range(1, len(top_locais) + 1))
 
         # 3. Define o tamanho dos pontos baseado no percentual
         # Fator de multiplicação para tornar o ponto visível (ex: 1% -> tamanho 30)
         # Adicionamos um tamanho mínimo (min_size) para pontos com % muito baixo não sumirem
         tamanhos = np.maximum(geo_agrupado['percentual'] * 50, 20)
         
-        # Plotagem
-        plt.scatter(
-            x=geo_agrupado['lon'], 
-            y=geo_agrupado['lat'], 
-            s=tamanhos, 
-            label=f"{nome_loja} (Total: {total_pedidos_loja})",
-            color=cores[i % len(cores)],
-            alpha=0.6,
-            edgecolors='w',
-            linewidth=0.5
-        )
+        pontos_lojas.append((i, nome_loja, total_pedidos_loja,
+                             geo_agrupado['lon'].to_numpy(), geo_agrupado['lat'].to_numpy(), tamanhos.to_numpy()))
 
-    plt.title("Distribuição Geográfica: Percentual de Pedidos por Local", fontsize=20, pad=15)
-    plt.xlabel("Longitude", fontsize=12)
-    plt.ylabel("Latitude", fontsize=12)
-    plt.legend(title="Filiais", fontsize=10, loc='best', markerscale=0.5) # markerscale ajusta o tamanho na legenda
-    plt.grid(True, linestyle='--', alpha=0.5)
-    
-    # Adiciona anotação explicativa
-    plt.text(0.02, 0.02, 'O tamanho do ponto representa o % de vendas da loja naquele local', 
-             transform=plt.gca().transAxes, fontsize=10, 
-             bbox=dict(facecolor='white', alpha=0.8))
-             
-    plt.axis('equal') 
-    plt.tight_layout()
-    plt.show()
+    if top_locais_lojas:
+        exportar_tabela(pd.concat(top_locais_lojas, names=["Loja", "Posição"]), "geo_top5_locais")
+    exibir_grafico("grafico_distribuicao_geografica", "distribuicao_geografica", pontos_lojas)
     print("Gráfico de densidade geográfica (baseado em percentual) gerado com sucesso.\n")
 
+# ------------------------------------------------------------------------------
+# Eficiência do frete: distância cliente-loja e loja mais próxima
+# ------------------------------------------------------------------------------
+
+# Localização das lojas (Loja, lat, lon): lojas.csv no diretório da fonte (gerado
+# por gerar_base_sintetica) ou o arquivo indicado em ALURA_STORE_LOCAIS_LOJAS
+ARQUIVO_LOCAIS_LOJAS = "lojas.csv"
+LOCAIS_LOJAS = os.environ.get("ALURA_STORE_LOCAIS_LOJAS")
+
+_LOCAIS_LOJAS = {"tabela": None, "impressao": None, "arvore": None}
+
+# Faixas de distância cliente-loja (km) usadas nas tabelas de frete
+FAIXAS_DISTANCIA_KM = (0, 50, 100, 250, 500, 1000, 2000, np.inf)
+
+def configurar_locais_lojas(fonte=None, caminho=None, avisar=True):
+    """
+    Lê a localização das lojas (`caminho`, ALURA_STORE_LOCAIS_LOJAS ou lojas.csv da fonte).
+    Retorna a tabela (índice Loja) ou None, com aviso se `avisar`.
+    """
+    fonte = fonte or FONTE_DADOS
+    caminho = caminho or LOCAIS_LOJAS
+    if caminho is None and os.path.isdir(fonte):
+        caminho = os.path.join(fonte, ARQUIVO_LOCAIS_LOJAS)
+    _LOCAIS_LOJAS.update(tabela=None, impressao=None, arvore=None)
+    if caminho is None or not os.path.exists(caminho):
+        if not avisar: return None
+        print("Aviso: localização das lojas não encontrada (lojas.csv na fonte ou ALURA_STORE_LOCAIS_LOJAS); "
+              "análise de frete por distância indisponível.")
+        return None
+    tabela = pd.read_csv(caminho, usecols=["Loja", "lat", "lon"], index_col="Loja").dropna()
+    _LOCAIS_LOJAS.update(tabela=tabela, impressao=impressao_arquivo(caminho))
+    print(f">>> Localização de {len(tabela):,} lojas lida de {caminho}")
+    return tabela
+
+def _arvore_lojas(locais):
+    """ArvoreLojas dos locais configurados (construída uma vez) ou de `locais`."""
+    if locais is not _LOCAIS_LOJAS["tabela"]:
+        return ArvoreLojas(locais["lat"], locais["lon"])
+    if _LOCAIS_LOJAS["arvore"] is None:
+        _LOCAIS_LOJAS["arvore"] = ArvoreLojas(locais["lat"], locais["lon"])
+    return _LOCAIS_LOJAS["arvore"]
+
+@instrumentar
+def calcular_frete_distancia(dict_lojas, locais=None):
+    """
+    Distância de cada pedido com GPS até a própria loja e até a mais próxima da rede, em somas
+    mescláveis por Loja x Categoria x Faixa de distância. None sem localização das lojas.
+    """
+    if locais is None: locais = _LOCAIS_LOJAS["tabela"]
+    if locais is None: return None
+    df = combinar_lojas(dict_lojas)
+    nomes_lojas = df.index.get_level_values(0)
+    loja_linha = locais.index.get_indexer(nomes_lojas)
+    for nome_loja in pd.unique(nomes_lojas[loja_linha < 0]):
+        print(f"Aviso: {nome_loja} sem localização; fora da análise de frete por distância.")
+
+    lat = df["lat"].to_numpy(dtype=np.float64, na_value=np.nan)
+    lon = df["lon"].to_numpy(dtype=np.float64, na_value=np.nan)
+    frete = df["Frete"].to_numpy(dtype=np.float64, na_value=np.nan)
+    validos = (loja_linha >= 0) & ~(np.isnan(lat) | np.isnan(lon) | np.isnan(frete))
+    lat, lon, frete, loja_linha = lat[validos], lon[validos], frete[validos], loja_linha[validos]
+
+    lat_lojas, lon_lojas = locais["lat"].to_numpy(np.float64), locais["lon"].to_numpy(np.float64)
+    distancia = distancia_haversine_km(lat, lon, lat_lojas[loja_linha], lon_lojas[loja_linha])
+    _, distancia_proxima = _arvore_lojas(locais).mais_proxima(lat, lon)
+    outra_loja = distancia_proxima < distancia * (1 - 1e-9)
+
+    faixas = pd.Categorical.from_codes(np.searchsorted(FAIXAS_DISTANCIA_KM[1:-1], distancia, side="right"),
+                                       categories=_rotulos_faixas_distancia(), ordered=True)
+    if "Categoria do Produto" in df.columns:
+        categorias = df["Categoria do Produto"].to_numpy()[validos]
+    else:
+        categorias = pd.array([pd.NA] * len(frete), dtype="Int64")
+    somas = pd.DataFrame({
+        "pedidos": np.ones(len(frete), dtype=np.int64),
+        "distancia": distancia,
+        "frete": frete,
+        "distancia2": distancia ** 2,
+        "distancia_frete": distancia * frete,
+        "frete2": frete ** 2,
+        "outra_loja": outra_loja.astype(np.int64),
+        "km_extra": np.where(outra_loja, distancia - distancia_proxima, 0.0),
+    })
+    chaves = [pd.Index(nomes_lojas[validos], name="Loja"), pd.Index(categorias, name="Categoria do Produto"),
+              pd.CategoricalIndex(faixas, name="Faixa")]
+    return somas.groupby(chaves, dropna=False, observed=True).sum()
+
+def _rotulos_faixas_distancia():
+    limites = FAIXAS_DISTANCIA_KM
+    return ([f"{a:,.0f} a {b:,.0f} km" for a, b in zip(limites[:-2], limites[1:-1])]
+            + [f"{limites[-2]:,.0f} km ou mais"])
+
+def _somar_frete_distancia(partes):
+    """Junta as somas de calcular_frete_distancia (ex.: uma parte por loja); None sem localização."""
+    partes = [parte for parte in partes if parte is not None]
+    if not partes:
+        return None
+    return pd.concat(partes).groupby(level=[0, 1, 2], dropna=False, observed=True).sum()
+
+def calcular_eficiencia_frete(frete_distancia, niveis):
+    """
+    Distância e frete médios, frete por km, reta frete = fixo + inclinação x distância e parcela de
+    pedidos mais próximos de outra loja, nos níveis pedidos, a partir das somas mescláveis.
+    """
+    s = frete_distancia.groupby(level=niveis, dropna=False, observed=True).sum()
+    n = s["pedidos"]
+    cov = n * s["distancia_frete"] - s["distancia"] * s["frete"]
+    var_distancia = n * s["distancia2"] - s["distancia"] ** 2
+    var_frete = n * s["frete2"] - s["frete"] ** 2
+    inclinacao = cov / var_distancia.where(var_distancia > 0)
+    return pd.DataFrame({
+        "Pedidos": n,
+        "Distância média (km)": s["distancia"] / n,
+        "Frete médio": s["frete"] / n,
+        "Frete por km": s["frete"] / s["distancia"].where(s["distancia"] > 0),
+        "Frete fixo": (s["frete"] - inclinacao * s["distancia"]) / n,
+        "R$ por km (reta)": inclinacao,
+        "Correlação": cov / np.sqrt((var_distancia * var_frete).where(var_distancia * var_frete > 0)),
+        "Outra loja mais próxima": s["outra_loja"] / n,
+        "Km a mais": s["km_extra"] / s["outra_loja"].where(s["outra_loja"] > 0),
+    })
+
+FORMATOS_EFICIENCIA_FRETE = {
+    "Pedidos": "{:,.0f}".format,
+    "Distância média (km)": "{:,.1f}".format,
+    "Frete médio": "R$ {:,.2f}".format,
+    "Frete por km": "R$ {:,.4f}".format,
+    "Frete fixo": "R$ {:,.2f}".format,
+    "R$ por km (reta)": "R$ {:,.4f}".format,
+    "Correlação": "{:+.2f}".format,
+    "Outra loja mais próxima": "{:.1%}".format,
+    "Km a mais": "{:,.1f}".format,
+}
+
+@instrumentar
+def relatorio_frete_distancia(dict_lojas, frete_distancia=None, n=5):
+    """
+    Eficiência do frete pela distância cliente-loja, por loja, por categoria e por faixa de distância.
+    `frete_distancia` (calcular_frete_distancia) dispensa o cálculo.
+    """
+    print("\n" + "=" * 80)
+    print("EFICIÊNCIA DO FRETE: DISTÂNCIA CLIENTE-LOJA E LOJA MAIS PRÓXIMA")
+    print("=" * 80)
+    if frete_distancia is None: frete_distancia = calcular_frete_distancia(dict_lojas)
+    if frete_distancia is None:
+        print("Sem localização das lojas: análise não executada.\n")
+        return
+
+    por_loja = calcular_eficiencia_frete(frete_distancia, ["Loja"])
+    por_categoria = calcular_eficiencia_frete(frete_distancia, ["Categoria do Produto"])
+    por_faixa = calcular_eficiencia_frete(frete_distancia, ["Faixa", "Categoria do Produto"])
+    frete_faixas = por_faixa["Frete médio"].unstack("Categoria do Produto")
+    exportar_tabela(por_loja, "frete_distancia_por_loja")
+    exportar_tabela(por_categoria, "frete_distancia_por_categoria")
+    exportar_tabela(por_faixa, "frete_distancia_por_faixa")
+
+    # TABELA DE DADOS: EFICIÊNCIA POR LOJA
+    print("-" * 50)
+    if len(por_loja) > LIMITE_LOJAS_DETALHADAS:
+        print(f"TABELA DE DADOS: {n} LOJAS COM MAIS PEDIDOS MAIS PRÓXIMOS DE OUTRA LOJA (DE {len(por_loja)})")
+        tabela_lojas = por_loja.nlargest(n, "Outra loja mais próxima")
+    else:
+        print("TABELA DE DADOS: EFICIÊNCIA DO FRETE POR LOJA")
+        tabela_lojas = por_loja
+    print("-" * 50)
+    print(tabela_lojas.to_string(formatters=FORMATOS_EFICIENCIA_FRETE))
+
+    # TABELA DE DADOS: EFICIÊNCIA POR CATEGORIA
+    print("\nTABELA DE DADOS: FRETE X DISTÂNCIA POR CATEGORIA")
+    print(por_categoria.to_string(formatters=FORMATOS_EFICIENCIA_FRETE))
+
+    # TABELA DE DADOS: FRETE MÉDIO POR FAIXA DE DISTÂNCIA
+    print("\nTABELA DE DADOS: FRETE MÉDIO POR FAIXA DE DISTÂNCIA E CATEGORIA")
+    print(formatar_reais(frete_faixas).to_string())
+    print()
+
+    exibir_grafico("grafico_frete_por_distancia", "frete_por_faixa_distancia", frete_faixas)
+
 # ==============================================================================
-# EXECUÇÃO PRINCIPAL
+# 4. GRÁFICOS (RENDERIZAÇÃO INTERATIVA OU HEADLESS EM ARQUIVOS)
 # ==============================================================================
 
-def main():
-    lojas = carregar_dados()
-    if not lojas: return
+# As funções de desenho ficam em graficos_alura_store.py; aqui os relatórios só
+# indicam o nome do gráfico e os dados. Estado da saída dos gráficos: com "dir" =
+# None os gráficos abrem em janelas; com um diretório, são salvos em arquivo por
+# um pool de processos.
+_SAIDA_GRAFICOS = {"dir": None, "formatos": ("png",), "executor": None, "futuros": [], "ativo": True}
 
-    # Execução das análises
-    verificar_nulos(lojas)
-    
-    relatorio_vendas_por_loja(lojas)
-    graficos_comparativos_vendas(lojas)
-    relatorio_vendas_por_categoria(lojas)
-    graficos_categorias_comparativas(lojas)
-    avaliacao_por_categoria(lojas)
-    avaliacao_comparativa_categorias(lojas)
-    avaliacao_geral_por_loja(lojas)
-    produtos_mais_menos_vendidos(lojas, top=10)
-    frete_medio_por_loja(lojas)
-    
-    # Análise Geográfica (Agora com Tamanho por Frequência)
-    analise_geografica_clientes(lojas)
+DIR_GRAFICOS = os.environ.get("ALURA_STORE_GRAFICOS")
+
+def _modulo_graficos():
+    """Camada de gráficos, importada (com o matplotlib) só no primeiro uso."""
+    import graficos_alura_store
+    return graficos_alura_store
+
+def configurar_saida_graficos(dir_saida, formatos=("png",), max_workers=None):
+    """
+    Modo headless: cada gráfico é salvo em `dir_saida` nos `formatos` pedidos, renderizado
+    por um pool de `max_workers` processos (0 = no processo atual).
+    """
+    graficos = _modulo_graficos()
+    graficos.inicializar_modo_arquivo()
+    os.makedirs(dir_saida, exist_ok=True)
+    executor = None
+    if max_workers != 0:
+        executor = ProcessPoolExecutor(max_workers=max_workers, initializer=graficos.inicializar_modo_arquivo)
+    _SAIDA_GRAFICOS.update(dir=dir_saida, formatos=tuple(formatos), executor=executor, futuros=[])
+
+@instrumentar
+def finalizar_graficos():
+    """
+    Aguarda os gráficos pendentes, encerra o pool e volta ao modo interativo.
+    Retorna a lista de arquivos gerados.
+    """
+    arquivos = []
+    for futuro in _SAIDA_GRAFICOS["futuros"]:
+        try:
+            arquivos.extend(futuro.result())
+        except Exception as e:
+            print(f"Erro ao renderizar gráfico: {e}")
+    if _SAIDA_GRAFICOS["executor"] is not None:
+        _SAIDA_GRAFICOS["executor"].shutdown()
+    _SAIDA_GRAFICOS.update(dir=None, executor=None, futuros=[], ativo=True)
+    return arquivos
+
+def desativar_graficos():
+    """
+    Desliga a geração de gráficos (exibir_grafico vira no-op) até o próximo
+    finalizar_graficos(). Usado nos benchmarks para medir só os cálculos.
+    """
+    _SAIDA_GRAFICOS["ativo"] = False
+
+@instrumentar
+def exibir_grafico(grafico, nome, *args):
+    """
+    Desenha `grafico` (função de graficos_alura_store) com dados já calculados: abre a janela
+    ou, no modo headless, salva `<nome>.<formato>` no diretório de saída.
+    """
+    if not _SAIDA_GRAFICOS["ativo"]:
+        return
+    graficos = _modulo_graficos()
+    if _SAIDA_GRAFICOS["dir"] is None:
+        graficos.exibir(grafico, args)
+        return
+
+    caminho_base = os.path.join(_SAIDA_GRAFICOS["dir"], _nome_arquivo(nome))
+    executor = _SAIDA_GRAFICOS["executor"]
+    if executor is None:
+        # Mesmo tratamento do pool: o erro aparece em finalizar_graficos
+        futuro = Future()
+        try:
+            futuro.set_result(graficos.renderizar_arquivo(grafico, args, caminho_base, _SAIDA_GRAFICOS["formatos"]))
+        except Exception as e:
+            futuro.set_exception(e)
+    else:
+        futuro = executor.submit(graficos.renderizar_arquivo, grafico, args, caminho_base, _SAIDA_GRAFICOS["formatos"])
+    _SAIDA_GRAFICOS["futuros"].append(futuro)
+
+def _nome_arquivo(texto):
+    """Converte um título em nome de arquivo (sem acentos, minúsculo, com _)."""
+    texto = unicodedata.normalize("NFKD", str(texto)).encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z0-9]+", "_", texto.lower()).strip("_")
+
+# ==============================================================================
+# EXECUÇÃO PRINCIPAL
+# ==============================================================================
 
+# O agendador de relatórios e a linha de comando ficam em agendador_alura_store.py,
+# que importa este módulo
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    from agendador_alura_store import main_cli
+    main_cli()
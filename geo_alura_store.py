@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+"""
+Camada geográfica do Projeto de Análise de Vendas - Alura Store
+
+Distância haversine, agregação de pedidos em células (grade ou hexágonos),
+índice espacial dos pedidos (`IndiceEspacial`) e árvore de quadrantes das
+lojas (`ArvoreLojas`), usados pela validação de GPS e pelas análises
+geográfica e de frete de `challenge_alura_store.py`. Só depende de NumPy e
+pandas; não importa o módulo de cálculo.
+"""
+
+import pandas as pd
+import numpy as np
+
+# ==============================================================================
+# 1. DISTÂNCIAS E CÉLULAS
+# ==============================================================================
+
+# Retângulo que contém o território brasileiro (ilhas oceânicas incluídas)
+LIMITES_BRASIL = {"lat": (-34.0, 5.5), "lon": (-74.0, -28.5)}
+
+RAIO_TERRA_KM = 6371.0088
+
+# Tamanho padrão das células de agregação geográfica (em graus; 0.1° ≈ 11 km)
+TAMANHO_CELULA_GEO = 0.1
+
+def distancia_haversine_km(lat1, lon1, lat2, lon2):
+    """
+    Distância em km pela fórmula de haversine (vetorizada: aceita arrays).
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * RAIO_TERRA_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def _indices_celula(lat, lon, tamanho_celula, tipo="grade"):
+    """
+    Índices inteiros da célula de cada ponto: quadrados de `tamanho_celula` graus ("grade")
+    ou hexágonos em coordenadas axiais (q, r) ("hex").
+    """
+    if tipo == "grade":
+        return np.floor(lat / tamanho_celula).astype(np.int64), np.floor(lon / tamanho_celula).astype(np.int64)
+    if tipo != "hex":
+        raise ValueError(f"Tipo de célula desconhecido: {tipo!r} (use 'grade' ou 'hex')")
+
+    q = (np.sqrt(3) / 3 * lon - lat / 3) / tamanho_celula
+    r = (2 / 3 * lat) / tamanho_celula
+    s = -q - r
+    q_arred, r_arred, s_arred = np.round(q), np.round(r), np.round(s)
+    dq, dr, ds = np.abs(q_arred - q), np.abs(r_arred - r), np.abs(s_arred - s)
+    corrige_q = (dq > dr) & (dq > ds)
+    corrige_r = ~corrige_q & (dr > ds)
+    q_arred = np.where(corrige_q, -r_arred - s_arred, q_arred)
+    r_arred = np.where(corrige_r, -q_arred - s_arred, r_arred)
+    return q_arred.astype(np.int64), r_arred.astype(np.int64)
+
+def agregar_celulas(lat, lon, tamanho_celula=TAMANHO_CELULA_GEO, tipo="grade"):
+    """
+    Agrega pontos (lat, lon) em células de grade ou hexagonais: uma linha por célula ocupada,
+    com o centroide dos pontos e a contagem de pedidos.
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    i, j = _indices_celula(lat, lon, tamanho_celula, tipo)
+
+    # Uma chave inteira por célula a partir do par (i, j)
+    chave = (i - i.min()) * (j.max() - j.min() + 1) + (j - j.min())
+    codigos, _ = pd.factorize(chave)
+    contagem = np.bincount(codigos)
+    return pd.DataFrame({
+        "lat": np.bincount(codigos, weights=lat) / contagem,
+        "lon": np.bincount(codigos, weights=lon) / contagem,
+        "contagem": contagem,
+    })
+
+# ==============================================================================
+# 2. ÍNDICE ESPACIAL DOS PEDIDOS
+# ==============================================================================
+
+class IndiceEspacial:
+    """
+    Índice em grade regular (pontos ordenados por célula) para consultas por retângulo e por raio.
+    As consultas retornam posições (iloc) no DataFrame original.
+    """
+    def __init__(self, lat, lon, tamanho_celula=0.5):
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        validos = ~(np.isnan(lat) | np.isnan(lon))
+        posicoes = np.flatnonzero(validos)
+        lat, lon = lat[validos], lon[validos]
+
+        self.tamanho_celula = tamanho_celula
+        linhas, colunas = _indices_celula(lat, lon, tamanho_celula)
+        if len(lat) == 0:
+            linhas = colunas = np.zeros(0, dtype=np.int64)
+        self.linha_min = int(linhas.min()) if len(linhas) else 0
+        self.linha_max = int(linhas.max()) if len(linhas) else -1
+        self.coluna_min = int(colunas.min()) if len(colunas) else 0
+        self.n_colunas = int(colunas.max()) - self.coluna_min + 1 if len(colunas) else 1
+
+        chaves = (linhas - self.linha_min) * self.n_colunas + (colunas - self.coluna_min)
+        ordem = np.argsort(chaves, kind="stable")
+        self.chaves = chaves[ordem]
+        self.lat, self.lon, self.posicoes = lat[ordem], lon[ordem], posicoes[ordem]
+
+    def __len__(self):
+        return len(self.chaves)
+
+    def _candidatos(self, lat_min, lat_max, lon_min, lon_max):
+        """Índices (internos) dos pontos nas células que cobrem o retângulo."""
+        t = self.tamanho_celula
+        linha_ini = max(int(np.floor(lat_min / t)), self.linha_min)
+        linha_fim = min(int(np.floor(lat_max / t)), self.linha_max)
+        coluna_ini = max(int(np.floor(lon_min / t)) - self.coluna_min, 0)
+        coluna_fim = min(int(np.floor(lon_max / t)) - self.coluna_min, self.n_colunas - 1)
+        if linha_ini > linha_fim or coluna_ini > coluna_fim:
+            return np.zeros(0, dtype=np.int64)
+
+        base = (np.arange(linha_ini, linha_fim + 1) - self.linha_min) * self.n_colunas
+        inicio = np.searchsorted(self.chaves, base + coluna_ini, side="left")
+        fim = np.searchsorted(self.chaves, base + coluna_fim, side="right")
+
+        # Concatena os trechos [inicio, fim) de cada linha sem laço Python
+        tamanhos = fim - inicio
+        deslocamento = np.repeat(inicio - (np.cumsum(tamanhos) - tamanhos), tamanhos)
+        return np.arange(tamanhos.sum()) + deslocamento
+
+    def consultar_retangulo(self, lat_min, lat_max, lon_min, lon_max):
+        """Posições dos pontos dentro do retângulo (bounding box)."""
+        idx = self._candidatos(lat_min, lat_max, lon_min, lon_max)
+        dentro = ((self.lat[idx] >= lat_min) & (self.lat[idx] <= lat_max)
+                  & (self.lon[idx] >= lon_min) & (self.lon[idx] <= lon_max))
+        return self.posicoes[idx[dentro]]
+
+    def consultar_raio(self, lat, lon, raio_km):
+        """Posições dos pontos a até `raio_km` de (lat, lon), pela distância haversine."""
+        delta_lat = np.degrees(raio_km / RAIO_TERRA_KM)
+        delta_lon = delta_lat / max(np.cos(np.radians(lat)), 1e-6)
+        idx = self._candidatos(lat - delta_lat, lat + delta_lat, lon - delta_lon, lon + delta_lon)
+        perto = distancia_haversine_km(lat, lon, self.lat[idx], self.lon[idx]) <= raio_km
+        return self.posicoes[idx[perto]]
+
+# ==============================================================================
+# 3. ÁRVORE DE QUADRANTES DAS LOJAS
+# ==============================================================================
+
+# Menor célula da árvore de lojas, em graus (0.05° ≈ 5,5 km)
+TAMANHO_CELULA_ARVORE = 0.05
+
+class ArvoreLojas:
+    """
+    Árvore de quadrantes para achar a loja mais próxima de milhões de pontos: cada nó guarda só as
+    lojas que podem ser a mais próxima de algum ponto do seu retângulo (desigualdade triangular).
+    """
+    def __init__(self, lat, lon, tamanho_celula=TAMANHO_CELULA_ARVORE, limites=LIMITES_BRASIL):
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.lat_min = min(limites["lat"][0], self.lat.min())
+        self.lon_min = min(limites["lon"][0], self.lon.min())
+        self.lado = max(max(limites["lat"][1], self.lat.max()) - self.lat_min,
+                        max(limites["lon"][1], self.lon.max()) - self.lon_min)
+        self.profundidade = max(int(np.ceil(np.log2(self.lado / tamanho_celula))), 0)
+
+        # Folhas por nível: chaves (linha * 2**nível + coluna) ordenadas e o
+        # trecho de cada folha em self.candidatas
+        self.folhas = []
+        partes_candidatas, n_candidatas = [], 0
+        linhas = colunas = np.zeros(1, dtype=np.int64)
+        pares_no, pares_loja = np.zeros(len(self.lat), dtype=np.int64), np.arange(len(self.lat))
+        for nivel in range(self.profundidade + 1):
+            passo = self.lado / 2**nivel
+            lat_centro = self.lat_min + (linhas + 0.5) * passo
+            lon_centro = self.lon_min + (colunas + 0.5) * passo
+            raio = np.max([distancia_haversine_km(lat_centro, lon_centro, lat_centro + dy * passo / 2,
+                                                  lon_centro + dx * passo / 2)
+                           for dy in (-1, 1) for dx in (-1, 1)], axis=0)
+
+            # Os pares (nó, loja) ficam ordenados por nó; todo nó tem ao menos uma candidata
+            distancias = distancia_haversine_km(lat_centro[pares_no], lon_centro[pares_no],
+                                                self.lat[pares_loja], self.lon[pares_loja])
+            inicios = np.flatnonzero(np.r_[True, pares_no[1:] != pares_no[:-1]])
+            limite = np.minimum.reduceat(distancias, inicios) + 2 * raio
+            manter = distancias <= limite[pares_no] * (1 + 1e-9) + 1e-6
+            pares_no, pares_loja = pares_no[manter], pares_loja[manter]
+            contagem = np.bincount(pares_no, minlength=len(linhas))
+
+            folha = contagem == 1 if nivel < self.profundidade else np.ones(len(linhas), dtype=bool)
+            inicio_no = np.cumsum(contagem) - contagem
+            chaves = linhas[folha] * 2**nivel + colunas[folha]
+            ordem = np.argsort(chaves)
+            self.folhas.append((chaves[ordem], (n_candidatas + np.cumsum(contagem[folha]) - contagem[folha])[ordem],
+                                contagem[folha][ordem]))
+            candidatas = pares_loja[folha[pares_no]]
+            partes_candidatas.append(candidatas)
+            n_candidatas += len(candidatas)
+
+            # Cada nó interno vira quatro filhos, que herdam as candidatas do pai
+            internos = np.flatnonzero(~folha)
+            if not len(internos):
+                break
+            linhas = (2 * linhas[internos])[:, None] + np.array([0, 0, 1, 1])
+            colunas = (2 * colunas[internos])[:, None] + np.array([0, 1, 0, 1])
+            linhas, colunas = linhas.ravel(), colunas.ravel()
+            quantidades = np.repeat(contagem[internos], 4)
+            pares_loja = pares_loja[_concatenar_trechos(np.repeat(inicio_no[internos], 4), quantidades)]
+            pares_no = np.repeat(np.arange(len(linhas)), quantidades)
+        self.candidatas = np.concatenate(partes_candidatas)
+
+    def _folha_das_celulas(self, linhas, colunas):
+        """Trecho de candidatas (início, quantidade) da folha que contém cada célula do nível mais fino."""
+        inicio = np.zeros(len(linhas), dtype=np.int64)
+        quantidade = np.zeros(len(linhas), dtype=np.int64)
+        pendentes = np.arange(len(linhas))
+        for nivel, (chaves, inicios, quantidades) in enumerate(self.folhas):
+            if not len(pendentes): break
+            deslocamento = self.profundidade - nivel
+            chave = (linhas[pendentes] >> deslocamento) * 2**nivel + (colunas[pendentes] >> deslocamento)
+            posicao = np.minimum(np.searchsorted(chaves, chave), max(len(chaves) - 1, 0))
+            achou = chaves[posicao] == chave if len(chaves) else np.zeros(len(chave), dtype=bool)
+            inicio[pendentes[achou]] = inicios[posicao[achou]]
+            quantidade[pendentes[achou]] = quantidades[posicao[achou]]
+            pendentes = pendentes[~achou]
+        return inicio, quantidade
+
+    def mais_proxima(self, lat, lon, tamanho_bloco=2_000_000):
+        """
+        Índice da loja mais próxima de cada ponto e a distância até ela (km), em blocos de `tamanho_bloco`.
+        Pontos sem GPS recebem -1 e NaN.
+        """
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        indices = np.full(len(lat), -1, dtype=np.int64)
+        distancias = np.full(len(lat), np.nan)
+        lado_celula = self.lado / 2**self.profundidade
+        n_celulas = 2**self.profundidade
+        for inicio in range(0, len(lat), tamanho_bloco):
+            lat_bloco, lon_bloco = lat[inicio:inicio + tamanho_bloco], lon[inicio:inicio + tamanho_bloco]
+            linhas = np.floor((lat_bloco - self.lat_min) / lado_celula)
+            colunas = np.floor((lon_bloco - self.lon_min) / lado_celula)
+            dentro = (linhas >= 0) & (linhas < n_celulas) & (colunas >= 0) & (colunas < n_celulas)
+            fora = np.flatnonzero(~dentro & ~(np.isnan(lat_bloco) | np.isnan(lon_bloco)))
+            dentro = np.flatnonzero(dentro)
+
+            # Fora da árvore (GPS fora da região): comparação direta com todas as lojas
+            passo_fora = max(tamanho_bloco // len(self.lat), 1)
+            for i in range(0, len(fora), passo_fora):
+                pontos = fora[i:i + passo_fora]
+                d = distancia_haversine_km(lat_bloco[pontos, None], lon_bloco[pontos, None],
+                                           self.lat[None, :], self.lon[None, :])
+                indices[inicio + pontos] = d.argmin(axis=1)
+                distancias[inicio + pontos] = d.min(axis=1)
+            if not len(dentro): continue
+
+            codigos, celulas = pd.factorize(linhas[dentro].astype(np.int64) * n_celulas
+                                            + colunas[dentro].astype(np.int64))
+            inicio_folha, quantidade_folha = self._folha_das_celulas(celulas // n_celulas, celulas % n_celulas)
+            quantidades = quantidade_folha[codigos]
+            pontos = np.repeat(dentro, quantidades)
+            lojas = self.candidatas[_concatenar_trechos(inicio_folha[codigos], quantidades)]
+            d = distancia_haversine_km(lat_bloco[pontos], lon_bloco[pontos], self.lat[lojas], self.lon[lojas])
+            inicios = np.r_[0, np.cumsum(quantidades)[:-1]]
+            menores = np.minimum.reduceat(d, inicios)
+            # Em empate, a primeira candidata da folha
+            minimos = np.flatnonzero(d == np.repeat(menores, quantidades))
+            primeiros = minimos[np.r_[True, pontos[minimos[1:]] != pontos[minimos[:-1]]]]
+            indices[inicio + pontos[primeiros]] = lojas[primeiros]
+            distancias[inicio + pontos[primeiros]] = d[primeiros]
+        return indices, distancias
+
+def _concatenar_trechos(inicios, quantidades):
+    """Posições dos trechos [inicio, inicio + quantidade) concatenados, sem laço Python."""
+    deslocamento = np.repeat(inicios - (np.cumsum(quantidades) - quantidades), quantidades)
+    return np.arange(quantidades.sum()) + deslocamento
@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+"""
+Camada de gráficos do Projeto de Análise de Vendas - Alura Store
+
+Funções de desenho (matplotlib) usadas pelos relatórios de
+`challenge_alura_store.py`. Cada função recebe apenas dados já calculados
+(Series/DataFrames) e desenha uma figura; o módulo só é importado quando um
+gráfico é de fato exibido ou salvo, então usos apenas de cálculo não pagam
+o custo de importar o matplotlib.
+"""
+
+import matplotlib.pyplot as plt
+
+# Configuração de estilo
+plt.style.use('ggplot') 
+
+# ==============================================================================
+# 1. EXIBIÇÃO E RENDERIZAÇÃO EM ARQUIVO
+# ==============================================================================
+
+def inicializar_modo_arquivo():
+    """Backend não interativo (Agg), para salvar figuras sem abrir janelas."""
+    plt.switch_backend("Agg")
+
+def exibir(nome_grafico, args):
+    """Desenha o gráfico `nome_grafico` (função deste módulo) e abre a janela."""
+    globals()[nome_grafico](*args)
+    plt.show()
+
+def renderizar_arquivo(nome_grafico, args, caminho_base, formatos):
+    """Desenha o gráfico e salva `<caminho_base>.<formato>` em cada formato."""
+    try:
+        globals()[nome_grafico](*args)
+        figura = plt.gcf()
+        caminhos = []
+        for formato in formatos:
+            caminho = f"{caminho_base}.{formato}"
+            figura.savefig(caminho, format=formato)
+            caminhos.append(caminho)
+    finally:
+        plt.close("all")
+    return caminhos
+
+# ==============================================================================
+# 2. GRÁFICOS DOS RELATÓRIOS
+# ==============================================================================
+
+def grafico_vendas_anuais_loja(vendas_ano, nome_loja):
+    plt.figure(figsize=(14, 5))
+    ax1 = vendas_ano.plot(kind="line", marker="o", color="#1f77b4", linewidth=3)
+    ax1.set_title(f"VENDAS ANUAIS - {nome_loja}", fontsize=20)
+    ax1.set_xlabel("ANO", fontsize=12)
+    ax1.set_ylabel("VENDAS (R$)", fontsize=12)
+    ax1.grid(axis="y", linestyle="--")
+    plt.xticks(vendas_ano.index)
+
+    for x, y in zip(vendas_ano.index, vendas_ano.values):
+        ax1.text(x, y + 100, f"R$ {y:,.2f}", ha="center")
+
+    plt.tight_layout()
+
+def grafico_vendas_mensais_loja(vendas_mes_ano, nome_loja):
+    plt.figure(figsize=(14, 5))
+    # Ajuste para garantir plotagem temporal correta
+    ax2 = vendas_mes_ano.to_timestamp().plot(kind="line", marker="o", color="#ff7f0e", linewidth=2)
+    ax2.set_title(f"VENDAS MÊS/ANO - {nome_loja}", fontsize=20)
+    ax2.set_xlabel("MÊS/ANO", fontsize=12)
+    ax2.set_ylabel("VENDAS (R$)", fontsize=12)
+    ax2.grid(axis="y", linestyle="--")
+    
+    # Rótulos ajustados para datetime
+    for x_time, y_value in zip(vendas_mes_ano.to_timestamp().index, vendas_mes_ano.values):
+        rotulo_data = x_time.strftime("%m/%Y")
+        ax2.text(x_time, y_value + 300, rotulo_data,
+                 ha="center", fontsize=10, color="darkorange", rotation=90)
+
+    plt.tight_layout()
+
+def grafico_comparativo_anual(df_comp_anual):
+    plt.figure(figsize=(16, 8))
+    ax_comp_ano = df_comp_anual.plot(kind="bar", rot=0, figsize=(16, 8), width=0.8, ax=plt.gca())
+
+    ax_comp_ano.set_title("COMPARAÇÃO VENDAS ANUAIS - TODAS LOJAS", fontsize=20, pad=15)
+    ax_comp_ano.set_xlabel("ANO", fontsize=12)
+    ax_comp_ano.set_ylabel("VENDAS (R$)", fontsize=12)
+    ax_comp_ano.legend(title="LOJA", fontsize=12)
+    ax_comp_ano.grid(axis="y", linestyle="--")
+
+    for p in ax_comp_ano.patches:
+        ax_comp_ano.annotate(
+            f"R$ {p.get_height():,.2f}",
+            (p.get_x() + p.get_width() / 2., p.get_height()),
+            ha="center", va="center", xytext=(0, 10),
+            textcoords="offset points", fontsize=10
+        )
+
+    plt.tight_layout()
+
+def grafico_comparativo_mensal(df_comp_mes_ano):
+    plt.figure(figsize=(16, 8))
+    ax_comp_mes_ano = df_comp_mes_ano.plot(kind="line", marker="o", figsize=(16, 8), linewidth=2, ax=plt.gca())
+
+    ax_comp_mes_ano.set_title("COMPARAÇÃO VENDAS MENSAIS - TODAS LOJAS", fontsize=20, pad=15)
+    ax_comp_mes_ano.set_xlabel("MÊS/ANO", fontsize=12)
+    ax_comp_mes_ano.set_ylabel("VENDAS (R$)", fontsize=12)
+    ax_comp_mes_ano.legend(title="LOJA", fontsize=12)
+    ax_comp_mes_ano.grid(axis="y", linestyle="--")
+
+    plt.tight_layout()
+
+def grafico_media_movel_lojas(media_movel, janela):
+    plt.figure(figsize=(16, 8))
+    ax = media_movel.plot(kind="line", figsize=(16, 8), linewidth=2, ax=plt.gca())
+
+    ax.set_title(f"MÉDIA MÓVEL DE VENDAS ({janela} DIAS) - TODAS LOJAS", fontsize=20, pad=15)
+    ax.set_xlabel("DATA", fontsize=12)
+    ax.set_ylabel("VENDAS POR DIA (R$)", fontsize=12)
+    ax.legend(title="LOJA", fontsize=12)
+    ax.grid(axis="y", linestyle="--")
+
+    plt.tight_layout()
+
+def grafico_total_categoria_loja(total_vendas_categoria, nome_loja):
+    plt.figure(figsize=(14, 5))
+    ax1 = total_vendas_categoria.plot(kind="barh", color=plt.cm.Set2.colors[0],
+                                      title=f"TOTAL VENDAS POR CATEGORIA - {nome_loja}")
+    ax1.invert_yaxis()
+    ax1.grid(axis="x", linestyle="--")
+    plt.tight_layout()
+
+def grafico_categoria_ano_loja(df_vendas_ano_cat, nome_loja):
+    plt.figure(figsize=(14, 5))
+    ax2 = df_vendas_ano_cat.plot(kind="bar", ax=plt.gca(), rot=0,
+                                 title=f"VENDAS POR CATEGORIA/ANO - {nome_loja}")
+    ax2.grid(axis="y", linestyle="--")
+    plt.tight_layout()
+
+def grafico_categoria_loja(df_vendas_lojas_categoria):
+    plt.figure(figsize=(14, 8))
+    ax_categoria = df_vendas_lojas_categoria.plot(kind="bar", figsize=(14, 8), ax=plt.gca(),
+                                                  title="COMPARAÇÃO DE VENDAS TOTAIS POR CATEGORIA E LOJA")
+    ax_categoria.grid(axis="x", linestyle="--")
+    plt.tight_layout()
+
+def grafico_evolucao_categoria(df_cat_comp, categoria):
+    plt.figure(figsize=(12, 6))
+    ax_categoria_ano = df_cat_comp.plot(kind="line", marker="o", figsize=(12, 6), ax=plt.gca())
+    ax_categoria_ano.set_title(f"VENDAS ANUAIS DA CATEGORIA {categoria}", fontsize=20)
+    ax_categoria_ano.set_xlabel("ANO", fontsize=12)
+    ax_categoria_ano.set_ylabel("VENDAS (R$)", fontsize=12)
+    ax_categoria_ano.legend(title="LOJA")
+    ax_categoria_ano.grid(axis="y", linestyle="--")
+    plt.xticks(df_cat_comp.index)
+    plt.tight_layout()
+
+def grafico_avaliacao_categoria_loja(df_avaliacao_lojas_categoria):
+    plt.figure(figsize=(14, 8))
+    ax = df_avaliacao_lojas_categoria.plot(kind="bar", figsize=(14, 8), ax=plt.gca(),
+                                           title="COMPARAÇÃO DE AVALIAÇÕES POR CATEGORIA E LOJA")
+
+    for p in ax.patches:
+        valor_rotulo = f"{p.get_height():.2f}"
+        ax.annotate(valor_rotulo,
+                    (p.get_x() + p.get_width() / 2., p.get_height()),
+                    ha="center", va="center", xytext=(0, 10),
+                    textcoords="offset points", fontsize=6)
+
+    ax.grid(axis="y", linestyle="--")
+    plt.tight_layout()
+
+def grafico_barras_por_loja(serie, titulo, formato_rotulo):
+    """Barras verticais (uma por loja) com o valor anotado sobre cada barra."""
+    plt.figure(figsize=(10, 6))
+    ax = serie.plot(kind="bar", ax=plt.gca(), rot=0, color="teal", title=titulo)
+
+    for p in ax.patches:
+        valor_rotulo = formato_rotulo.format(p.get_height())
+        ax.annotate(valor_rotulo,
+                    (p.get_x() + p.get_width() / 2., p.get_height()),
+                    ha="center", va="center", xytext=(0, 10),
+                    textcoords="offset points", fontsize=8)
+
+    ax.grid(axis="y", linestyle="--")
+    plt.tight_layout()
+
+def grafico_histograma_distribuicao(histograma, percentis, titulo, formato_rotulo):
+    """Barras do histograma (vendas por faixa) com os percentis no canto do gráfico."""
+    plt.figure(figsize=(14, 6))
+    ax = histograma.plot(kind="bar", ax=plt.gca(), rot=30, color="teal", title=titulo)
+    ax.set_xlabel("FAIXA", fontsize=12)
+    ax.set_ylabel("VENDAS", fontsize=12)
+    texto = " | ".join(f"{nome}: {formato_rotulo.format(valor)}" for nome, valor in percentis.items())
+    ax.text(0.98, 0.95, texto, transform=ax.transAxes, ha="right", va="top", fontsize=10,
+            bbox=dict(facecolor="white", alpha=0.8))
+    ax.grid(axis="y", linestyle="--")
+    plt.tight_layout()
+
+def grafico_frete_por_distancia(frete_faixas):
+    """Frete médio por faixa de distância cliente-loja, uma linha por categoria."""
+    plt.figure(figsize=(14, 7))
+    ax = frete_faixas.plot(kind="line", marker="o", linewidth=2, ax=plt.gca())
+    ax.set_title("FRETE MÉDIO POR DISTÂNCIA CLIENTE-LOJA", fontsize=20, pad=15)
+    ax.set_xlabel("DISTÂNCIA ATÉ A LOJA", fontsize=12)
+    ax.set_ylabel("FRETE MÉDIO (R$)", fontsize=12)
+    ax.set_xticks(range(len(frete_faixas.index)))
+    ax.set_xticklabels(frete_faixas.index, rotation=30)
+    ax.legend(title="CATEGORIA", fontsize=9)
+    ax.grid(axis="y", linestyle="--")
+    plt.tight_layout()
+
+def grafico_distribuicao_geografica(pontos_lojas):
+    """
+    pontos_lojas: lista de (posição, nome_loja, total_pedidos, lon, lat, tamanhos).
+    """
+    plt.figure(figsize=(12, 10))
+    cores = plt.cm.tab10.colors 
+
+    for i, nome_loja, total_pedidos_loja, lon, lat, tamanhos in pontos_lojas:
+        plt.scatter(
+            x=lon, 
+            y=lat, 
+            s=tamanhos, 
+            label=f"{nome_loja} (Total: {total_pedidos_loja})",
+            color=cores[i % len(cores)],
+            alpha=0.6,
+            edgecolors='w',
+            linewidth=0.5
+        )
+
+    plt.title("Distribuição Geográfica: Percentual de Pedidos por Local", fontsize=20, pad=15)
+    plt.xlabel("Longitude", fontsize=12)
+    plt.ylabel("Latitude", fontsize=12)
+    plt.legend(title="Filiais", fontsize=10, loc='best', markerscale=0.5) # markerscale ajusta o tamanho na legenda
+    plt.grid(True, linestyle='--', alpha=0.5)
+    
+    # Adiciona anotação explicativa
+    plt.text(0.02, 0.02, 'O tamanho do ponto representa o % de vendas da loja naquele local', 
+             transform=plt.gca().transAxes, fontsize=10, 
+             bbox=dict(facecolor='white', alpha=0.8))
+             
+    plt.axis('equal') 
+    plt.tight_layout()
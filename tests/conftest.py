@@ -0,0 +1,32 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import challenge_alura_store as cas
+
+
+@pytest.fixture(scope="session")
+def base_sintetica(tmp_path_factory):
+    """Base sintética pequena (4 lojas), gravada uma vez por sessão: (diretório, {loja: arquivo})."""
+    diretorio = str(tmp_path_factory.mktemp("base"))
+    arquivos = cas.gerar_base_sintetica(diretorio, 6000, n_lojas=4, seed=7)
+    return diretorio, arquivos
+
+
+@pytest.fixture
+def lojas(base_sintetica):
+    """Lojas da base sintética carregadas com carregar_dados."""
+    diretorio, arquivos = base_sintetica
+    return cas.carregar_dados(fonte=diretorio, arquivos=arquivos)
+
+
+@pytest.fixture(autouse=True)
+def ambiente_isolado(tmp_path, monkeypatch):
+    """Cada teste roda em um diretório temporário (caches relativos) e sem gráficos."""
+    monkeypatch.chdir(tmp_path)
+    cas.desativar_graficos()
+    yield
+    cas._SAIDA_GRAFICOS["ativo"] = True
@@ -0,0 +1,110 @@
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+import agendador_alura_store as agendador
+import armazenamento_alura_store as armazenamento
+
+RELATORIOS = ["vendas", "frete", "produtos"]
+
+
+@pytest.fixture
+def base_copia(base_sintetica, tmp_path):
+    """Cópia da base sintética que o teste pode alterar."""
+    destino = tmp_path / "base"
+    shutil.copytree(base_sintetica[0], destino)
+    return str(destino)
+
+
+def _executar(diretorio, capsys, *opcoes):
+    agendador.main_cli(["--fonte", diretorio, "--sem-graficos", "--relatorios", *RELATORIOS, *opcoes])
+    return capsys.readouterr().out
+
+
+def _sem_linhas_de_carga(saida):
+    return [linha for linha in saida.splitlines() if linha.startswith("RELATÓRIO") or linha.startswith("R$")]
+
+
+def test_cache_desligado_por_padrao(base_copia, capsys):
+    saida = _executar(base_copia, capsys)
+    assert "Cache de resultados" not in saida
+    assert not os.path.exists(armazenamento.DIR_CACHE_RESULTADOS)
+
+
+def test_cache_reaproveita_e_informa(base_copia, capsys):
+    primeira = _executar(base_copia, capsys, "--cache")
+    assert ">>> Cache de resultados: 0/8 partes reaproveitadas (0/4 lojas sem leitura dos dados)." in primeira
+    segunda = _executar(base_copia, capsys, "--cache")
+    assert ">>> Cache de resultados: 8/8 partes reaproveitadas (4/4 lojas sem leitura dos dados)." in segunda
+    assert "VERIFICADOR DE DATAS" not in segunda
+    assert _sem_linhas_de_carga(segunda) == _sem_linhas_de_carga(primeira)
+
+
+def test_cache_invalidado_quando_o_csv_muda(base_copia, capsys):
+    _executar(base_copia, capsys, "--cache")
+    caminho = os.path.join(base_copia, "loja_2.csv")
+    df = pd.read_csv(caminho)
+    df.loc[0, "Preço"] += 1000.0
+    df.to_csv(caminho, index=False)
+
+    com_cache = _executar(base_copia, capsys, "--cache")
+    assert ">>> Cache de resultados: 6/8 partes reaproveitadas (3/4 lojas sem leitura dos dados)." in com_cache
+    assert "VERIFICADOR DE DATAS - Loja 2" in com_cache
+    sem_cache = _executar(base_copia, capsys)
+    assert _sem_linhas_de_carga(com_cache) == _sem_linhas_de_carga(sem_cache)
+
+
+def test_cache_resultados_limita_tamanho(tmp_path):
+    cache = armazenamento.CacheResultados(str(tmp_path / "resultados"), limite_bytes=0)
+    cache.guardar("a", pd.Series(range(100)))
+    assert cache.obter("a").tolist() == list(range(100))
+    assert cache.obter("b", "ausente") == "ausente"
+    assert cache.limitar() == 1
+    assert cache.obter("a") is None
+
+
+def test_chave_resultado_depende_dos_parametros(tmp_path):
+    caminho = tmp_path / "loja.csv"
+    caminho.write_text("a\n1\n")
+    impressao = armazenamento.impressao_arquivo(str(caminho))
+    assert armazenamento.chave_resultado("cubo", impressao) == armazenamento.chave_resultado("cubo", impressao)
+    assert armazenamento.chave_resultado("cubo", impressao) != armazenamento.chave_resultado("cubo", impressao, "2022-01-01")
+    caminho.write_text("a\n1\n2\n")
+    assert armazenamento.chave_resultado("cubo", armazenamento.impressao_arquivo(str(caminho))) != armazenamento.chave_resultado("cubo", impressao)
+
+
+def test_impressao_muda_com_regravacao_de_mesmo_tamanho_e_mtime(tmp_path):
+    caminho = tmp_path / "loja.csv"
+    caminho.write_text("a\n1\n")
+    impressao = armazenamento.impressao_arquivo(str(caminho))
+    info = os.stat(caminho)
+    caminho.write_text("a\n2\n")
+    os.utime(caminho, ns=(info.st_atime_ns, info.st_mtime_ns))  # como rsync / cp -p
+    assert os.path.getsize(caminho) == info.st_size
+    assert armazenamento.impressao_arquivo(str(caminho)) != impressao
+
+
+def test_copia_identica_em_outro_caminho_tem_a_mesma_impressao(tmp_path):
+    original = tmp_path / "loja.csv"
+    original.write_text("a\n1\n")
+    copia = tmp_path / "outra" / "loja_copiada.csv"
+    copia.parent.mkdir()
+    shutil.copyfile(original, copia)
+    assert armazenamento.impressao_arquivo(str(copia)) == armazenamento.impressao_arquivo(str(original))
+
+
+def test_hash_so_e_recalculado_quando_o_arquivo_muda(tmp_path, monkeypatch):
+    caminho = tmp_path / "loja.csv"
+    caminho.write_text("a\n1\n")
+    calculos = []
+    original = armazenamento._hash_conteudo
+    monkeypatch.setattr(armazenamento, "_hash_conteudo", lambda arquivo: calculos.append(arquivo) or original(arquivo))
+    armazenamento.impressao_arquivo(str(caminho))
+    armazenamento._IMPRESSOES["arquivo"] = None  # simula outra execução: relê o arquivo de impressões
+    armazenamento.impressao_arquivo(str(caminho))
+    assert len(calculos) == 1
+    caminho.write_text("a\n3\n")
+    armazenamento.impressao_arquivo(str(caminho))
+    assert len(calculos) == 2
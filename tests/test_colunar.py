@@ -0,0 +1,116 @@
+import json
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import challenge_alura_store as cas
+
+
+@pytest.fixture(scope="module")
+def dir_colunar(base_sintetica, tmp_path_factory):
+    diretorio, arquivos = base_sintetica
+    destino = str(tmp_path_factory.mktemp("colunar"))
+    cas.converter_para_colunar(destino, fonte=diretorio, arquivos=arquivos)
+    return destino
+
+
+def _como_texto(df):
+    """Categóricas e textos como object, para comparar com a leitura dos CSVs."""
+    df = df.copy()
+    for coluna in df.columns:
+        if isinstance(df[coluna].dtype, pd.CategoricalDtype) or pd.api.types.is_string_dtype(df[coluna]):
+            df[coluna] = df[coluna].astype(object).where(df[coluna].notna(), np.nan)
+    return df
+
+
+def _comparar_lojas(obtidas, esperadas):
+    assert list(obtidas) == list(esperadas)
+    for nome, df in esperadas.items():
+        pd.testing.assert_frame_equal(_como_texto(obtidas[nome]).reset_index(drop=True),
+                                      _como_texto(df).reset_index(drop=True))
+
+
+def test_colunar_igual_carregar_dados(dir_colunar, lojas):
+    colunares = cas.carregar_colunar(dir_colunar)
+    _comparar_lojas(colunares, lojas)
+    cubo = cas.construir_cubo(colunares)
+    cubo.index = cubo.index.set_levels(
+        [nivel.astype(str) if nivel.dtype == "category" else nivel for nivel in cubo.index.levels])
+    pd.testing.assert_frame_equal(cubo.sort_index(), cas.construir_cubo(lojas).sort_index(),
+                                  check_index_type=False)
+
+
+@pytest.mark.parametrize("coluna", ["Preço", "Categoria do Produto", "Produto"])
+def test_colunas_sao_mapeadas_sem_copia(dir_colunar, coluna):
+    serie = cas.carregar_colunar(dir_colunar)["Loja 1"][coluna]
+    valores = serie.cat.codes.to_numpy() if serie.dtype == "category" else serie.to_numpy()
+    bases, base = [], valores
+    while base is not None:
+        bases.append(base)
+        base = getattr(base, "base", None)
+    mapeados = [base for base in bases if isinstance(base, np.memmap)]
+    assert mapeados and np.shares_memory(valores, mapeados[0])
+    assert not valores.flags.writeable
+
+
+def test_abertura_nao_valida_os_codigos(dir_colunar, monkeypatch):
+    original = pd.Categorical.from_codes
+    chamadas = []
+    def from_codes(*args, **kwargs):
+        chamadas.append(kwargs.get("validate", True))
+        return original(*args, **kwargs)
+    monkeypatch.setattr(pd.Categorical, "from_codes", from_codes)
+    cas.carregar_colunar(dir_colunar)
+    assert chamadas and not any(chamadas)
+
+
+def test_filtros_iguais_aos_de_carregar_dados(dir_colunar, base_sintetica):
+    diretorio, arquivos = base_sintetica
+    filtros = {"inicio": "2021-03-01", "fim": "2022-02-28", "categorias": ["livros", "moveis"],
+               "colunas": ["Produto", "Preço", "Data da Compra", "Categoria do Produto"]}
+    esperadas = cas.carregar_dados(fonte=diretorio, arquivos=arquivos, **filtros)
+    _comparar_lojas(cas.carregar_colunar(dir_colunar, **filtros), esperadas)
+
+
+def test_pickle_reabre_os_mesmos_arquivos(dir_colunar):
+    colunares = cas.carregar_colunar(dir_colunar, lojas=["Loja 2"], colunas=["Preço"])
+    copia = pickle.loads(pickle.dumps(colunares))
+    assert isinstance(copia, cas.LojasColunares)
+    assert len(pickle.dumps(colunares)) < 1000
+    pd.testing.assert_frame_equal(copia["Loja 2"], colunares["Loja 2"])
+
+
+def test_formato_antigo_exige_nova_conversao(dir_colunar, tmp_path):
+    caminho = os.path.join(dir_colunar, cas.ARQUIVO_MANIFESTO_COLUNAR)
+    with open(caminho, encoding="utf-8") as arquivo:
+        manifesto = json.load(arquivo)
+    antigo = tmp_path / "antigo"
+    antigo.mkdir()
+    with open(antigo / cas.ARQUIVO_MANIFESTO_COLUNAR, "w", encoding="utf-8") as arquivo:
+        json.dump({**manifesto, "versao": cas.VERSAO_COLUNAR - 1}, arquivo)
+    with pytest.raises(ValueError, match="formato antigo"):
+        cas.carregar_colunar(str(antigo))
+
+
+def test_so_lojas_com_dicionario_diferente_sao_regravadas(base_sintetica, tmp_path, monkeypatch):
+    diretorio, _ = base_sintetica
+    df = pd.read_csv(os.path.join(diretorio, "loja_1.csv"))
+    (tmp_path / "base").mkdir()
+    df.to_csv(tmp_path / "base" / "loja_1.csv", index=False)
+    df.to_csv(tmp_path / "base" / "loja_2.csv", index=False)
+    df[df["Categoria do Produto"] != "livros"].to_csv(tmp_path / "base" / "loja_3.csv", index=False)
+    arquivos = {f"Loja {i}": f"loja_{i}.csv" for i in (1, 2, 3)}
+    gravacoes = []
+    original = cas._salvar_array
+    monkeypatch.setattr(cas, "_salvar_array", lambda caminho, valores: (gravacoes.append(caminho),
+                                                                        original(caminho, valores)))
+    destino = str(tmp_path / "colunar")
+    cas.converter_para_colunar(destino, fonte=str(tmp_path / "base"), arquivos=arquivos)
+
+    regravados = {caminho for caminho in gravacoes if gravacoes.count(caminho) > 1}
+    assert regravados and all(os.sep + "loja_3" + os.sep in caminho for caminho in regravados)
+    _comparar_lojas(cas.carregar_colunar(destino),
+                    cas.carregar_dados(fonte=str(tmp_path / "base"), arquivos=arquivos))
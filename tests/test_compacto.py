@@ -0,0 +1,32 @@
+import pandas as pd
+
+import challenge_alura_store as cas
+
+
+def test_compactar_lojas_preserva_os_dados(lojas):
+    compactas = cas.compactar_lojas(lojas)
+    assert isinstance(compactas, cas.LojasCombinadas)
+    assert list(compactas) == list(lojas)
+    for nome_loja, df in lojas.items():
+        fatia = compactas[nome_loja]
+        assert list(fatia.index) == list(df.index)
+        for coluna in df.columns:
+            pd.testing.assert_series_equal(fatia[coluna].astype(df[coluna].dtype), df[coluna],
+                                           check_categorical=False)
+
+
+def test_compactas_dao_o_mesmo_cubo(lojas):
+    compacto = cas.construir_cubo(cas.compactar_lojas(lojas))
+    compacto.index = compacto.index.set_levels(
+        [nivel.astype(str) if nivel.dtype == "category" else nivel for nivel in compacto.index.levels])
+    pd.testing.assert_frame_equal(compacto, cas.construir_cubo(lojas), check_index_type=False)
+
+
+def test_lojas_combinadas_fatias_sem_copia():
+    combinado = pd.concat({"B": pd.DataFrame({"x": [1, 2]}), "A": pd.DataFrame({"x": [3]}),
+                           "C": pd.DataFrame({"x": [4, 5, 6]})})
+    lojas = cas.LojasCombinadas(combinado)
+    assert list(lojas) == ["B", "A", "C"]
+    assert {nome: list(df["x"]) for nome, df in lojas.items()} == {"B": [1, 2], "A": [3], "C": [4, 5, 6]}
+    assert cas.combinar_lojas(lojas) is combinado
+    assert len(cas.LojasCombinadas(combinado.iloc[:0])) == 0
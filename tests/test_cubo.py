@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+import challenge_alura_store as cas
+
+
+def _combinado(lojas):
+    df = pd.concat(lojas.values(), keys=list(lojas))
+    return df.assign(Loja=df.index.get_level_values(0))
+
+
+def test_vendas_por_loja_igual_groupby(lojas):
+    df = _combinado(lojas)
+    vendas = cas.calcular_vendas_por_loja(cas.construir_cubo(lojas))
+
+    esperado = df.groupby("Loja")["Preço"].sum()
+    pd.testing.assert_series_equal(vendas["total"], esperado, check_names=False)
+
+    esperado = df.groupby(["Loja", df["Data da Compra"].dt.year])["Preço"].sum()
+    np.testing.assert_allclose(vendas["anual"].to_numpy(), esperado.to_numpy())
+
+    esperado = df.groupby(["Loja", df["Data da Compra"].dt.to_period("M")])["Preço"].sum()
+    assert list(vendas["mensal"].index) == list(esperado.index)
+    np.testing.assert_allclose(vendas["mensal"].to_numpy(), esperado.to_numpy())
+
+
+def test_categorias_e_medias_iguais_groupby(lojas):
+    df = _combinado(lojas)
+    cubo = cas.construir_cubo(lojas)
+
+    esperado = df.groupby(["Loja", "Categoria do Produto"])["Preço"].sum()
+    obtido = cas.consultar_cubo(cubo, ["Loja", "Categoria do Produto"])
+    pd.testing.assert_series_equal(obtido, esperado, check_names=False)
+
+    esperado = df.groupby(["Loja", "Categoria do Produto"])["Avaliação da compra"].mean()
+    obtido = cas.consultar_cubo(cubo, ["Loja", "Categoria do Produto"], "Avaliação da compra", "media")
+    pd.testing.assert_series_equal(obtido, esperado, check_names=False)
+
+    esperado = df.groupby("Loja")["Frete"].mean().sort_values(ascending=False)
+    pd.testing.assert_series_equal(cas.calcular_frete_medio(cubo), esperado, check_names=False)
+
+
+def test_contagem_de_produtos_igual_groupby(lojas):
+    df = _combinado(lojas)
+    esperado = df.groupby(["Loja", "Produto"]).size()
+    obtido = cas.contar_produtos(lojas).sort_index()
+    pd.testing.assert_series_equal(obtido, esperado, check_names=False)
+
+
+def test_somar_cubos_parciais_igual_cubo_unico(lojas):
+    nomes = list(lojas)
+    parciais = [cas.construir_cubo({nome: lojas[nome]}) for nome in nomes]
+    pd.testing.assert_frame_equal(cas._somar_cubos(parciais), cas.construir_cubo(lojas))
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+import challenge_alura_store as cas
+
+
+def _serie_datas():
+    rng = np.random.default_rng(11)
+    validas = pd.date_range("2020-01-01", "2023-12-31", freq="D").strftime("%d/%m/%Y")
+    valores = rng.choice(validas, 3000).astype(object)
+    valores[[5, 50, 500]] = ["32/13/2021", "data", "29/02/2021"]
+    valores[[7, 70]] = np.nan
+    valores[9] = " 15/03/2022 "
+    return pd.Series(valores, index=np.arange(3000) * 2 + 100, name="Data da Compra")
+
+
+def test_converter_datas_igual_to_datetime():
+    serie = _serie_datas()
+    datas, linhas_invalidas = cas.converter_datas(serie)
+
+    esperado = pd.to_datetime(serie.str.strip(), format="%d/%m/%Y", errors="coerce")
+    pd.testing.assert_series_equal(datas, esperado)
+    assert list(linhas_invalidas) == list(serie.index[esperado.isna()])
+    assert datas.loc[serie.index[9]] == pd.Timestamp("2022-03-15")
+
+
+def test_verificador_lista_linhas_invalidas(capsys):
+    serie = _serie_datas()
+    df = serie.to_frame()
+    datas = cas.verificar_e_converter_datas(df, "Loja X", max_exemplos=2)
+
+    saida = capsys.readouterr().out
+    assert "VERIFICADOR DE DATAS - Loja X" in saida
+    assert "5 datas inválidas" in saida
+    assert "32/13/2021" in saida and "... e mais 3 linhas." in saida
+    assert datas.isna().sum() == 5
+
+
+def test_verificador_sem_datas_invalidas(lojas, capsys):
+    df = lojas["Loja 1"].assign(**{"Data da Compra": lojas["Loja 1"]["Data da Compra"].dt.strftime("%d/%m/%Y")})
+    datas = cas.verificar_e_converter_datas(df, "Loja 1")
+    assert "Todas as datas foram convertidas" in capsys.readouterr().out
+    pd.testing.assert_series_equal(datas, lojas["Loja 1"]["Data da Compra"], check_dtype=False)
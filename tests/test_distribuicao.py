@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import challenge_alura_store as cas
+
+QUANTIS = (0.01, 0.25, 0.5, 0.9, 0.99)
+
+
+@pytest.fixture
+def lojas_cauda_longa():
+    rng = np.random.default_rng(3)
+    lojas = {}
+    for i, n in enumerate([5000, 800, 1]):
+        lojas[f"Loja {i + 1}"] = pd.DataFrame({
+            "Categoria do Produto": rng.choice(["moveis", "livros"], n),
+            "Preço": np.round(rng.lognormal(5, 2, n), 2),
+            "Frete": np.round(rng.exponential(30, n), 2),
+            "Avaliação da compra": rng.integers(1, 6, n).astype(float),
+        })
+    return lojas
+
+
+def _verificar_erro(percentis, valores_por_grupo, coluna):
+    for grupo, valores in valores_por_grupo:
+        linha = percentis.loc[grupo + (coluna,)] if grupo else percentis.loc[coluna]
+        assert linha["Vendas"] == len(valores)
+        for quantil in QUANTIS:
+            exato = np.quantile(valores, quantil, method="lower")
+            estimado = linha[f"p{quantil * 100:g}"]
+            if coluna == "Avaliação da compra":
+                assert estimado == exato
+            elif abs(exato) < cas.VALOR_MINIMO_DISTRIBUICAO:
+                assert abs(estimado) < cas.VALOR_MINIMO_DISTRIBUICAO
+            else:
+                assert abs(estimado - exato) <= cas.PRECISAO_DISTRIBUICAO * abs(exato) + 1e-9
+
+
+@pytest.mark.parametrize("coluna", ["Preço", "Frete", "Avaliação da compra"])
+def test_percentis_dentro_do_erro_relativo(lojas_cauda_longa, coluna):
+    distribuicao = cas.construir_distribuicao(lojas_cauda_longa)
+    todas = pd.concat(lojas_cauda_longa.values())
+
+    gerais = cas.calcular_percentis(distribuicao, (), QUANTIS)
+    _verificar_erro(gerais, [((), todas[coluna].to_numpy())], coluna)
+
+    por_loja = cas.calcular_percentis(distribuicao, ("Loja",), QUANTIS)
+    _verificar_erro(por_loja, [((nome,), df[coluna].to_numpy()) for nome, df in lojas_cauda_longa.items()], coluna)
+
+    por_categoria = cas.calcular_percentis(distribuicao, ("Loja", "Categoria do Produto"), QUANTIS)
+    grupos = [((nome, categoria), grupo[coluna].to_numpy())
+              for nome, df in lojas_cauda_longa.items()
+              for categoria, grupo in df.groupby("Categoria do Produto")]
+    _verificar_erro(por_categoria, grupos, coluna)
+
+
+def test_mesclar_sketches_igual_sketch_unico(lojas_cauda_longa):
+    partes = [cas.construir_distribuicao({nome: df}) for nome, df in lojas_cauda_longa.items()]
+    mesclado = cas._somar_distribuicoes(partes[::-1])
+    pd.testing.assert_frame_equal(mesclado.sort_index(),
+                                  cas.construir_distribuicao(lojas_cauda_longa).sort_index())
+
+
+def test_percentis_dos_dados_de_exemplo(lojas):
+    distribuicao = cas.construir_distribuicao(lojas)
+    percentis = cas.calcular_percentis(distribuicao, ("Loja",), QUANTIS)
+    _verificar_erro(percentis, [((nome,), df["Preço"].dropna().to_numpy()) for nome, df in lojas.items()], "Preço")
@@ -0,0 +1,102 @@
+import hashlib
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+import challenge_alura_store as cas
+
+
+class _Servidor(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, diretorio):
+        super().__init__(("127.0.0.1", 0), _Manipulador)
+        self.diretorio = diretorio
+        self.respostas = []
+        self.falhas = {}
+
+
+class _Manipulador(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        nome = os.path.basename(self.path)
+        if self.server.falhas.get(nome, 0) > 0:
+            self.server.falhas[nome] -= 1
+            return self._responder(503, b"")
+        with open(os.path.join(self.server.diretorio, nome), "rb") as arquivo:
+            corpo = arquivo.read()
+        etag = '"' + hashlib.sha256(corpo).hexdigest()[:16] + '"'
+        if self.headers.get("If-None-Match") == etag:
+            return self._responder(304, b"", etag)
+        self._responder(200, corpo, etag)
+
+    def _responder(self, status, corpo, etag=None):
+        self.server.respostas.append((os.path.basename(self.path), status))
+        self.send_response(status)
+        if etag: self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def servidor(base_sintetica):
+    diretorio, _ = base_sintetica
+    servidor = _Servidor(diretorio)
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def _url(servidor):
+    return f"http://127.0.0.1:{servidor.server_address[1]}/base"
+
+
+def test_diretorio_local_dispensa_download(base_sintetica):
+    diretorio, arquivos = base_sintetica
+    caminhos = cas.obter_arquivos_lojas(diretorio, arquivos=arquivos)
+    assert caminhos == {nome: os.path.join(diretorio, arquivo) for nome, arquivo in arquivos.items()}
+
+
+def test_download_e_reaproveitamento_do_cache(servidor, base_sintetica, tmp_path, lojas):
+    _, arquivos = base_sintetica
+    cache = str(tmp_path / "cache")
+    baixadas = cas.carregar_dados(fonte=_url(servidor), dir_cache=cache, arquivos=arquivos)
+    assert sorted(status for _, status in servidor.respostas) == [200] * len(arquivos)
+    for nome, df in lojas.items():
+        pd.testing.assert_frame_equal(baixadas[nome], df)
+
+    servidor.respostas.clear()
+    caminhos = cas.obter_arquivos_lojas(_url(servidor), dir_cache=cache, arquivos=arquivos)
+    assert sorted(status for _, status in servidor.respostas) == [304] * len(arquivos)
+    assert all(os.path.dirname(caminho) == cache for caminho in caminhos.values())
+
+
+def test_falhas_temporarias_sao_repetidas(servidor, base_sintetica, tmp_path, monkeypatch):
+    _, arquivos = base_sintetica
+    monkeypatch.setattr(cas.time, "sleep", lambda segundos: None)
+    servidor.falhas = {"loja_1.csv": 2}
+    caminhos = cas.obter_arquivos_lojas(_url(servidor), dir_cache=str(tmp_path), arquivos=arquivos)
+    assert set(caminhos) == set(arquivos)
+    assert [status for nome, status in servidor.respostas if nome == "loja_1.csv"] == [503, 503, 200]
+
+
+def test_servidor_fora_do_ar_usa_copia_em_cache(servidor, base_sintetica, tmp_path, monkeypatch, capsys):
+    _, arquivos = base_sintetica
+    monkeypatch.setattr(cas.time, "sleep", lambda segundos: None)
+    cache = str(tmp_path)
+    cas.obter_arquivos_lojas(_url(servidor), dir_cache=cache, arquivos=arquivos)
+
+    servidor.falhas = {arquivo: 3 for arquivo in arquivos.values()}
+    caminhos = cas.obter_arquivos_lojas(_url(servidor), dir_cache=cache, arquivos=arquivos)
+    assert set(caminhos) == set(arquivos)
+    assert "cache (offline)" in capsys.readouterr().out
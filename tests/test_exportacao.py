@@ -0,0 +1,51 @@
+import json
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+import challenge_alura_store as cas
+
+
+def test_formatar_reais_igual_fstring():
+    valores = [0.0, 0.005, 0.015, 0.125, 2.675, -0.005, -1234.565, 999.995, 1e15 + 0.5,
+               1234567.891, -98765.4321, 0.994999, -0.0, -0.001, 9.995, 1e17 + 8, 1e20, -np.inf, np.inf,
+               np.nan]
+    rng = np.random.default_rng(0)
+    valores += list(rng.uniform(-1e7, 1e7, 500)) + list(np.round(rng.uniform(0, 1000, 500), 3))
+    valores += list(np.round(rng.uniform(-1e6, 1e6, 2000), 3)) + list(rng.integers(0, 10**6, 500) / 200)
+    serie = pd.Series(valores)
+    assert list(cas.formatar_reais(serie)) == [f"R$ {x:,.2f}" for x in valores]
+
+
+def test_formatar_reais_sem_chamada_por_celula(monkeypatch):
+    chamadas = []
+    monkeypatch.setattr(cas, "Decimal", lambda valor: chamadas.append(valor) or Decimal(valor))
+    serie = pd.Series(np.round(np.random.default_rng(1).uniform(0, 1e5, 10_000), 2))
+    esperado = [f"R$ {x:,.2f}" for x in serie]
+    monkeypatch.setattr(pd.Series, "map", None)
+    monkeypatch.setattr(pd.Series, "apply", None)
+    assert list(cas.formatar_reais(serie)) == esperado
+    assert len(chamadas) == 0
+
+
+def test_formatar_reais_dataframe_mantem_indice():
+    df = pd.DataFrame({"Loja 1": [1.5, 2.0], "Loja 2": [1000.0, np.nan]}, index=["a", "b"])
+    formatado = cas.formatar_reais(df)
+    assert list(formatado.index) == ["a", "b"]
+    assert formatado.loc["a", "Loja 2"] == "R$ 1,000.00"
+    assert formatado.loc["b", "Loja 2"] == "R$ nan"
+
+
+def test_exportar_tabela_grava_valores_numericos(tmp_path):
+    cas.configurar_exportacao(str(tmp_path / "tabelas"), ("csv", "json"))
+    try:
+        cas.exportar_tabela(pd.Series([1.25, 2.5], index=pd.Index(["Loja 1", "Loja 2"], name="Loja"),
+                                      name="Preço"), "vendas_total_por_loja")
+    finally:
+        arquivos = cas.finalizar_exportacao()
+    assert len(arquivos) == 2
+    tabela = pd.read_csv(tmp_path / "tabelas" / "vendas_total_por_loja.csv")
+    assert list(tabela["Preço"]) == [1.25, 2.5]
+    with open(tmp_path / "tabelas" / "vendas_total_por_loja.json", encoding="utf-8") as arquivo:
+        assert json.load(arquivo)
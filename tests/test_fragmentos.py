@@ -0,0 +1,49 @@
+import os
+
+import pandas as pd
+import pytest
+
+import challenge_alura_store as cas
+
+
+def _comparar(obtido, esperado):
+    pd.testing.assert_frame_equal(obtido["cubo"].sort_index(), esperado["cubo"].sort_index())
+    pd.testing.assert_series_equal(obtido["produtos"].sort_index(), esperado["produtos"].sort_index(),
+                                   check_names=False)
+    pd.testing.assert_frame_equal(obtido["distribuicao"].sort_index(), esperado["distribuicao"].sort_index())
+    assert obtido["linhas"] == esperado["linhas"]
+
+
+def test_fragmentos_cobrem_o_arquivo_em_inicios_de_linha(base_sintetica):
+    diretorio, arquivos = base_sintetica
+    caminhos = {nome: os.path.join(diretorio, arquivo) for nome, arquivo in arquivos.items()}
+    fragmentos = cas.fragmentar_arquivos(caminhos, tamanho_fragmento=20_000)
+
+    for nome_loja, caminho in caminhos.items():
+        da_loja = [f for f in fragmentos if f["loja"] == nome_loja]
+        with open(caminho, "rb") as arquivo:
+            conteudo = arquivo.read()
+        assert da_loja[0]["inicio"] == conteudo.index(b"\n") + 1
+        assert da_loja[-1]["fim"] == len(conteudo)
+        for anterior, atual in zip(da_loja, da_loja[1:]):
+            assert anterior["fim"] == atual["inicio"]
+            assert conteudo[atual["inicio"] - 1:atual["inicio"]] == b"\n"
+
+
+@pytest.mark.parametrize("max_workers", [0, 2])
+def test_fragmentado_igual_agregacao_em_blocos(base_sintetica, max_workers):
+    diretorio, arquivos = base_sintetica
+    esperado = cas.carregar_agregados_em_blocos(diretorio, arquivos=arquivos)
+    obtido = cas.carregar_agregados_fragmentados(diretorio, tamanho_fragmento=20_000,
+                                                 max_workers=max_workers, tamanho_bloco=300,
+                                                 arquivos=arquivos)
+    _comparar(obtido, esperado)
+
+
+def test_fragmentado_com_filtros_igual_agregacao_em_blocos(base_sintetica):
+    diretorio, arquivos = base_sintetica
+    filtros = {"inicio": "2021-01-01", "fim": "2021-12-31", "categorias": ["eletronicos"]}
+    esperado = cas.carregar_agregados_em_blocos(diretorio, arquivos=arquivos, **filtros)
+    obtido = cas.carregar_agregados_fragmentados(diretorio, tamanho_fragmento=15_000, max_workers=0,
+                                                 arquivos=arquivos, **filtros)
+    _comparar(obtido, esperado)
@@ -0,0 +1,71 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import agendador_alura_store as agendador
+import challenge_alura_store as cas
+import geo_alura_store as geo
+
+
+@pytest.fixture
+def base_sem_locais(base_sintetica, tmp_path):
+    """Cópia da base sintética sem lojas.csv (sem a localização das lojas)."""
+    destino = tmp_path / "base_sem_locais"
+    shutil.copytree(base_sintetica[0], destino, ignore=shutil.ignore_patterns(cas.ARQUIVO_LOCAIS_LOJAS))
+    return str(destino)
+
+
+def test_execucao_padrao_sem_locais_omite_frete_distancia(base_sem_locais, capsys):
+    agendador.executar_relatorios(fonte=base_sem_locais)
+    saida = capsys.readouterr().out
+    assert "EFICIÊNCIA DO FRETE" not in saida
+    assert "localização das lojas não encontrada" not in saida
+    assert "FRETE MÉDIO POR LOJA" in saida
+
+
+def test_frete_distancia_pedido_sem_locais_avisa(base_sem_locais, capsys):
+    agendador.executar_relatorios(["frete_distancia"], fonte=base_sem_locais)
+    saida = capsys.readouterr().out
+    assert "localização das lojas não encontrada" in saida
+    assert "Sem localização das lojas: análise não executada." in saida
+
+
+def test_execucao_padrao_com_locais_inclui_frete_distancia(base_sintetica, capsys):
+    agendador.executar_relatorios(fonte=base_sintetica[0])
+    saida = capsys.readouterr().out
+    assert "EFICIÊNCIA DO FRETE" in saida
+    assert "Sem localização das lojas" not in saida
+
+
+@pytest.mark.parametrize("n_lojas", [1, 4, 300])
+def test_arvore_lojas_igual_forca_bruta(n_lojas):
+    rng = np.random.default_rng(n_lojas)
+    lat_lojas, lon_lojas = rng.uniform(-33, 5, n_lojas), rng.uniform(-73, -35, n_lojas)
+    lat = np.r_[rng.uniform(-34, 5.5, 5000), 40.0, np.nan]  # um ponto fora do Brasil e um sem GPS
+    lon = np.r_[rng.uniform(-74, -28.5, 5000), -3.0, -50.0]
+    indices, distancias = geo.ArvoreLojas(lat_lojas, lon_lojas).mais_proxima(lat, lon, tamanho_bloco=1000)
+
+    d = geo.distancia_haversine_km(lat[:-1, None], lon[:-1, None], lat_lojas[None, :], lon_lojas[None, :])
+    np.testing.assert_allclose(distancias[:-1], d.min(axis=1))
+    assert (d[np.arange(len(d)), indices[:-1]] == d.min(axis=1)).all()
+    assert indices[-1] == -1 and np.isnan(distancias[-1])
+
+
+def test_eficiencia_por_loja_igual_groupby(lojas, base_sintetica):
+    locais = cas.configurar_locais_lojas(base_sintetica[0])
+    somas = cas.calcular_frete_distancia(lojas, locais)
+    por_loja = cas.calcular_eficiencia_frete(somas, ["Loja"])
+
+    df = pd.concat(lojas.values(), keys=list(lojas))
+    nomes = df.index.get_level_values(0)
+    distancia = geo.distancia_haversine_km(df["lat"], df["lon"], locais.loc[nomes, "lat"].to_numpy(),
+                                           locais.loc[nomes, "lon"].to_numpy())
+    grupos = pd.DataFrame({"frete": df["Frete"].to_numpy(), "distancia": np.asarray(distancia)}, index=nomes)
+    esperado = grupos.groupby(level=0).mean()
+    np.testing.assert_allclose(por_loja.loc[esperado.index, "Frete médio"], esperado["frete"])
+    np.testing.assert_allclose(somas["pedidos"].groupby(level="Loja").sum()[esperado.index],
+                               grupos.groupby(level=0).size())
+    assert np.isclose(somas["distancia"].sum(), np.sum(distancia))
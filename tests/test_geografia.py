@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import geo_alura_store as geo
+
+
+@pytest.fixture
+def pontos():
+    rng = np.random.default_rng(5)
+    lat = np.concatenate([rng.normal(-23.5, 1.0, 3000), rng.uniform(-33, 5, 1000)])
+    lon = np.concatenate([rng.normal(-46.6, 1.0, 3000), rng.uniform(-73, -35, 1000)])
+    lat[[10, 20]] = np.nan
+    lon[30] = np.nan
+    return lat, lon
+
+
+def test_celulas_de_grade_iguais_ao_groupby(pontos):
+    lat, lon = (v[~np.isnan(pontos[0]) & ~np.isnan(pontos[1])] for v in pontos)
+    celulas = geo.agregar_celulas(lat, lon, tamanho_celula=0.5)
+
+    df = pd.DataFrame({"lat": lat, "lon": lon})
+    esperado = df.groupby([np.floor(lat / 0.5), np.floor(lon / 0.5)]).agg(
+        lat=("lat", "mean"), lon=("lon", "mean"), contagem=("lat", "size"))
+    obtido = celulas.sort_values(["lat", "lon"]).reset_index(drop=True)
+    esperado = esperado.sort_values(["lat", "lon"]).reset_index(drop=True)
+    pd.testing.assert_frame_equal(obtido, esperado, check_dtype=False)
+
+
+def test_hexagono_e_o_de_centro_mais_proximo(pontos):
+    validos = ~np.isnan(pontos[0]) & ~np.isnan(pontos[1])
+    lat, lon = pontos[0][validos], pontos[1][validos]
+    tamanho = 0.3
+    q, r = geo._indices_celula(lat, lon, tamanho, "hex")
+
+    def centro(q, r):
+        return tamanho * 1.5 * r, tamanho * np.sqrt(3) * (q + r / 2)
+
+    lat_c, lon_c = centro(q, r)
+    distancia = np.hypot(lat - lat_c, lon - lon_c)
+    for dq, dr in [(1, 0), (-1, 0), (0, 1), (0, -1), (1, -1), (-1, 1)]:
+        lat_v, lon_v = centro(q + dq, r + dr)
+        assert np.all(distancia <= np.hypot(lat - lat_v, lon - lon_v) + 1e-9)
+    assert geo.agregar_celulas(lat, lon, tamanho, "hex")["contagem"].sum() == len(lat)
+
+
+def test_tipo_de_celula_invalido():
+    with pytest.raises(ValueError):
+        geo.agregar_celulas([0.0], [0.0], tipo="triangulo")
+
+
+@pytest.mark.parametrize("tamanho_celula", [0.1, 0.5, 3.0])
+def test_consultas_do_indice_iguais_forca_bruta(pontos, tamanho_celula):
+    lat, lon = pontos
+    indice = geo.IndiceEspacial(lat, lon, tamanho_celula)
+    assert len(indice) == len(lat) - 3
+
+    for centro_lat, centro_lon, raio in [(-23.5, -46.6, 50), (-23.5, -46.6, 300), (-10, -50, 800), (40, 0, 100)]:
+        distancias = geo.distancia_haversine_km(centro_lat, centro_lon, lat, lon)
+        esperado = np.flatnonzero(distancias <= raio)
+        assert sorted(indice.consultar_raio(centro_lat, centro_lon, raio)) == list(esperado)
+
+    dentro = (lat >= -25) & (lat <= -22) & (lon >= -48) & (lon <= -45)
+    assert sorted(indice.consultar_retangulo(-25, -22, -48, -45)) == list(np.flatnonzero(dentro))
+
+
+def test_haversine_distancia_conhecida():
+    # São Paulo -> Rio de Janeiro, cerca de 361 km
+    assert geo.distancia_haversine_km(-23.5505, -46.6333, -22.9068, -43.1729) == pytest.approx(361, abs=3)
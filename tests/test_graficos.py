@@ -0,0 +1,54 @@
+import os
+
+import pandas as pd
+import pytest
+
+import agendador_alura_store as agendador
+import challenge_alura_store as cas
+
+
+@pytest.fixture
+def graficos_ativos():
+    cas._SAIDA_GRAFICOS["ativo"] = True
+
+
+def _vendas_anuais():
+    return pd.Series([1000.0, 2500.0], index=pd.Index([2021, 2022], name="Data da Compra"))
+
+
+def test_nome_arquivo_sem_acentos():
+    assert cas._nome_arquivo("Vendas Anuais - Loja 1 (Média Móvel)") == "vendas_anuais_loja_1_media_movel"
+
+
+@pytest.mark.parametrize("max_workers", [0, 1])
+def test_modo_headless_salva_cada_formato(graficos_ativos, tmp_path, max_workers):
+    cas.configurar_saida_graficos(str(tmp_path), formatos=("png", "svg"), max_workers=max_workers)
+    cas.exibir_grafico("grafico_vendas_anuais_loja", "Vendas Anuais Loja 1", _vendas_anuais(), "Loja 1")
+    arquivos = cas.finalizar_graficos()
+
+    assert sorted(os.path.basename(arquivo) for arquivo in arquivos) == [
+        "vendas_anuais_loja_1.png", "vendas_anuais_loja_1.svg"]
+    assert all(os.path.getsize(arquivo) > 0 for arquivo in arquivos)
+    assert cas._SAIDA_GRAFICOS["dir"] is None and cas._SAIDA_GRAFICOS["executor"] is None
+
+
+@pytest.mark.parametrize("max_workers", [0, 1])
+def test_erro_de_um_grafico_nao_interrompe_os_demais(graficos_ativos, tmp_path, capsys, max_workers):
+    cas.configurar_saida_graficos(str(tmp_path), max_workers=max_workers)
+    cas.exibir_grafico("grafico_vendas_anuais_loja", "Quebrado", None, "Loja 1")
+    cas.exibir_grafico("grafico_vendas_anuais_loja", "Vendas Anuais Loja 2", _vendas_anuais(), "Loja 2")
+    arquivos = cas.finalizar_graficos()
+
+    assert [os.path.basename(arquivo) for arquivo in arquivos] == ["vendas_anuais_loja_2.png"]
+    assert "Erro ao renderizar gráfico" in capsys.readouterr().out
+
+
+def test_cli_com_graficos_gera_arquivos(graficos_ativos, base_sintetica, tmp_path, capsys):
+    diretorio, _ = base_sintetica
+    destino = tmp_path / "graficos"
+    agendador.main_cli(["--fonte", diretorio, "--relatorios", "vendas", "--graficos", str(destino)])
+
+    saida = capsys.readouterr().out
+    gerados = sorted(os.listdir(destino))
+    assert f"{len(gerados)} arquivos de gráficos salvos em {destino}" in saida
+    assert "vendas_anuais_loja_1.png" in gerados
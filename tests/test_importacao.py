@@ -0,0 +1,59 @@
+import os
+import re
+import subprocess
+import sys
+
+import challenge_alura_store as cas
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _executar(codigo):
+    ambiente = {**os.environ, "PYTHONPATH": RAIZ}
+    return subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True,
+                          env=ambiente, check=True).stdout
+
+
+def _modulos_apos_importar(modulo):
+    return set(_executar(f"import sys, {modulo}; print(' '.join(sorted(sys.modules)))").split())
+
+
+def test_nucleo_de_calculo_nao_importa_matplotlib():
+    modulos = _modulos_apos_importar("challenge_alura_store")
+    assert "matplotlib" not in modulos
+    assert "graficos_alura_store" not in modulos
+
+
+def test_camada_de_armazenamento_nao_importa_o_nucleo():
+    modulos = _modulos_apos_importar("armazenamento_alura_store")
+    assert "challenge_alura_store" not in modulos
+    assert "matplotlib" not in modulos
+
+
+def test_camada_geografica_nao_importa_o_nucleo():
+    modulos = _modulos_apos_importar("geo_alura_store")
+    assert "challenge_alura_store" not in modulos
+    assert "matplotlib" not in modulos
+
+
+def test_agendador_nao_importa_matplotlib():
+    assert "matplotlib" not in _modulos_apos_importar("agendador_alura_store")
+
+
+def test_camada_de_graficos_importa_matplotlib():
+    assert "matplotlib" in _modulos_apos_importar("graficos_alura_store")
+
+
+def test_relatorios_sem_graficos_nao_carregam_matplotlib(base_sintetica):
+    diretorio, _ = base_sintetica
+    codigo = ("import sys, agendador_alura_store as a; "
+              f"a.main_cli(['--fonte', {diretorio!r}, '--sem-graficos']); "
+              "print('matplotlib' in sys.modules)")
+    assert _executar(codigo).split()[-1] == "False"
+
+
+def test_graficos_pedidos_existem_na_camada_de_graficos():
+    with open(cas.__file__, encoding="utf-8") as arquivo:
+        pedidos = set(re.findall(r'exibir_grafico\(\s*"(grafico_\w+)"', arquivo.read()))
+    graficos = cas._modulo_graficos()
+    assert pedidos and all(callable(getattr(graficos, nome, None)) for nome in pedidos)
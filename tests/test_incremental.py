@@ -0,0 +1,100 @@
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+import challenge_alura_store as cas
+
+
+@pytest.fixture
+def base_copiada(base_sintetica, tmp_path):
+    diretorio, arquivos = base_sintetica
+    destino = tmp_path / "base"
+    shutil.copytree(diretorio, destino)
+    return str(destino), arquivos
+
+
+def _completo(diretorio, arquivos):
+    return cas.carregar_agregados_em_blocos(diretorio, arquivos=arquivos)
+
+
+def _comparar(obtido, esperado):
+    pd.testing.assert_frame_equal(obtido["cubo"].sort_index(), esperado["cubo"].sort_index())
+    pd.testing.assert_series_equal(obtido["produtos"].sort_index(), esperado["produtos"].sort_index(),
+                                   check_names=False)
+    pd.testing.assert_frame_equal(obtido["distribuicao"].sort_index(), esperado["distribuicao"].sort_index())
+
+
+def test_linhas_acrescentadas_igual_recalculo_completo(base_copiada, tmp_path):
+    diretorio, arquivos = base_copiada
+    estado = str(tmp_path / "estado.pkl")
+    caminho = os.path.join(diretorio, arquivos["Loja 1"])
+    with open(caminho, "rb") as arquivo:
+        linhas = arquivo.readlines()
+    corte = len(linhas) // 2
+    with open(caminho, "wb") as arquivo:
+        arquivo.writelines(linhas[:corte])
+
+    cas.atualizar_agregados_incrementais(diretorio, arquivo_estado=estado, tamanho_bloco=200, arquivos=arquivos)
+    with open(caminho, "ab") as arquivo:
+        arquivo.writelines(linhas[corte:])
+    agregados = cas.atualizar_agregados_incrementais(diretorio, arquivo_estado=estado, tamanho_bloco=200,
+                                                     arquivos=arquivos)
+
+    _comparar(agregados, _completo(diretorio, arquivos))
+    assert agregados["linhas"]["Loja 1"] == len(linhas) - 1
+
+
+def test_execucao_sem_mudancas_nao_le_linhas_novas(base_copiada, tmp_path, capsys):
+    diretorio, arquivos = base_copiada
+    estado = str(tmp_path / "estado.pkl")
+    primeira = cas.atualizar_agregados_incrementais(diretorio, arquivo_estado=estado, arquivos=arquivos)
+    capsys.readouterr()
+    segunda = cas.atualizar_agregados_incrementais(diretorio, arquivo_estado=estado, arquivos=arquivos)
+
+    assert "Loja 1: 0 linhas novas" in capsys.readouterr().out
+    _comparar(segunda, primeira)
+
+
+def test_arquivo_reescrito_e_recalculado(base_copiada, tmp_path, capsys):
+    diretorio, arquivos = base_copiada
+    estado = str(tmp_path / "estado.pkl")
+    cas.atualizar_agregados_incrementais(diretorio, arquivo_estado=estado, arquivos=arquivos)
+
+    caminho = os.path.join(diretorio, arquivos["Loja 2"])
+    df = pd.read_csv(caminho)
+    df.loc[0, "Preço"] = df.loc[0, "Preço"] + 1000
+    df.iloc[:-5].to_csv(caminho, index=False)
+    agregados = cas.atualizar_agregados_incrementais(diretorio, arquivo_estado=estado, arquivos=arquivos)
+
+    assert "Loja 2 foi reescrita" in capsys.readouterr().out
+    _comparar(agregados, _completo(diretorio, arquivos))
+
+
+def test_linha_incompleta_fica_para_a_proxima_atualizacao(base_copiada, tmp_path, capsys):
+    diretorio, arquivos = base_copiada
+    estado = str(tmp_path / "estado.pkl")
+    caminho = os.path.join(diretorio, arquivos["Loja 1"])
+    with open(caminho, "rb") as arquivo:
+        linhas = arquivo.readlines()
+    corte = len(linhas) // 2
+    meia_linha = len(linhas[corte]) // 2
+    with open(caminho, "wb") as arquivo:
+        arquivo.writelines(linhas[:corte])
+        arquivo.write(linhas[corte][:meia_linha])
+
+    primeira = cas.atualizar_agregados_incrementais(diretorio, arquivo_estado=estado, tamanho_bloco=200,
+                                                    arquivos=arquivos)
+    assert "Loja 1 termina em linha incompleta" in capsys.readouterr().out
+    assert primeira["linhas"]["Loja 1"] == corte - 1
+
+    with open(caminho, "ab") as arquivo:
+        arquivo.write(linhas[corte][meia_linha:])
+        arquivo.writelines(linhas[corte + 1:])
+    agregados = cas.atualizar_agregados_incrementais(diretorio, arquivo_estado=estado, tamanho_bloco=200,
+                                                     arquivos=arquivos)
+
+    assert "Erro" not in capsys.readouterr().out
+    _comparar(agregados, _completo(diretorio, arquivos))
+    assert agregados["linhas"]["Loja 1"] == len(linhas) - 1
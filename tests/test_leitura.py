@@ -0,0 +1,114 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import agendador_alura_store as agendador
+import challenge_alura_store as cas
+
+FILTROS = [
+    {"inicio": "2022-01-01", "fim": "2022-06-30"},
+    {"categorias": ["livros", "moveis"]},
+    {"inicio": "2021-03-15", "categorias": ["eletronicos"]},
+    {"fim": "2020-12-31"},
+]
+
+
+@pytest.fixture
+def arquivo_loja(base_sintetica, tmp_path):
+    """Cópia de loja_1.csv com uma data inválida e uma vazia (o índice é criado ao lado)."""
+    diretorio, _ = base_sintetica
+    df = pd.read_csv(os.path.join(diretorio, "loja_1.csv"))
+    df.loc[3, "Data da Compra"] = "31/02/2022"
+    df.loc[7, "Data da Compra"] = np.nan
+    caminho = tmp_path / "loja_1.csv"
+    df.to_csv(caminho, index=False)
+    return str(caminho)
+
+
+def _filtrar_completo(caminho, inicio=None, fim=None, categorias=None):
+    df = pd.read_csv(caminho)
+    df["Data da Compra"] = pd.to_datetime(df["Data da Compra"], format="%d/%m/%Y", errors="coerce")
+    if categorias is not None:
+        df = df[df["Categoria do Produto"].isin(categorias)]
+    if inicio is not None or fim is not None:
+        df = cas.filtrar_periodo(df, inicio, fim)
+    return df
+
+
+@pytest.mark.parametrize("usar_indice", [True, False])
+@pytest.mark.parametrize("filtro", FILTROS)
+def test_leitura_filtrada_igual_filtrar_dataframe_completo(arquivo_loja, filtro, usar_indice):
+    esperado = _filtrar_completo(arquivo_loja, **filtro)
+    for _ in range(2):  # segunda leitura usa o índice salvo
+        df, _, _ = cas.ler_loja(arquivo_loja, usar_indice=usar_indice, **filtro)
+        pd.testing.assert_frame_equal(df, esperado, check_index_type=False)
+
+
+def test_projecao_de_colunas(arquivo_loja):
+    df, _, datas_invalidas = cas.ler_loja(arquivo_loja, colunas=["Frete"], inicio="2022-01-01")
+    esperado = _filtrar_completo(arquivo_loja, inicio="2022-01-01")
+    assert list(df.columns) == ["Frete"]
+    assert list(df.index) == list(esperado.index)
+    assert datas_invalidas is None
+
+
+@pytest.mark.parametrize("usar_indice", [True, False])
+def test_leitura_filtrada_mantem_datas_invalidas(arquivo_loja, usar_indice):
+    df, _, datas_invalidas = cas.ler_loja(arquivo_loja, inicio="2022-01-01", usar_indice=usar_indice)
+    assert list(datas_invalidas.index) == [3, 7]
+    assert datas_invalidas[3] == "31/02/2022"
+    assert not df.index.isin([3, 7]).any()
+
+
+def test_carregar_dados_filtrado_relata_datas_invalidas(arquivo_loja, capsys):
+    lojas = cas.carregar_dados(caminhos={"Loja 1": arquivo_loja}, inicio="2022-01-01")
+    saida = capsys.readouterr().out
+    assert "Aviso: 2 datas inválidas encontradas" in saida
+    assert "31/02/2022" in saida
+    assert lojas["Loja 1"]["Data da Compra"].notna().all()
+
+
+def test_indice_criado_na_mesma_passada_da_leitura(arquivo_loja):
+    tamanho = os.path.getsize(arquivo_loja)
+    _, primeira, _ = cas.ler_loja(arquivo_loja, categorias=["livros"])
+    _, segunda, _ = cas.ler_loja(arquivo_loja, categorias=["livros"])
+    assert primeira == tamanho
+    assert segunda < tamanho / 2
+
+
+@pytest.mark.parametrize("filtro", FILTROS)
+def test_blocos_pequenos_cortam_linhas_sem_perder_dados(arquivo_loja, filtro):
+    df, _, datas_invalidas = cas._ler_criando_indice(arquivo_loja, tamanho_leitura=997, **filtro)
+    pd.testing.assert_frame_equal(df, _filtrar_completo(arquivo_loja, **filtro), check_index_type=False)
+    assert set(datas_invalidas.index) <= {3, 7}
+    indice, _ = cas.indice_linhas(arquivo_loja)
+    assert len(indice["inicios"]) == len(pd.read_csv(arquivo_loja))
+    pd.testing.assert_frame_equal(cas.ler_loja(arquivo_loja, **filtro)[0], df, check_index_type=False)
+
+
+def test_indice_refeito_remove_versao_anterior(arquivo_loja):
+    dir_indices = cas.DIR_INDICES
+    cas.ler_loja(arquivo_loja, categorias=["livros"])
+    assert len(os.listdir(dir_indices)) == 1
+
+    with open(arquivo_loja, "a", encoding="utf-8") as arquivo:
+        linha = open(arquivo_loja, encoding="utf-8").read().splitlines()[1]
+        arquivo.write(linha + "\n")
+    df, _, _ = cas.ler_loja(arquivo_loja, categorias=["livros"])
+    assert len(os.listdir(dir_indices)) == 1
+    pd.testing.assert_frame_equal(df, _filtrar_completo(arquivo_loja, categorias=["livros"]),
+                                  check_index_type=False)
+
+
+def test_carregar_dados_filtrado_igual_filtrar_lojas(base_sintetica, lojas):
+    diretorio, arquivos = base_sintetica
+    filtradas = cas.carregar_dados(fonte=diretorio, arquivos=agendador.selecionar_lojas(["2", "4"]),
+                                   inicio="2022-01-01", categorias=["brinquedos"])
+    assert list(filtradas) == ["Loja 2", "Loja 4"]
+    for nome_loja, df in filtradas.items():
+        completo = lojas[nome_loja]
+        esperado = cas.filtrar_periodo(completo[completo["Categoria do Produto"] == "brinquedos"], "2022-01-01")
+        assert list(df.index) == list(esperado.index)
+        pd.testing.assert_series_equal(df["Preço"], esperado["Preço"], check_index_type=False)
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import agendador_alura_store as agendador
+import challenge_alura_store as cas
+
+
+@pytest.fixture(scope="module")
+def base_25_lojas(tmp_path_factory):
+    diretorio = str(tmp_path_factory.mktemp("base_25_lojas"))
+    cas.gerar_base_sintetica(diretorio, 5000, n_lojas=25, seed=11)
+    return diretorio
+
+
+def test_multilojas_fora_da_execucao_padrao(base_sintetica, capsys):
+    agendador.executar_relatorios(fonte=base_sintetica[0], max_workers=1)
+    saida = capsys.readouterr().out
+    assert "RESUMO MULTILOJAS" not in saida
+    assert "RELATÓRIO DE VENDAS GERAL - Loja 1" in saida
+
+
+def test_multilojas_quando_pedido(base_sintetica, capsys):
+    agendador.executar_relatorios(["vendas", "frete"], fonte=base_sintetica[0], multilojas=True)
+    saida = capsys.readouterr().out
+    assert "RESUMO MULTILOJAS" in saida
+    assert "RELATÓRIO DE VENDAS GERAL" not in saida
+    assert "FRETE MÉDIO POR LOJA" in saida
+
+
+def test_multilojas_automatico_acima_do_limite(base_25_lojas, capsys):
+    agendador.executar_relatorios(["vendas", "produtos", "frete"], lojas=range(1, 26), fonte=base_25_lojas)
+    saida = capsys.readouterr().out
+    assert "Modo multilojas (25 lojas)" in saida
+    assert "RESUMO MULTILOJAS" in saida
+    assert "RELATÓRIO DE VENDAS GERAL" not in saida
+
+
+def test_metricas_lojas_iguais_groupby(lojas):
+    df = pd.concat(lojas.values(), keys=list(lojas))
+    grupos = df.groupby(level=0)
+    metricas = cas.calcular_metricas_lojas(cas.construir_cubo(lojas), cas.contar_produtos(lojas))
+    np.testing.assert_allclose(metricas["Faturamento"], grupos["Preço"].sum()[metricas.index])
+    np.testing.assert_allclose(metricas["Frete médio"], grupos["Frete"].mean()[metricas.index])
+    np.testing.assert_allclose(metricas["Avaliação média"], grupos["Avaliação da compra"].mean()[metricas.index])
+    assert (metricas["Vendas"] == grupos.size()[metricas.index]).all()
+    lider = df.groupby([df.index.get_level_values(0), "Categoria do Produto"])["Preço"].sum().groupby(level=0).idxmax()
+    assert list(metricas["Categoria líder"]) == [lider[loja][1] for loja in metricas.index]
+
+
+def test_outlier_plantado_e_ranking():
+    rng = np.random.default_rng(0)
+    metricas = pd.DataFrame({"Faturamento": rng.normal(1000, 10, 50)}, index=[f"Loja {i}" for i in range(50)])
+    metricas.loc["Loja 7", "Faturamento"] = 5000
+    outliers = cas.detectar_outliers_lojas(metricas)
+    assert outliers["Loja"].iloc[0] == "Loja 7"
+    ranking = cas.calcular_ranking_lojas(metricas, n=3)
+    maiores = ranking[ranking["Grupo"] == "maiores"]
+    assert list(maiores["Loja"]) == list(metricas["Faturamento"].nlargest(3).index)
@@ -0,0 +1,40 @@
+import json
+
+import pandas as pd
+
+import agendador_alura_store as agendador
+import challenge_alura_store as cas
+
+
+def _executar_com_perfil(diretorio, max_workers, arquivo_trace):
+    cas.ativar_perfil(str(arquivo_trace))
+    try:
+        agendador.executar_relatorios(["frete", "avaliacao_geral"], fonte=diretorio, max_workers=max_workers)
+    finally:
+        cas.finalizar_perfil()
+    with open(arquivo_trace, encoding="utf-8") as arquivo:
+        return {evento["etapa"]: evento for evento in json.load(arquivo)["eventos"]}
+
+
+def test_perfil_registra_etapas_com_pico_de_memoria(base_sintetica, tmp_path, capsys):
+    eventos = _executar_com_perfil(base_sintetica[0], 1, tmp_path / "trace.json")
+    for etapa in ("executar_relatorios", "carregar_dados", "construir_cubo", "frete_medio_por_loja"):
+        assert eventos[etapa]["pico_mb"] is not None
+        assert eventos[etapa]["parede_s"] >= eventos[etapa]["proprio_s"] >= 0
+    assert "PERFIL DE EXECUÇÃO POR ETAPA" in capsys.readouterr().out
+
+
+def test_perfil_sem_pico_de_memoria_nas_etapas_em_threads(base_sintetica, tmp_path, capsys):
+    eventos = _executar_com_perfil(base_sintetica[0], 2, tmp_path / "trace.json")
+    assert eventos["executar_relatorios"]["pico_mb"] is not None
+    assert eventos["carregar_dados"]["pico_mb"] is not None
+    for etapa in ("construir_cubo", "frete_medio_por_loja", "avaliacao_geral_por_loja"):
+        assert eventos[etapa]["pico_mb"] is None
+    assert "n/a" in capsys.readouterr().out
+    assert cas._PERFIL["concorrentes"] == 0
+
+
+def test_instrumentar_desligado_nao_gera_eventos():
+    cas._PERFIL["eventos"] = []
+    cas.converter_datas(pd.Series(["01/02/2021"]))
+    assert cas._PERFIL["eventos"] == []
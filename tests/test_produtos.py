@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import challenge_alura_store as cas
+
+
+def _top_k_ordenando(contagem, k, maiores=True):
+    """Referência: ordenação completa por (valor, rótulo)."""
+    df = pd.DataFrame({"valor": contagem.to_numpy(), "rotulo": contagem.index.astype(str)})
+    df = df.sort_values(["valor", "rotulo"], ascending=[not maiores, True]).head(k)
+    df = df.sort_values(["valor", "rotulo"], ascending=[False, True])
+    return list(zip(df["rotulo"], df["valor"]))
+
+
+@pytest.mark.parametrize("maiores", [True, False])
+@pytest.mark.parametrize("k", [1, 3, 10, 50, 500])
+def test_selecionar_top_k_igual_ordenacao_completa(k, maiores):
+    rng = np.random.default_rng(k)
+    # Poucos valores distintos: muitos empates no corte
+    rotulos = [f"Produto {i}" for i in rng.permutation(300)]
+    contagem = pd.Series(rng.integers(1, 6, 300), index=rotulos)
+    obtido = cas.selecionar_top_k(contagem, k, maiores)
+    assert list(zip(obtido.index, obtido.to_numpy())) == _top_k_ordenando(contagem, k, maiores)
+
+
+def test_selecionar_top_k_nao_depende_da_ordem():
+    contagem = pd.Series([5, 3, 3, 3, 1], index=["e", "d", "c", "b", "a"])
+    embaralhada = contagem.sample(frac=1, random_state=1)
+    assert list(cas.selecionar_top_k(contagem, 2).index) == ["e", "b"]
+    assert list(cas.selecionar_top_k(embaralhada, 2).index) == ["e", "b"]
+    assert list(cas.selecionar_top_k(contagem, 2, maiores=False).index) == ["b", "a"]
+
+
+def test_heavy_hitters_encontra_item_plantado():
+    rng = np.random.default_rng(0)
+    itens = np.concatenate([np.full(5_000, "plantado", dtype=object),
+                            np.array([f"sku {i}" for i in rng.integers(0, 20_000, 45_000)], dtype=object)])
+    rng.shuffle(itens)
+    sketch = cas.SketchHeavyHitters(capacidade=50)
+    for bloco in np.array_split(itens, 10):
+        sketch.atualizar(bloco)
+    top = sketch.top(1)
+    assert list(top.index) == ["plantado"]
+    assert top["Contagem (mín.)"].iloc[0] <= 5_000 <= top["Contagem (máx.)"].iloc[0]
+    assert sketch.erro <= len(itens) / 51
+
+
+def test_heavy_hitters_mesclado_igual_sketch_unico():
+    rng = np.random.default_rng(1)
+    itens = np.array([f"sku {i}" for i in rng.zipf(1.5, 20_000) % 1_000], dtype=object)
+    unico = cas.SketchHeavyHitters(capacidade=100).atualizar(itens)
+    partes = [cas.SketchHeavyHitters(capacidade=100).atualizar(bloco) for bloco in np.array_split(itens, 4)]
+    mesclado = partes[0]
+    for parte in partes[1:]:
+        mesclado.mesclar(parte)
+    reais = pd.Series(itens).value_counts()
+    for sketch in (unico, mesclado):
+        top = sketch.top(5)
+        assert (top["Contagem (mín.)"] <= reais[top.index]).all()
+        assert (reais[top.index] <= top["Contagem (máx.)"]).all()
+    assert list(unico.top(3).index) == list(reais.index[:3])
+    assert list(mesclado.top(3).index) == list(reais.index[:3])
+
+
+def test_top_produtos_igual_value_counts(lojas):
+    tops = cas.calcular_top_produtos(cas.contar_produtos(lojas), lojas, top=5)
+    for nome_loja, df in lojas.items():
+        contagem = df["Produto"].value_counts()
+        assert list(zip(tops["mais"][nome_loja].index, tops["mais"][nome_loja])) == _top_k_ordenando(contagem, 5)
+        assert list(zip(tops["menos"][nome_loja].index, tops["menos"][nome_loja])) == \
+            _top_k_ordenando(contagem, 5, maiores=False)
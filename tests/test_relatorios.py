@@ -0,0 +1,44 @@
+import os
+
+import pandas as pd
+import pytest
+
+import agendador_alura_store as agendador
+
+
+@pytest.fixture
+def base_loja_sem_vendas(base_sintetica, tmp_path):
+    """Cópia da base sintética em que a Loja 4 só tem vendas em 2020."""
+    diretorio, arquivos = base_sintetica
+    destino = tmp_path / "base_loja_sem_vendas"
+    destino.mkdir()
+    for arquivo in arquivos.values():
+        df = pd.read_csv(os.path.join(diretorio, arquivo))
+        if arquivo == "loja_4.csv":
+            df = df[df["Data da Compra"].str.endswith("/2020")]
+        df.to_csv(destino / arquivo, index=False)
+    return str(destino)
+
+
+def test_filtro_que_esvazia_uma_loja_nao_interrompe_relatorios(base_loja_sem_vendas, capsys):
+    agendador.main_cli(["--fonte", base_loja_sem_vendas, "--sem-graficos", "--sem-cache",
+                  "--inicio", "2022-01-01", "--fim", "2022-06-30"])
+    saida = capsys.readouterr().out
+    assert "Erro no relatório" not in saida
+    assert "Sem vendas de Loja 4 nos filtros selecionados." in saida
+    assert "Loja 4: sem vendas nos filtros selecionados" in saida
+    assert "RELATÓRIO DE VENDAS GERAL - Loja 3" in saida
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_erro_em_um_relatorio_nao_interrompe_os_demais(base_sintetica, monkeypatch, capsys, max_workers):
+    def falhar(recursos):
+        raise ValueError("falha simulada")
+
+    _, recursos, colunas = agendador.RELATORIOS["frete"]
+    monkeypatch.setitem(agendador.RELATORIOS, "frete", (falhar, recursos, colunas))
+    diretorio, _ = base_sintetica
+    agendador.executar_relatorios(["frete", "avaliacao_geral"], fonte=diretorio, max_workers=max_workers)
+    saida = capsys.readouterr().out
+    assert "Erro no relatório 'frete': falha simulada" in saida
+    assert "AVALIAÇÃO GERAL POR LOJA" in saida
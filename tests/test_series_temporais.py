@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import challenge_alura_store as cas
+
+
+@pytest.fixture(scope="module")
+def lojas_modulo(base_sintetica):
+    diretorio, arquivos = base_sintetica
+    return cas.carregar_dados(fonte=diretorio, arquivos=arquivos)
+
+
+@pytest.fixture(scope="module")
+def serie(lojas_modulo):
+    return cas.construir_serie_diaria(lojas_modulo)
+
+
+@pytest.fixture(scope="module")
+def diaria_pandas(lojas_modulo, serie):
+    df = cas.combinar_lojas(lojas_modulo)
+    df = df[df["Data da Compra"].notna()]
+    diaria = (df.groupby([df.index.get_level_values(0).rename("Loja"), "Categoria do Produto",
+                          df["Data da Compra"].dt.normalize()])["Preço"].sum()
+              .unstack(["Loja", "Categoria do Produto"]))
+    return diaria.reindex(index=serie.dias, columns=serie.chaves, fill_value=0.0).fillna(0.0)
+
+
+def _comparar(obtido, esperado):
+    pd.testing.assert_frame_equal(obtido, esperado, check_names=False, check_freq=False,
+                                  check_index_type=False, check_column_type=False)
+
+
+def test_diaria_e_acumulada_iguais_ao_groupby(serie, diaria_pandas):
+    _comparar(serie.diaria(), diaria_pandas)
+    _comparar(serie.acumulada(), diaria_pandas.cumsum())
+
+
+def test_mensal_e_anual_iguais_ao_resample(serie, diaria_pandas):
+    mensal = diaria_pandas.groupby(diaria_pandas.index.to_period("M")).sum()
+    _comparar(serie.mensal(), mensal)
+    anual = diaria_pandas.groupby(diaria_pandas.index.year).sum()
+    _comparar(serie.anual(), anual)
+
+
+@pytest.mark.parametrize("dias", [1, 7, 30, 400])
+@pytest.mark.parametrize("medida", ["soma", "media"])
+def test_janela_movel_igual_rolling(serie, diaria_pandas, dias, medida):
+    janela = diaria_pandas.rolling(dias)
+    _comparar(serie.janela_movel(dias, medida), janela.sum() if medida == "soma" else janela.mean())
+
+
+@pytest.mark.parametrize("defasagem", [1, 12])
+def test_crescimento_igual_pct_change(serie, diaria_pandas, defasagem):
+    mensal = diaria_pandas.groupby(diaria_pandas.index.to_period("M")).sum()
+    base = mensal.shift(defasagem)
+    esperado = (mensal / base - 1).where(base != 0)
+    _comparar(serie.crescimento(defasagem), esperado)
+
+
+def test_agrupar_por_loja(serie, diaria_pandas):
+    por_loja = diaria_pandas.T.groupby(level="Loja").sum().T
+    _comparar(serie.agrupar("Loja").diaria(), por_loja)
+
+
+def test_combinar_series_de_cada_loja(lojas_modulo, serie):
+    partes = [cas.construir_serie_diaria({nome: df}) for nome, df in lojas_modulo.items()]
+    combinada = cas.combinar_series_diarias(partes[::-1] + [None])
+    assert combinada.chaves.equals(serie.chaves)
+    assert combinada.dias.equals(serie.dias)
+    np.testing.assert_array_equal(combinada.valores, serie.valores)
@@ -0,0 +1,68 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+import benchmark_alura_store as benchmark
+import challenge_alura_store as cas
+
+COLUNAS_LOJA = ["Produto", "Categoria do Produto", "Preço", "Frete", "Data da Compra", "Vendedor",
+                "Local da compra", "Avaliação da compra", "Tipo de pagamento", "Quantidade de parcelas",
+                "lat", "lon"]
+
+
+def _conteudo(diretorio):
+    return {nome: open(os.path.join(diretorio, nome), "rb").read() for nome in sorted(os.listdir(diretorio))}
+
+
+def test_mesma_seed_gera_os_mesmos_arquivos(tmp_path):
+    cas.gerar_base_sintetica(str(tmp_path / "a"), 3000, n_lojas=3, seed=1, tamanho_bloco=700)
+    cas.gerar_base_sintetica(str(tmp_path / "b"), 3000, n_lojas=3, seed=1, tamanho_bloco=700)
+    cas.gerar_base_sintetica(str(tmp_path / "c"), 3000, n_lojas=3, seed=2, tamanho_bloco=700)
+    assert _conteudo(tmp_path / "a") == _conteudo(tmp_path / "b")
+    assert _conteudo(tmp_path / "a") != _conteudo(tmp_path / "c")
+
+
+def test_base_sintetica_segue_o_esquema_das_lojas(base_sintetica, lojas, capsys):
+    diretorio, arquivos = base_sintetica
+    for arquivo in arquivos.values():
+        assert pd.read_csv(os.path.join(diretorio, arquivo), nrows=0).columns.tolist() == COLUNAS_LOJA
+    assert sum(len(df) for df in lojas.values()) == 6000
+    assert "datas inválidas" not in capsys.readouterr().out
+
+    combinado = cas.combinar_lojas(lojas)
+    assert not cas.validar_dados(combinado).any().any()
+    assert set(combinado["Categoria do Produto"]) <= set(cas.CATALOGO_SINTETICO)
+    assert pd.read_csv(os.path.join(diretorio, "lojas.csv"))["Loja"].tolist() == list(arquivos)
+
+
+def test_benchmark_pipeline_grava_e_compara_execucoes(tmp_path, monkeypatch, capsys):
+    monkeypatch.setitem(benchmark.ESCALAS, "teste", (2000, 3))
+    monkeypatch.setattr(benchmark, "DIR_SINTETICOS", str(tmp_path / "sinteticos"))
+    resultados = str(tmp_path / "resultados.jsonl")
+
+    primeira = benchmark.benchmark_pipeline("teste", seed=3, memoria=False, arquivo=resultados)
+    assert [e for e in primeira["etapas"] if "erro" in e] == []
+    segunda = benchmark.benchmark_pipeline("teste", seed=3, memoria=False, arquivo=resultados)
+
+    with open(resultados, encoding="utf-8") as f:
+        execucoes = [json.loads(linha) for linha in f]
+    assert [e["total_segundos"] for e in execucoes] == [primeira["total_segundos"], segunda["total_segundos"]]
+    assert benchmark.ultima_execucao("teste", memoria=False, arquivo=resultados) == execucoes[-1]
+    assert "variação em relação à execução de" in capsys.readouterr().out
+
+
+def test_escala_fora_da_memoria_roda_so_o_streaming(tmp_path, monkeypatch):
+    monkeypatch.setitem(benchmark.ESCALAS, "teste_streaming", (2000, 3))
+    monkeypatch.setattr(benchmark, "ESCALAS_STREAMING", {"teste_streaming", *benchmark.ESCALAS_STREAMING})
+    monkeypatch.setattr(benchmark, "DIR_SINTETICOS", str(tmp_path / "sinteticos"))
+    chamadas = []
+    monkeypatch.setattr(cas, "carregar_dados", lambda *args, **kwargs: chamadas.append(args))
+
+    execucao = benchmark.benchmark_pipeline("teste_streaming", seed=3, memoria=False,
+                                            arquivo=str(tmp_path / "resultados.jsonl"))
+    assert [e["etapa"] for e in execucao["etapas"]] == ["main_streaming", "main_streaming_fragmentado"]
+    assert [e for e in execucao["etapas"] if "erro" in e] == []
+    assert chamadas == []
+    assert "producao" in benchmark.ESCALAS_STREAMING
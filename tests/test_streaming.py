@@ -0,0 +1,43 @@
+import pandas as pd
+import pytest
+
+import agendador_alura_store as agendador
+import challenge_alura_store as cas
+
+
+def _ordenado(agregado):
+    return agregado.sort_index()
+
+
+@pytest.mark.parametrize("tamanho_bloco", [250, 100_000])
+def test_streaming_igual_cubo_em_memoria(base_sintetica, lojas, tamanho_bloco):
+    diretorio, arquivos = base_sintetica
+    agregados = cas.carregar_agregados_em_blocos(diretorio, tamanho_bloco=tamanho_bloco, arquivos=arquivos)
+    pd.testing.assert_frame_equal(_ordenado(agregados["cubo"]), _ordenado(cas.construir_cubo(lojas)))
+    pd.testing.assert_series_equal(_ordenado(agregados["produtos"]), _ordenado(cas.contar_produtos(lojas)),
+                                   check_names=False)
+    pd.testing.assert_frame_equal(_ordenado(agregados["distribuicao"]),
+                                  _ordenado(cas.construir_distribuicao(lojas)))
+    assert agregados["linhas"] == {nome: len(df) for nome, df in lojas.items()}
+
+
+def test_streaming_com_filtros_igual_filtrar_em_memoria(base_sintetica, lojas):
+    diretorio, arquivos = base_sintetica
+    agregados = cas.carregar_agregados_em_blocos(diretorio, tamanho_bloco=300, arquivos=arquivos,
+                                                 inicio="2021-06-01", fim="2022-05-31",
+                                                 categorias=["moveis", "livros"])
+    filtradas = {nome: cas.filtrar_periodo(df[df["Categoria do Produto"].isin(["moveis", "livros"])],
+                                           "2021-06-01", "2022-05-31")
+                 for nome, df in lojas.items()}
+    pd.testing.assert_frame_equal(_ordenado(agregados["cubo"]), _ordenado(cas.construir_cubo(filtradas)))
+
+
+def test_streaming_relatorios_iguais_ao_modo_em_memoria(base_sintetica, capsys):
+    diretorio, _ = base_sintetica
+    agendador.main_cli(["--fonte", diretorio, "--sem-graficos", "--relatorios", "vendas", "frete"])
+    em_memoria = capsys.readouterr().out
+    agendador.main_cli(["--fonte", diretorio, "--sem-graficos", "--relatorios", "vendas", "frete",
+                  "--streaming", "--tamanho-bloco", "400"])
+    streaming = capsys.readouterr().out
+    inicio = em_memoria.index("RELATÓRIO DE VENDAS GERAL - Loja 1")
+    assert streaming[streaming.index("RELATÓRIO DE VENDAS GERAL - Loja 1"):] == em_memoria[inicio:]
@@ -0,0 +1,112 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import challenge_alura_store as cas
+
+# Linha de dados -> (coluna, valor inválido, regra violada)
+VIOLACOES = {
+    2: ("Avaliação da compra", 7, "avaliacao_fora_de_1_a_5"),
+    5: ("Preço", -10.0, "preco_negativo"),
+    9: ("Frete", -1.5, "frete_negativo"),
+    14: ("Data da Compra", "31/02/2022", "data_invalida"),
+    20: ("lat", 48.85, "gps_fora_do_brasil"),
+}
+
+
+@pytest.fixture
+def base_com_violacoes(base_sintetica, tmp_path):
+    diretorio, arquivos = base_sintetica
+    destino = tmp_path / "base"
+    shutil.copytree(diretorio, destino)
+    caminho = destino / arquivos["Loja 1"]
+    df = pd.read_csv(caminho)
+    for linha, (coluna, valor, _) in VIOLACOES.items():
+        df[coluna] = df[coluna].astype(object)
+        df.loc[linha, coluna] = valor
+    df.loc[2, "Preço"] = -3.0  # duas regras na mesma linha
+    df.loc[30, "Avaliação da compra"] = np.nan  # nulo não é violação
+    df.to_csv(caminho, index=False)
+    return str(destino), arquivos
+
+
+def _referencia_por_linha(df):
+    """Uma verificação por linha, em Python puro, das mesmas regras."""
+    lat_min, lat_max = cas.LIMITES_BRASIL["lat"]
+    lon_min, lon_max = cas.LIMITES_BRASIL["lon"]
+    linhas = []
+    for _, linha in df.iterrows():
+        linhas.append({
+            "avaliacao_fora_de_1_a_5": not pd.isna(linha["Avaliação da compra"])
+                                       and not 1 <= linha["Avaliação da compra"] <= 5,
+            "preco_negativo": linha["Preço"] < 0,
+            "frete_negativo": linha["Frete"] < 0,
+            "data_invalida": pd.isna(linha["Data da Compra"]),
+            "gps_fora_do_brasil": not (lat_min <= linha["lat"] <= lat_max and lon_min <= linha["lon"] <= lon_max),
+        })
+    return pd.DataFrame(linhas, index=df.index)
+
+
+def test_validar_dados_igual_verificacao_linha_a_linha(base_com_violacoes):
+    diretorio, arquivos = base_com_violacoes
+    lojas = cas.carregar_dados(fonte=diretorio, arquivos=arquivos)
+    df = lojas["Loja 1"]
+    violacoes = cas.validar_dados(df)
+    pd.testing.assert_frame_equal(violacoes, _referencia_por_linha(df))
+    assert violacoes.sum().to_dict() == {"avaliacao_fora_de_1_a_5": 1, "preco_negativo": 2,
+                                         "frete_negativo": 1, "data_invalida": 1, "gps_fora_do_brasil": 1}
+
+
+def test_regras_sem_colunas_carregadas_sao_ignoradas():
+    violacoes = cas.validar_dados(pd.DataFrame({"Preço": [1.0, -2.0, np.nan]}))
+    assert violacoes.columns.tolist() == ["preco_negativo"]
+    assert violacoes["preco_negativo"].tolist() == [False, True, False]
+
+
+@pytest.mark.parametrize("datas", [["01/02/2022", "31/02/2022", np.nan], [np.nan, np.nan, np.nan]])
+def test_datas_nao_convertidas_sao_coagidas(datas):
+    violacoes = cas.validar_dados(pd.DataFrame({"Data da Compra": datas}))
+    esperado = [pd.isna(pd.to_datetime(d, format="%d/%m/%Y", errors="coerce")) for d in datas]
+    assert violacoes["data_invalida"].tolist() == esperado
+
+
+def test_quarentena_separa_as_linhas_com_violacao(base_com_violacoes, tmp_path, capsys):
+    diretorio, arquivos = base_com_violacoes
+    dir_quarentena = str(tmp_path / "quarentena")
+    completas = cas.carregar_dados(fonte=diretorio, arquivos=arquivos)
+    lojas = cas.carregar_dados(fonte=diretorio, arquivos=arquivos, dir_quarentena=dir_quarentena)
+
+    assert "Validação - Loja 1: 5 de" in capsys.readouterr().out
+    quarentena = pd.read_csv(cas.arquivo_quarentena(dir_quarentena, "Loja 1"))
+    assert quarentena["Linha"].tolist() == sorted(VIOLACOES)
+    regras = dict(zip(quarentena["Linha"], quarentena["Regras violadas"]))
+    assert regras[2] == "avaliacao_fora_de_1_a_5;preco_negativo"
+    assert all(regras[linha] == regra for linha, (_, _, regra) in VIOLACOES.items() if linha != 2)
+
+    pd.testing.assert_frame_equal(lojas["Loja 1"], completas["Loja 1"].drop(index=list(VIOLACOES)))
+    pd.testing.assert_frame_equal(lojas["Loja 2"], completas["Loja 2"])
+    assert not os.path.exists(cas.arquivo_quarentena(dir_quarentena, "Loja 2"))
+
+
+def test_quarentena_no_streaming_igual_carga_completa(base_com_violacoes, tmp_path):
+    diretorio, arquivos = base_com_violacoes
+    dir_quarentena = str(tmp_path / "quarentena")
+    lojas = cas.carregar_dados(fonte=diretorio, arquivos=arquivos, dir_quarentena=dir_quarentena)
+    agregados = cas.carregar_agregados_em_blocos(diretorio, tamanho_bloco=200, arquivos=arquivos,
+                                                 dir_quarentena=dir_quarentena)
+
+    pd.testing.assert_frame_equal(agregados["cubo"].sort_index(), cas.construir_cubo(lojas).sort_index())
+    quarentena = pd.read_csv(cas.arquivo_quarentena(dir_quarentena, "Loja 1"))
+    assert quarentena["Linha"].tolist() == sorted(VIOLACOES)
+
+
+def test_quarentena_no_modo_fragmentado_igual_carga_completa(base_com_violacoes, tmp_path):
+    diretorio, arquivos = base_com_violacoes
+    lojas = cas.carregar_dados(fonte=diretorio, arquivos=arquivos, dir_quarentena=str(tmp_path / "a"))
+    agregados = cas.carregar_agregados_fragmentados(diretorio, tamanho_fragmento=20_000, max_workers=0,
+                                                    arquivos=arquivos, dir_quarentena=str(tmp_path / "b"))
+    pd.testing.assert_frame_equal(agregados["cubo"].sort_index(), cas.construir_cubo(lojas).sort_index())
+    assert sum(len(pd.read_csv(tmp_path / "b" / nome)) for nome in os.listdir(tmp_path / "b")) == len(VIOLACOES)